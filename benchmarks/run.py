@@ -0,0 +1,204 @@
+"""Benchmark docugen's scan and generate on synthetic local sites.
+
+Each case (flavor x phase) runs in a fresh worker process, so its peak RSS
+is its own. The worker serves the generated site from a local HTTP server
+on a thread and runs ``core.scan`` or ``core.generate`` with the httpx
+fetcher. Results are written as JSON; pass an earlier result file with
+``--compare`` to print the change per case.
+
+    uv run python benchmarks/run.py --pages 200 --output before.json
+    uv run python benchmarks/run.py --pages 200 --compare before.json
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from sitegen import FLAVORS, generate_site
+
+PHASES = ["scan", "generate"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve(path):
+    """Serve ``path`` on a free local port and yield the base URL."""
+    handler = functools.partial(_QuietHandler, directory=path)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+def run_case(case):
+    """Run one benchmark case in this process and return its measurements."""
+    import anyio
+    from docugen.core import scan, generate
+
+    def quiet(message, verbose_only=False):
+        pass
+
+    with tempfile.TemporaryDirectory(prefix="docugen-bench-") as tmp:
+        site = os.path.join(tmp, "site")
+        start_page = generate_site(site, case["flavor"], case["pages"], case["assets_per_page"], case["fanout"], case["css_urls"], seed=case["seed"])
+        output = os.path.join(tmp, "Bench.docset")
+        with serve(site) as base_url:
+            urls = [base_url + start_page]
+            start = time.perf_counter()
+            if case["phase"] == "scan":
+                found = anyio.run(functools.partial(scan, urls, js=False, max_pages=case["pages"], log_callback=quiet, concurrency=case["concurrency"]))
+                pages = sum(1 for url in found if url.endswith(".html"))
+            else:
+                anyio.run(functools.partial(generate, urls, output, js=False, max_pages=case["pages"], log_callback=quiet, concurrency=case["concurrency"], asset_cache="", host_rate=0))
+                pages = sum(1 for name in os.listdir(os.path.join(output, "Contents", "Resources", "Documents")) if name.endswith(".html"))
+            seconds = time.perf_counter() - start
+        return {
+            "pages": pages,
+            "seconds": seconds,
+            "pages_per_sec": pages / seconds if seconds else 0.0,
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "output_bytes": _tree_size(output) if case["phase"] == "generate" else 0,
+        }
+
+
+def _run_worker(case):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(case)],
+        capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark case {case['flavor']}/{case['phase']} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summarize(case, runs):
+    seconds = statistics.median(r["seconds"] for r in runs)
+    return {
+        "flavor": case["flavor"],
+        "phase": case["phase"],
+        "pages": runs[0]["pages"],
+        "seconds": seconds,
+        "pages_per_sec": runs[0]["pages"] / seconds if seconds else 0.0,
+        "peak_rss_mb": max(r["peak_rss_bytes"] for r in runs) / (1024 * 1024),
+        "output_bytes": runs[0]["output_bytes"],
+        "runs": runs,
+    }
+
+
+def compare(results, baseline):
+    """Print pages/sec and peak RSS of ``results`` against ``baseline``, per case."""
+    previous = {(r["flavor"], r["phase"]): r for r in baseline["results"]}
+    print(f"{'case':<22}{'pages/s':>12}{'change':>9}{'RSS MB':>10}{'change':>9}")
+    for r in results["results"]:
+        old = previous.get((r["flavor"], r["phase"]))
+        name = f"{r['flavor']}/{r['phase']}"
+        if old is None:
+            print(f"{name:<22}{r['pages_per_sec']:>12.1f}{'new':>9}{r['peak_rss_mb']:>10.1f}")
+            continue
+        speed = (r["pages_per_sec"] / old["pages_per_sec"] - 1) * 100 if old["pages_per_sec"] else 0.0
+        rss = (r["peak_rss_mb"] / old["peak_rss_mb"] - 1) * 100 if old["peak_rss_mb"] else 0.0
+        print(f"{name:<22}{r['pages_per_sec']:>12.1f}{speed:>+8.1f}%{r['peak_rss_mb']:>10.1f}{rss:>+8.1f}%")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark docugen on synthetic documentation sites")
+    p.add_argument("--flavor", choices=FLAVORS, action="append", help="Site flavor (repeatable; default: all)")
+    p.add_argument("--phase", choices=PHASES, action="append", help="Phase to measure (repeatable; default: both)")
+    p.add_argument("--pages", type=int, default=100)
+    p.add_argument("--assets-per-page", type=int, default=4)
+    p.add_argument("--fanout", type=int, default=5, help="Links from each page to other pages")
+    p.add_argument("--css-urls", type=int, default=8, help="url() references per stylesheet")
+    p.add_argument("--concurrency", "-j", type=int, default=4)
+    p.add_argument("--repeat", type=int, default=1, help="Runs per case; the median time is reported")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--output", "-o", default=None, help="Result file (default: benchmarks/results/<commit>-<time>.json)")
+    p.add_argument("--compare", default=None, help="Earlier result file to compare against")
+    p.add_argument("--worker", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_case(json.loads(args.worker))))
+        return
+
+    params = {
+        "pages": args.pages,
+        "assets_per_page": args.assets_per_page,
+        "fanout": args.fanout,
+        "css_urls": args.css_urls,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": [],
+    }
+    for flavor in args.flavor or FLAVORS:
+        for phase in args.phase or PHASES:
+            case = dict(params, flavor=flavor, phase=phase)
+            runs = [_run_worker(case) for _ in range(max(1, args.repeat))]
+            summary = _summarize(case, runs)
+            results["results"].append(summary)
+            print(f"{flavor}/{phase}: {summary['pages']} pages in {summary['seconds']:.2f}s "
+                  f"({summary['pages_per_sec']:.1f} pages/s), peak RSS {summary['peak_rss_mb']:.1f} MB, "
+                  f"output {summary['output_bytes'] / 1024:.0f} KiB")
+
+    output = args.output
+    if output is None:
+        commit = (results["commit"] or "worktree")[:10]
+        output = os.path.join(ROOT, "benchmarks", "results", f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
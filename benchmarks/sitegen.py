@@ -0,0 +1,156 @@
+"""Generate synthetic documentation sites for benchmarking docugen.
+
+Each flavor produces the markup its parser looks for (Sphinx, Docusaurus,
+rustdoc or plain HTML). Pages are linked in a chain plus ``fanout`` extra
+links each, so every page is reachable from ``index.html``. Every page
+references ``assets_per_page`` images of its own, the shared theme
+stylesheet and one of ten section stylesheets; each stylesheet holds
+``css_urls`` ``url()`` references to fonts and images.
+"""
+import argparse
+import os
+import random
+import shutil
+
+FLAVORS = ["sphinx", "docusaurus", "rustdoc", "generic"]
+SECTION_STYLESHEETS = 10
+
+# Smallest valid PNG (1x1, transparent)
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+WORDS = (
+    "buffer render texture shader vertex queue device memory handle command "
+    "pipeline sampler layout descriptor instance surface swapchain image view "
+    "fence semaphore event query format extent offset region stage access"
+).split()
+
+
+def _paragraph(rng, words=60):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _page_links(i, pages, fanout):
+    targets = [(i + 1) % pages]
+    step = max(1, pages // (fanout + 1))
+    for j in range(1, fanout):
+        targets.append((i + j * step + 7) % pages)
+    return [t for t in dict.fromkeys(targets) if t != i]
+
+
+def _page_name(i):
+    return "index.html" if i == 0 else f"page_{i}.html"
+
+
+def _symbols(rng, i, count=8):
+    return [f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}_{k}" for k in range(count)]
+
+
+def _head(flavor, title, i):
+    links = [
+        '<link rel="stylesheet" href="_static/css/theme.css">',
+        f'<link rel="stylesheet" href="_static/css/section_{i % SECTION_STYLESHEETS}.css">',
+    ]
+    if flavor == "sphinx":
+        links.insert(0, '<meta name="generator" content="Docutils 0.20: https://docutils.sourceforge.io/">')
+    elif flavor == "docusaurus":
+        links.insert(0, '<meta name="generator" content="Docusaurus v3.1.0">')
+    return f'<head><meta charset="utf-8"><title>{title}</title>{"".join(links)}</head>'
+
+
+def _body(flavor, rng, i, pages, fanout, assets_per_page):
+    symbols = _symbols(rng, i)
+    nav = "".join(f'<li><a href="{_page_name(t)}">Page {t}</a></li>' for t in _page_links(i, pages, fanout))
+    images = "".join(f'<img src="_static/img/page_{i}_{k}.png" alt="figure {k}">' for k in range(assets_per_page))
+    text = "".join(f"<p>{_paragraph(rng)}</p>" for _ in range(3))
+
+    if flavor == "sphinx":
+        items = "".join(
+            f'<dl class="py function"><dt class="sig sig-object py" id="{s}">{s}()</dt><dd><p>{_paragraph(rng, 20)}</p></dd></dl>'
+            for s in symbols
+        )
+        return (
+            f'<body class="wy-body-for-nav"><div class="wy-nav-side sphinx_rtd_theme"><ul>{nav}</ul></div>'
+            f'<div class="document"><section id="page-{i}"><h1>Page {i}</h1>{text}{images}{items}</section></div></body>'
+        )
+    if flavor == "docusaurus":
+        items = "".join(f'<h2 id="{s}">{s}</h2><p>{_paragraph(rng, 20)}</p>' for s in symbols)
+        return (
+            f'<body><div id="__docusaurus"><nav class="menu"><ul>{nav}</ul></nav>'
+            f'<main><article><h1 id="page-{i}">Page {i}</h1>{text}{images}{items}</article></main></div></body>'
+        )
+    if flavor == "rustdoc":
+        items = "".join(
+            f'<div class="item-row"><a class="item-name {"method" if k % 2 else "type"}" id="{s}" href="#{s}">{s}</a>'
+            f'<div class="desc">{_paragraph(rng, 12)}</div></div>'
+            for k, s in enumerate(symbols)
+        )
+        return (
+            f'<body class="rustdoc mod"><nav class="sidebar"><ul>{nav}</ul></nav>'
+            f'<main><h1>Module page_{i}</h1>{text}{images}<section class="item-table">{items}</section></main></body>'
+        )
+    items = "".join(f'<h2 id="{s}">{s}</h2><p>{_paragraph(rng, 20)}</p>' for s in symbols)
+    return f'<body><nav><ul>{nav}</ul></nav><h1 id="page-{i}">Page {i}</h1>{text}{images}{items}</body>'
+
+
+def _stylesheet(name, css_urls):
+    rules = []
+    for k in range(css_urls):
+        if k % 2:
+            rules.append(f'@font-face {{ font-family: "{name}-{k}"; src: url("../fonts/{name}_{k}.woff2") format("woff2"); }}')
+        else:
+            rules.append(f".{name}-bg-{k} {{ background-image: url('../img/{name}_{k}.png'); }}")
+    return "\n".join(rules) + "\n"
+
+
+def generate_site(path, flavor="generic", pages=100, assets_per_page=4, fanout=5, css_urls=8, font_bytes=4096, seed=0):
+    """Write a synthetic site of ``flavor`` into ``path`` (replacing it) and return its start page."""
+    if flavor not in FLAVORS:
+        raise ValueError(f"unknown flavor {flavor!r}, expected one of {FLAVORS}")
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    for sub in ("css", "img", "fonts"):
+        os.makedirs(os.path.join(path, "_static", sub))
+
+    font = bytes(rng.getrandbits(8) for _ in range(font_bytes))
+    for name in ["theme"] + [f"section_{n}" for n in range(SECTION_STYLESHEETS)]:
+        with open(os.path.join(path, "_static", "css", f"{name}.css"), "w", encoding="utf-8") as f:
+            f.write(_stylesheet(name, css_urls))
+        for k in range(css_urls):
+            if k % 2:
+                target = os.path.join(path, "_static", "fonts", f"{name}_{k}.woff2")
+                data = font
+            else:
+                target = os.path.join(path, "_static", "img", f"{name}_{k}.png")
+                data = PNG
+            with open(target, "wb") as f:
+                f.write(data)
+
+    for i in range(pages):
+        for k in range(assets_per_page):
+            with open(os.path.join(path, "_static", "img", f"page_{i}_{k}.png"), "wb") as f:
+                f.write(PNG)
+        html = f"<!DOCTYPE html><html>{_head(flavor, f'Page {i} - Synthetic {flavor}', i)}{_body(flavor, rng, i, pages, fanout, assets_per_page)}</html>\n"
+        with open(os.path.join(path, _page_name(i)), "w", encoding="utf-8") as f:
+            f.write(html)
+    return "index.html"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic documentation site")
+    p.add_argument("path")
+    p.add_argument("--flavor", choices=FLAVORS, default="generic")
+    p.add_argument("--pages", type=int, default=100)
+    p.add_argument("--assets-per-page", type=int, default=4)
+    p.add_argument("--fanout", type=int, default=5)
+    p.add_argument("--css-urls", type=int, default=8)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    generate_site(args.path, args.flavor, args.pages, args.assets_per_page, args.fanout, args.css_urls, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QThread, Signal, QStandardPaths
 from .core import generate, scan, DEFAULT_MAX_PAGES
+from .fetch.page_store import PageStore
 from .utils.url import normalize_url, clean_domain
 
 class ScanWorker(QThread):
@@ -30,6 +31,8 @@ class ScanWorker(QThread):
         self.fetcher_type = fetcher_type
         self.verbose = verbose
         self.cancel_event = None
+        # Pages fetched during the scan, handed to generation to avoid refetching
+        self.page_store = PageStore()
 
     def stop(self):
         if self.cancel_event:
@@ -47,7 +50,7 @@ class ScanWorker(QThread):
             else:
                 self.log.emit(message)
 
-        discovered = await scan(self.urls, self.js, DEFAULT_MAX_PAGES, report_progress, self.fetcher_type, log_wrapper, self.verbose, self.cancel_event)
+        discovered = await scan(self.urls, self.js, DEFAULT_MAX_PAGES, report_progress, self.fetcher_type, log_wrapper, self.verbose, self.cancel_event, page_store=self.page_store)
         return discovered
 
     def run(self):
@@ -64,7 +67,7 @@ class MultiWorker(QThread):
     verbose_log = Signal(str)
     progress = Signal(int, int)
 
-    def __init__(self, docsets_to_generate, output_base, js, fetcher_type="playwright", verbose=False, force=False):
+    def __init__(self, docsets_to_generate, output_base, js, fetcher_type="playwright", verbose=False, force=False, resume=False, page_store=None):
         super().__init__()
         self.docsets_to_generate = docsets_to_generate
         self.output_base = output_base
@@ -72,6 +75,8 @@ class MultiWorker(QThread):
         self.fetcher_type = fetcher_type
         self.verbose = verbose
         self.force = force
+        self.resume = resume
+        self.page_store = page_store
         self.cancel_event = None
 
     def stop(self):
@@ -99,7 +104,7 @@ class MultiWorker(QThread):
                 else:
                     self.log.emit(message)
 
-            await generate(urls, output_path, self.js, DEFAULT_MAX_PAGES, report_progress, allowed_urls, self.fetcher_type, log_wrapper, self.verbose, self.force, self.cancel_event)
+            await generate(urls, output_path, self.js, DEFAULT_MAX_PAGES, report_progress, allowed_urls, self.fetcher_type, log_wrapper, self.verbose, self.force, self.cancel_event, resume=self.resume, page_store=self.page_store)
 
     def run(self):
         try:
@@ -455,11 +460,17 @@ class MainWindow(QMainWindow):
         self.js_checkbox = QCheckBox("Enable JavaScript", checked=True)
         options_layout.addWidget(self.js_checkbox)
 
+        self.auto_js_checkbox = QCheckBox("Only Render When Needed", checked=False)
+        options_layout.addWidget(self.auto_js_checkbox)
+
         self.ignore_optional_checkbox = QCheckBox("Ignore Optional (Auto-generate)", checked=False)
         options_layout.addWidget(self.ignore_optional_checkbox)
 
         self.force_checkbox = QCheckBox("Force Build", checked=False)
         options_layout.addWidget(self.force_checkbox)
+
+        self.resume_checkbox = QCheckBox("Resume Interrupted", checked=False)
+        options_layout.addWidget(self.resume_checkbox)
         
         options_layout.addWidget(QLabel("JS Engine:"))
         self.js_engine_combo = QComboBox()
@@ -557,9 +568,12 @@ class MainWindow(QMainWindow):
             
         self.output_base = self.out_input.text().strip()
         self.js = self.js_checkbox.isChecked()
+        if self.js and self.auto_js_checkbox.isChecked():
+            self.js = "auto"
         self.ignore_optional = self.ignore_optional_checkbox.isChecked()
         self.verbose = True # Always enable verbose logging since we have a tab for it
         self.force = self.force_checkbox.isChecked()
+        self.resume = self.resume_checkbox.isChecked()
         self.engine = self.js_engine_combo.currentText()
 
         if not self.docsets_queue:
@@ -655,7 +669,7 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(True)
 
         # We use MultiWorker even for a single docset to keep it simple
-        self.worker = MultiWorker([(name, urls, selected_urls)], self.output_base, self.js, self.engine, self.verbose, self.force)
+        self.worker = MultiWorker([(name, urls, selected_urls)], self.output_base, self.js, self.engine, self.verbose, self.force, self.resume, self.scan_worker.page_store)
         self.worker.finished.connect(self.on_generation_finished)
         self.worker.error.connect(self.on_error)
         self.worker.progress.connect(self.update_progress)
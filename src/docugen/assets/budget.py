@@ -0,0 +1,44 @@
+class AssetBudget:
+    """Byte limits for the assets downloaded into one docset.
+
+    ``max_asset_bytes`` caps every single file and ``max_total_bytes`` the sum
+    of everything downloaded during the build; ``None`` disables a limit.
+    Bytes are reserved while a download streams in, so concurrent downloads
+    cannot overshoot the total together. Assets that did not fit are kept in
+    ``oversized`` as ``(url, size)`` pairs so they can be reported.
+    """
+
+    def __init__(self, max_asset_bytes=None, max_total_bytes=None):
+        self.max_asset_bytes = max_asset_bytes
+        self.max_total_bytes = max_total_bytes
+        self.used = 0
+        self.oversized = []
+        self._rejected = set()
+
+    def fits(self, size):
+        """Whether an asset of ``size`` bytes could still be downloaded in full."""
+        if self.max_asset_bytes is not None and size > self.max_asset_bytes:
+            return False
+        if self.max_total_bytes is not None and self.used + size > self.max_total_bytes:
+            return False
+        return True
+
+    def take(self, asset_size, nbytes):
+        """Reserve ``nbytes`` more for an asset that has reached ``asset_size`` bytes so far."""
+        if self.max_asset_bytes is not None and asset_size > self.max_asset_bytes:
+            return False
+        if self.max_total_bytes is not None and self.used + nbytes > self.max_total_bytes:
+            return False
+        self.used += nbytes
+        return True
+
+    def release(self, nbytes):
+        self.used -= nbytes
+
+    def reject(self, url, size):
+        self.oversized.append((url, size))
+        self._rejected.add(url)
+
+    def rejected(self, url):
+        """Whether ``url`` was left out for exceeding a limit (rather than failing to download)."""
+        return url in self._rejected
@@ -0,0 +1,59 @@
+import re
+
+URL = "url"
+IMPORT = "import"
+
+
+def _value(name):
+    return rf"""(?:"(?P<{name}_dq>[^"]*)"|'(?P<{name}_sq>[^']*)'|(?P<{name}_bare>[^'"()\s;]+))"""
+
+
+# Comments are matched first so references inside them are skipped
+CSS_REFERENCE = re.compile(
+    r"/\*.*?\*/"
+    r"|@import\s+(?:url\(\s*)?" + _value(IMPORT)
+    + r"|url\(\s*" + _value(URL) + r"\s*\)",
+    re.S | re.I,
+)
+
+# File names produced by download_and_save_asset
+LOCAL_ASSET_NAME = re.compile(r"^[0-9a-f]{32}(\.\w+)?$")
+
+
+def _reference(match):
+    for kind in (IMPORT, URL):
+        for quoting in ("dq", "sq", "bare"):
+            group = f"{kind}_{quoting}"
+            if match.group(group) is not None:
+                return kind, group
+    return None, None
+
+
+def iter_css_references(css):
+    """Yield ``(kind, value)`` for every ``url()`` and ``@import`` reference in ``css``."""
+    for match in CSS_REFERENCE.finditer(css):
+        kind, group = _reference(match)
+        if kind is not None:
+            yield kind, match.group(group)
+
+
+def substitute_css_references(css, replacements):
+    """Replace referenced values found in ``replacements`` in a single pass over ``css``."""
+    def substitute(match):
+        kind, group = _reference(match)
+        text = match.group(0)
+        if kind is None:
+            return text
+        value = match.group(group)
+        replacement = replacements.get(value)
+        if replacement is None:
+            return text
+        start = match.start(group) - match.start()
+        return text[:start] + replacement + text[start + len(value):]
+
+    return CSS_REFERENCE.sub(substitute, css)
+
+
+def local_assets(values, out_dir):
+    """The ``values`` that already name a downloaded file in ``out_dir`` (checks the disk, so it blocks)."""
+    return {value for value in values if LOCAL_ASSET_NAME.match(value) and (out_dir / value).exists()}
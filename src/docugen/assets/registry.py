@@ -0,0 +1,54 @@
+import anyio
+
+
+class AssetRegistry:
+    """Build-wide record of asset downloads, keyed by absolute URL.
+
+    Concurrent requests for the same URL share one download, the resolved
+    local file name (including an extension sniffed from the content type)
+    is remembered for the rest of the build, and failed URLs are not
+    retried by later pages. Stylesheets are claimed once so each is only
+    rewritten by the first page that references it.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.failures = set()
+        self.stylesheets = set()
+        self._in_flight = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def claim_stylesheet(self, path):
+        """Return True the first time ``path`` is claimed for rewriting during this build."""
+        key = str(path)
+        if key in self.stylesheets:
+            return False
+        self.stylesheets.add(key)
+        return True
+
+    async def resolve(self, url, download):
+        """Return the local name for ``url``, calling ``download()`` only if nobody has yet."""
+        if url in self.names:
+            return self.names[url]
+        if url in self.failures:
+            return None
+
+        event = self._in_flight.get(url)
+        if event is not None:
+            await event.wait()
+            return self.names.get(url)
+
+        event = anyio.Event()
+        self._in_flight[url] = event
+        try:
+            local_name = await download()
+            if local_name:
+                self.names[url] = local_name
+            else:
+                self.failures.add(url)
+        finally:
+            del self._in_flight[url]
+            event.set()
+        return local_name
@@ -1,245 +1,344 @@
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import httpx
+import os
 import pathlib
 import hashlib
+import mimetypes
+import anyio
+from contextlib import asynccontextmanager
+from functools import partial
+from ..utils.html import as_soup
+from ..fetch.base import parse_content_type
+from .registry import AssetRegistry
+from .scripts import MODULE_IMPORT, HANDLER_ASSET_EXTENSIONS, iter_script_references, substitute_quoted
+from .css import IMPORT, iter_css_references, substitute_css_references, local_assets
 
+# Maximum number of asset downloads in flight for a single page
+DEFAULT_DOWNLOAD_CONCURRENCY = 8
+# Bytes read from the network and written to disk at a time
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
-import re
+async def rewrite_assets(html, base_url, out_dir, force=False, verbose=False, log_callback=None, client=None, download_limit=DEFAULT_DOWNLOAD_CONCURRENCY, registry=None, store=None, budget=None, resources=None):
+    """Download the page's assets into ``out_dir`` and point the markup at the local copies.
 
-async def rewrite_assets(html, base_url, out_dir, force=False, verbose=False, log_callback=None):
-    def log(msg):
-        if verbose:
-            if log_callback:
-                try:
-                    log_callback(msg, verbose_only=True)
-                except TypeError:
-                    log_callback(msg)
-            else:
-                print(msg)
+    ``html`` may be a string or an already parsed BeautifulSoup document. A
+    document is rewritten in place and returned as is; a string is parsed and
+    the rewritten markup is returned as a string. ``client`` is the shared
+    ``HttpClientPool`` of the build; without one a temporary client is used.
 
-    soup = BeautifulSoup(html, "lxml")
-
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        # Define tags and their attributes that point to assets
-        asset_targets = [
-            ("link", "href"),
-            ("script", "src"),
-            ("img", "src"),
-            ("source", "src"),
-            ("source", "srcset"),
-            ("img", "srcset"),
-            ("input", "src"),
-        ]
-        
-        for tag, attr in asset_targets:
-            for el in soup.find_all(tag):
-                if not el.get(attr):
-                    continue
-                
-                if tag == "input" and el.get("type") != "image":
-                    continue
-
-                attr_value = el[attr]
-                
-                # Handle srcset which can contain multiple URLs
-                if attr == "srcset":
-                    urls_in_srcset = []
-                    parts = attr_value.split(",")
-                    for part in parts:
-                        part = part.strip()
-                        if not part: continue
-                        subparts = part.split()
-                        if not subparts: continue
-                        img_url = subparts[0]
-                        urls_in_srcset.append((part, img_url))
-                    
-                    new_srcset = attr_value
-                    for full_part, img_url in urls_in_srcset:
-                        absolute_url = urljoin(base_url, img_url)
-                        if not absolute_url.startswith("http"):
-                            continue
-                        
-                        local_name = await download_and_save_asset(client, absolute_url, out_dir, tag, force=force, verbose=verbose, log_callback=log_callback)
-                        if local_name:
-                            new_srcset = new_srcset.replace(img_url, local_name)
-                    
+    References are collected in a first pass, downloaded concurrently (at
+    most ``download_limit`` at a time) and substituted once all are done.
+    Passing the build's ``AssetRegistry`` shares downloads across pages, an
+    ``AssetStore`` reuses files downloaded by earlier builds and an
+    ``AssetBudget`` leaves assets over its byte limits as remote links.
+    ``resources`` maps absolute URLs to ``CapturedResource`` bodies already
+    obtained by the fetcher; those are saved without another download.
+    """
+    if client is None:
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            return await rewrite_assets(html, base_url, out_dir, force=force, verbose=verbose, log_callback=log_callback, client=client, download_limit=download_limit, registry=registry, store=store, budget=budget, resources=resources)
+
+    if registry is None:
+        registry = AssetRegistry()
+    if resources is None:
+        resources = {}
+    soup = as_soup(html)
+
+    # (absolute_url, tag) -> local file name, filled in by the download pass
+    downloads = {}
+    # Callables applying the downloaded names to the document, in discovery order
+    substitutions = []
+
+    def want(url, tag):
+        absolute_url = urljoin(base_url, url)
+        if not absolute_url.startswith("http"):
+            return None
+        downloads.setdefault((absolute_url, tag), None)
+        return (absolute_url, tag)
+
+    def replace_quoted(content, refs):
+        local_names = {url: downloads[key] for url, key in refs if downloads.get(key)}
+        return substitute_quoted(content, local_names) if local_names else content
+
+    # Define tags and their attributes that point to assets
+    asset_targets = [
+        ("link", "href"),
+        ("script", "src"),
+        ("img", "src"),
+        ("source", "src"),
+        ("source", "srcset"),
+        ("img", "srcset"),
+        ("input", "src"),
+    ]
+    
+    stylesheets = {}
+    for tag, attr in asset_targets:
+        for el in soup.find_all(tag):
+            if not el.get(attr):
+                continue
+            
+            if tag == "input" and el.get("type") != "image":
+                continue
+
+            attr_value = el[attr]
+            
+            # Handle srcset which can contain multiple URLs
+            if attr == "srcset":
+                refs = []
+                for part in attr_value.split(","):
+                    subparts = part.strip().split()
+                    if not subparts:
+                        continue
+                    key = want(subparts[0], tag)
+                    if key:
+                        refs.append((subparts[0], key))
+
+                def apply_srcset(el=el, attr=attr, refs=refs):
+                    new_srcset = el[attr]
+                    for img_url, key in refs:
+                        if downloads.get(key):
+                            new_srcset = new_srcset.replace(img_url, downloads[key])
                     el[attr] = new_srcset
-                    continue
+                substitutions.append(apply_srcset)
+                continue
 
-                absolute_url = urljoin(base_url, attr_value)
-                if not absolute_url.startswith("http"):
-                    continue
+            # WASM files captured by the renderer, loaded by its fetch shim
+            key = want(attr_value, "wasm" if el.get("data-wasm-url") else tag)
+            if not key:
+                continue
 
-                local_name = await download_and_save_asset(client, absolute_url, out_dir, tag, force=force, verbose=verbose, log_callback=log_callback)
+            def apply_attr(el=el, attr=attr, tag=tag, key=key):
+                local_name = downloads.get(key)
                 if local_name:
                     el[attr] = local_name
                     # If it's a CSS file, we need to rewrite assets inside it
-                    if tag == "link" and el.get("rel") == ["stylesheet"] or (local_name.endswith(".css")):
-                         await rewrite_css_assets(client, out_dir / local_name, absolute_url, out_dir, force=force, verbose=verbose, log_callback=log_callback)
-
-        # ES modules imports in script tags
-        for script in soup.find_all("script", type="module"):
-            if script.string:
-                content = script.string
-                # Simple regex for static imports: import ... from '...'
-                # We need to handle ../ and other relative paths
-                imports = re.findall(r'from\s+[\'"](.+?)[\'"]', content)
-                direct_imports = re.findall(r'import\s+[\'"](.+?)[\'"]', content)
-                
-                for imp_url in set(imports + direct_imports):
-                    if imp_url.startswith("data:"): continue
-                    
-                    # Resolve relative URL using current page URL
-                    # However, rewrite_assets' base_url IS the current page URL (usually)
-                    absolute_url = urljoin(base_url, imp_url)
-                    if not absolute_url.startswith("http"): continue
-                    
-                    local_name = await download_and_save_asset(client, absolute_url, out_dir, "script", force=force, verbose=verbose, log_callback=log_callback)
-                    if local_name:
-                        # Use local_name instead of imp_url
-                        # We MUST ensure we only replace the exact string in quotes to avoid partial matches
-                        # but simple string replace is risky if imp_url is short.
-                        # However, ES module imports are usually specific enough.
-                        content = content.replace(f"'{imp_url}'", f"'{local_name}'")
-                        content = content.replace(f'"{imp_url}"', f'"{local_name}"')
-                script.string = content
-
-        # Common JS asset patterns
-        for script in soup.find_all("script"):
-            if script.string:
-                content = script.string
-                # Match fetch('...') or fetch("...")
-                fetches = re.findall(r'fetch\(\s*[\'"](.+?)[\'"]\s*\)', content)
-                # Also match other common dynamic loading patterns (e.g. THREE.FileLoader)
-                dynamic_loads = re.findall(r'[\'"](.+?\.(?:glb|gltf|obj|mtl|hdr|json|png|jpg|jpeg|webp|mp4|webm|svg|woff2?|ttf|otf|wasm))[\'"]', content)
-                
-                for asset_url in set(fetches + dynamic_loads):
-                    if asset_url.startswith("data:"): continue
-                    
-                    absolute_url = urljoin(base_url, asset_url)
-                    if not absolute_url.startswith("http"): continue
-                    
-                    ext = pathlib.Path(asset_url.split("?")[0]).suffix.lower()
-                    tag_type = "json" if ext == ".json" else "asset"
-                    local_name = await download_and_save_asset(client, absolute_url, out_dir, tag_type, force=force, verbose=verbose, log_callback=log_callback)
-                    if local_name:
-                        content = content.replace(f"'{asset_url}'", f"'{local_name}'")
-                        content = content.replace(f'"{asset_url}"', f'"{local_name}"')
-                script.string = content
-
-        # Handle YouTube embeds in iframes
-        for iframe in soup.find_all("iframe", src=True):
-            src = iframe["src"]
-            if "youtube.com/embed/" in src or "youtube-nocookie.com/embed/" in src:
-                # Keep absolute URL for YouTube
-                if "youtube.com/embed/" in src:
-                    video_id = src.split("youtube.com/embed/")[1].split("?")[0]
-                else:
-                    video_id = src.split("youtube-nocookie.com/embed/")[1].split("?")[0]
-                
-                youtube_url = f"https://www.youtube.com/watch?v={video_id}"
-                
-                # Create a link to the video
-                link = soup.new_tag("a", href=youtube_url, target="_blank")
-                link.string = "View on YouTube"
-                
-                # Add a container or just append the link after the iframe
-                container = soup.new_tag("div", **{"class": "youtube-embed-container"})
-                iframe.wrap(container)
-                
-                link_div = soup.new_tag("div", **{"class": "youtube-link"})
-                link_div.append(link)
-                container.append(link_div)
+                    if local_name != key[0] and (tag == "link" and el.get("rel") == ["stylesheet"] or local_name.endswith(".css")):
+                        stylesheets[local_name] = key[0]
+            substitutions.append(apply_attr)
+
+    # Script bodies are scanned in their original form and rewritten once
+    for script in soup.find_all("script"):
+        if not script.string:
+            continue
+        content = script.string
+        refs = []
+
+        # Static ES module imports, fetch('...') and other dynamic loading (e.g. THREE.FileLoader)
+        for kind, asset_url in iter_script_references(content, module=script.get("type") == "module"):
+            if asset_url.startswith("data:"): continue
+            if kind == MODULE_IMPORT:
+                tag = "script"
             else:
-                # Ensure other iframes use absolute URLs if they are not already
-                # This prevents relative path issues when the page is served from a docset
-                absolute_url = urljoin(base_url, src)
-                iframe["src"] = absolute_url
-
-        # Remove "xr-spatial-tracking" from any Permissions-Policy meta tags if they exist
-        for meta in soup.find_all("meta", attrs={"http-equiv": "Permissions-Policy"}):
-            if "xr-spatial-tracking" in meta.get("content", ""):
-                meta["content"] = meta["content"].replace("xr-spatial-tracking", "")
-
-        # Handle style attributes with url()
-        for el in soup.find_all(style=True):
-            style = el["style"]
-            urls = re.findall(r'url\([\'"]?(.*?)[\'"]?\)', style)
-            for url in urls:
-                if url.startswith("data:"):
-                    continue
-                absolute_url = urljoin(base_url, url)
-                if not absolute_url.startswith("http"):
-                    continue
-                
-                local_name = await download_and_save_asset(client, absolute_url, out_dir, "style")
-                if local_name:
-                    style = style.replace(url, local_name)
-            el["style"] = style
-
-        # Handle inline event handlers like onmouseover/onmouseout attributes
-        event_handlers = ["onmouseover", "onmouseout", "onclick", "onload"]
-        for handler in event_handlers:
-            for el in soup.find_all(attrs={handler: True}):
-                content = el[handler]
-                # Match both absolute paths and relative paths that look like assets
-                # Also handle potentially quoted URLs inside the handler string
-                urls = re.findall(r'[\'"]([^\'"]+?\.(?:png|jpg|jpeg|webp|gif|svg|mp4|webm|js|css))[\'"]', content)
-                for url in set(urls):
-                    if url.startswith("data:"): continue
-                    absolute_url = urljoin(base_url, url)
-                    if not absolute_url.startswith("http"):
-                        continue
-                    
-                    ext = pathlib.Path(url.split("?")[0]).suffix.lower()
-                    tag_type = "img" if ext in [".png", ".jpg", ".jpeg", ".webp", ".gif", ".svg"] else "asset"
-                    
-                    local_name = await download_and_save_asset(client, absolute_url, out_dir, tag_type)
-                    if local_name:
-                        # Ensure we only replace the exact URL inside quotes
-                        content = content.replace(f"'{url}'", f"'{local_name}'")
-                        content = content.replace(f'"{url}"', f'"{local_name}"')
-                el[handler] = content
+                ext = pathlib.Path(asset_url.split("?")[0]).suffix.lower()
+                tag = "json" if ext == ".json" else "asset"
+            key = want(asset_url, tag)
+            if key:
+                refs.append((asset_url, key))
+
+        if refs:
+            def apply_script(script=script, content=content, refs=refs):
+                script.string = replace_quoted(content, refs)
+            substitutions.append(apply_script)
+
+    # Handle YouTube embeds in iframes
+    for iframe in soup.find_all("iframe", src=True):
+        src = iframe["src"]
+        if "youtube.com/embed/" in src or "youtube-nocookie.com/embed/" in src:
+            # Keep absolute URL for YouTube
+            if "youtube.com/embed/" in src:
+                video_id = src.split("youtube.com/embed/")[1].split("?")[0]
+            else:
+                video_id = src.split("youtube-nocookie.com/embed/")[1].split("?")[0]
+            
+            youtube_url = f"https://www.youtube.com/watch?v={video_id}"
+            
+            # Create a link to the video
+            link = soup.new_tag("a", href=youtube_url, target="_blank")
+            link.string = "View on YouTube"
+            
+            # Add a container or just append the link after the iframe
+            container = soup.new_tag("div", **{"class": "youtube-embed-container"})
+            iframe.wrap(container)
+            
+            link_div = soup.new_tag("div", **{"class": "youtube-link"})
+            link_div.append(link)
+            container.append(link_div)
+        else:
+            # Ensure other iframes use absolute URLs if they are not already
+            # This prevents relative path issues when the page is served from a docset
+            absolute_url = urljoin(base_url, src)
+            iframe["src"] = absolute_url
 
+    # Remove "xr-spatial-tracking" from any Permissions-Policy meta tags if they exist
+    for meta in soup.find_all("meta", attrs={"http-equiv": "Permissions-Policy"}):
+        if "xr-spatial-tracking" in meta.get("content", ""):
+            meta["content"] = meta["content"].replace("xr-spatial-tracking", "")
+
+    # Handle style attributes with url()
+    for el in soup.find_all(style=True):
+        refs = {}
+        for _, url in iter_css_references(el["style"]):
+            if url.startswith("data:"):
+                continue
+            key = want(url, "style")
+            if key:
+                refs[url] = key
+
+        if refs:
+            def apply_style(el=el, refs=refs):
+                local_names = {url: downloads[key] for url, key in refs.items() if downloads.get(key)}
+                if local_names:
+                    el["style"] = substitute_css_references(el["style"], local_names)
+            substitutions.append(apply_style)
+
+    # Handle inline event handlers like onmouseover/onmouseout attributes
+    event_handlers = ["onmouseover", "onmouseout", "onclick", "onload"]
+    for handler in event_handlers:
+        for el in soup.find_all(attrs={handler: True}):
+            content = el[handler]
+            refs = []
+            # Match both absolute paths and relative paths that look like assets
+            for _, url in iter_script_references(content, fetches=False, extensions=HANDLER_ASSET_EXTENSIONS):
+                if url.startswith("data:"): continue
+                ext = pathlib.Path(url.split("?")[0]).suffix.lower()
+                tag_type = "img" if ext in [".png", ".jpg", ".jpeg", ".webp", ".gif", ".svg"] else "asset"
+                key = want(url, tag_type)
+                if key:
+                    refs.append((url, key))
+
+            if refs:
+                def apply_handler(el=el, handler=handler, content=content, refs=refs):
+                    el[handler] = replace_quoted(content, refs)
+                substitutions.append(apply_handler)
+
+    # Download everything the page references concurrently
+    limiter = anyio.CapacityLimiter(download_limit)
+
+    async def download(key):
+        async with limiter:
+            absolute_url, tag = key
+            local_name = await download_and_save_asset(client, absolute_url, out_dir, tag, force=force, verbose=verbose, log_callback=log_callback, registry=registry, store=store, budget=budget, captured=resources.get(absolute_url))
+            if local_name is None and budget is not None and budget.rejected(absolute_url):
+                # Over budget: point at the remote file, relative references would dangle in the docset
+                local_name = absolute_url
+            downloads[key] = local_name
+
+    async with anyio.create_task_group() as tg:
+        for key in list(downloads):
+            tg.start_soon(download, key)
+
+    for apply in substitutions:
+        apply()
+
+    # Rewrite the assets referenced from the page's stylesheets
+    async with anyio.create_task_group() as tg:
+        for local_name, css_url in stylesheets.items():
+            tg.start_soon(partial(rewrite_css_assets, client, out_dir / local_name, css_url, out_dir, force=force, verbose=verbose, log_callback=log_callback, registry=registry, store=store, budget=budget, resources=resources, download_limit=download_limit))
+
+    if soup is html:
+        return soup
     return str(soup)
 
-async def rewrite_css_assets(client, css_path, base_url, out_dir, force=False, verbose=False, log_callback=None):
-    if not css_path.exists():
+async def rewrite_css_assets(client, css_path, base_url, out_dir, force=False, verbose=False, log_callback=None, registry=None, store=None, budget=None, resources=None, download_limit=DEFAULT_DOWNLOAD_CONCURRENCY):
+    """Point the ``url()`` and ``@import`` references of the stylesheet at ``css_path`` to local copies.
+
+    Each stylesheet is rewritten once per build (tracked by ``registry``).
+    Imported stylesheets are downloaded and rewritten recursively against
+    their own URL; an import cycle stops at the first stylesheet seen again.
+    References are fetched concurrently (or taken from captured
+    ``resources``) and substituted in a single pass.
+    """
+    if registry is None:
+        registry = AssetRegistry()
+    if resources is None:
+        resources = {}
+    css_path = anyio.Path(css_path)
+    if not registry.claim_stylesheet(css_path) or not await css_path.exists():
         return
-    
-    def log(msg):
-        if verbose:
-            if log_callback:
-                try:
-                    log_callback(msg, verbose_only=True)
-                except TypeError:
-                    log_callback(msg)
-            else:
-                print(msg)
 
-    content = css_path.read_text(errors='ignore')
-    # Find url(...) in CSS
-    urls = re.findall(r'url\([\'"]?(.*?)[\'"]?\)', content)
-    modified = False
-    for url in set(urls):
-        if url.startswith("data:") or url.startswith("http"):
-            absolute_url = urljoin(base_url, url)
-        else:
-            absolute_url = urljoin(base_url, url)
-        
-        if not absolute_url.startswith("http"):
+    content = await css_path.read_text(errors='ignore')
+    references = list(iter_css_references(content))
+    local = await anyio.to_thread.run_sync(local_assets, [url for _, url in references], out_dir)
+    refs = {}
+    for kind, url in references:
+        # Skip data URIs and references already pointing at downloaded files
+        if url in refs or url.startswith("data:") or url in local:
             continue
-            
-        local_name = await download_and_save_asset(client, absolute_url, out_dir, "style", force=force, verbose=verbose, log_callback=log_callback)
-        if local_name:
-            content = content.replace(url, local_name)
-            modified = True
-    
-    if modified:
-        css_path.write_text(content)
+        absolute_url = urljoin(base_url, url)
+        if absolute_url.startswith("http"):
+            refs[url] = (absolute_url, kind)
+
+    local_names = {}
+    limiter = anyio.CapacityLimiter(download_limit)
+
+    async def resolve(url, absolute_url, kind):
+        async with limiter:
+            local_name = await download_and_save_asset(client, absolute_url, out_dir, "link" if kind == IMPORT else "style", force=force, verbose=verbose, log_callback=log_callback, registry=registry, store=store, budget=budget, captured=resources.get(absolute_url))
+        if not local_name:
+            if budget is not None and budget.rejected(absolute_url):
+                local_names[url] = absolute_url
+            return
+        local_names[url] = local_name
+        if kind == IMPORT:
+            await rewrite_css_assets(client, out_dir / local_name, absolute_url, out_dir, force=force, verbose=verbose, log_callback=log_callback, registry=registry, store=store, budget=budget, resources=resources, download_limit=download_limit)
+
+    async with anyio.create_task_group() as tg:
+        for url, (absolute_url, kind) in refs.items():
+            tg.start_soon(resolve, url, absolute_url, kind)
+
+    if local_names:
+        # Replace rather than truncate: the file may be a hardlink into the shared asset store
+        tmp_path = css_path.with_name(css_path.name + ".tmp")
+        await tmp_path.write_text(substitute_css_references(content, local_names))
+        await tmp_path.replace(css_path)
+
+def _extension_from_content_type(content_type, guess=False):
+    if "image/svg" in content_type:
+        return ".svg"
+    elif "image/jpeg" in content_type:
+        return ".jpg"
+    elif "image/gif" in content_type:
+        return ".gif"
+    elif "image/webp" in content_type:
+        return ".webp"
+    elif "application/json" in content_type:
+        return ".json"
+    elif "font/woff2" in content_type:
+        return ".woff2"
+    elif "font/woff" in content_type:
+        return ".woff"
+    elif "font/ttf" in content_type:
+        return ".ttf"
+    elif guess and not content_type.startswith("image/"):
+        # Files saved in place of pages: PDFs, archives, text
+        ext = mimetypes.guess_extension(parse_content_type(content_type))
+        if ext:
+            return ext
+    return ".png" # Default for images
+
+@asynccontextmanager
+async def _open_asset(client, url, captured=None):
+    if captured is not None:
+        yield httpx.Response(200, headers={"content-type": captured.content_type}, content=captured.body)
+        return
+    async with client.stream("GET", url) as r:
+        r.raise_for_status()
+        yield r
+
+async def download_and_save_asset(client, url, out_dir, tag, force=False, verbose=False, log_callback=None, registry=None, store=None, budget=None, captured=None):
+    """Download ``url`` into ``out_dir`` and return the local file name, or None.
+
+    The body is streamed in chunks to a temporary file that is renamed into
+    place once complete. With a ``budget``, assets exceeding its limits are
+    abandoned (left as remote links by the caller) and recorded as oversized;
+    files reused from ``out_dir`` or the ``store`` are charged to it as well.
+    A ``captured`` resource is saved from memory instead of downloaded.
+    """
+    if registry is not None:
+        # Resolve through the registry so each URL is fetched at most once per build
+        return await registry.resolve(url, partial(download_and_save_asset, client, url, out_dir, tag, force=force, verbose=verbose, log_callback=log_callback, store=store, budget=budget, captured=captured))
 
-async def download_and_save_asset(client, url, out_dir, tag, force=False, verbose=False, log_callback=None):
     def log(msg):
         if verbose:
             if log_callback:
@@ -249,6 +348,24 @@ async def download_and_save_asset(client, url, out_dir, tag, force=False, verbos
                     log_callback(msg)
             else:
                 print(msg)
+
+    def report_oversized(size):
+        budget.reject(url, size)
+        msg = f"Leaving oversized asset as remote link: {url} ({size} bytes)"
+        if log_callback:
+            log_callback(msg)
+        else:
+            print(msg)
+
+    def charge(size):
+        # Files reused from disk or the store count towards the docset like downloads
+        if budget is None or budget.take(size, size):
+            return True
+        report_oversized(size)
+        return False
+
+    tmp_path = None
+    size = 0
     try:
         # Avoid re-downloading
         ext = pathlib.Path(url.split("?")[0]).suffix
@@ -259,59 +376,97 @@ async def download_and_save_asset(client, url, out_dir, tag, force=False, verbos
                 ext = ".css"
             elif tag == "json":
                 ext = ".json"
+            elif tag == "wasm":
+                ext = ".wasm"
             else:
                 ext = "" # Will be guessed from content-type
         
+        if not force:
+            existing = await anyio.to_thread.run_sync(_find_local_copy, url, out_dir, ext, store if captured is None else None)
+            if existing:
+                fname, existing_size, digest = existing
+                if not charge(existing_size):
+                    return None
+                if digest:
+                    log(f"Using cached asset: {url}")
+                    await anyio.to_thread.run_sync(store.link, digest, out_dir / fname)
+                return fname
+
         fname = hashlib.md5(url.encode()).hexdigest() + ext
         path = out_dir / fname
-        if path.exists() and not force:
-            return fname
-
-        if force and path.exists():
+        if captured is not None:
+            log(f"Saving captured asset: {url}")
+        elif force:
             log(f"Force re-downloading asset: {url}")
         else:
             log(f"Downloading asset: {url}")
 
-        r = await client.get(url)
-        r.raise_for_status()
-        data = r.content
-        
-        if not ext:
-            # Try to guess from content-type
-            content_type = r.headers.get("content-type", "")
-            if "image/svg" in content_type:
-                ext = ".svg"
-            elif "image/jpeg" in content_type:
-                ext = ".jpg"
-            elif "image/gif" in content_type:
-                ext = ".gif"
-            elif "image/webp" in content_type:
-                ext = ".webp"
-            elif "application/json" in content_type:
-                ext = ".json"
-            elif "font/woff2" in content_type:
-                ext = ".woff2"
-            elif "font/woff" in content_type:
-                ext = ".woff"
-            elif "font/ttf" in content_type:
-                ext = ".ttf"
-            else:
-                ext = ".png" # Default for images
-            
-            # Recompute filename with extension if we didn't have one
-            fname = hashlib.md5(url.encode()).hexdigest() + ext
-            path = out_dir / fname
-            if path.exists():
-                return fname
+        async with _open_asset(client, url, captured) as r:
+            if not ext:
+                # Try to guess from content-type
+                ext = _extension_from_content_type(r.headers.get("content-type", ""), guess=tag == "file")
+                # Recompute filename with extension if we didn't have one
+                fname = hashlib.md5(url.encode()).hexdigest() + ext
+                path = out_dir / fname
+                existing = await anyio.to_thread.run_sync(_find_local_copy, url, out_dir, ext)
+                if existing:
+                    return fname if charge(existing[1]) else None
+
+            declared_size = int(r.headers.get("content-length") or 0)
+            if budget is not None and not budget.fits(declared_size):
+                report_oversized(declared_size)
+                return None
+
+            hasher = hashlib.sha256()
+            tmp_path = path.with_name(f"{fname}.part")
+            async with await anyio.open_file(tmp_path, "wb") as f:
+                async for chunk in r.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    if budget is not None and not budget.take(size + len(chunk), len(chunk)):
+                        budget.release(size)
+                        report_oversized(size + len(chunk))
+                        return None
+                    size += len(chunk)
+                    hasher.update(chunk)
+                    await f.write(chunk)
 
-        path.write_bytes(data)
+        await anyio.to_thread.run_sync(_move_into_place, tmp_path, path, url, hasher.hexdigest(), size, ext, store)
+        tmp_path = None
         return fname
     except Exception as e:
+        if budget is not None:
+            budget.release(size)
         print(f"Failed to download asset {url}: {e}")
         return None
+    finally:
+        if tmp_path is not None:
+            with anyio.CancelScope(shield=True):
+                await anyio.Path(tmp_path).unlink(missing_ok=True)
+
+def _find_local_copy(url, out_dir, ext, store=None):
+    """Find ``url`` already saved in ``out_dir`` or, given a ``store``, cached there (blocking).
+
+    Returns ``(fname, size, digest)`` or None; ``digest`` names a store blob
+    still to be linked into ``out_dir`` as ``fname``.
+    """
+    stem = hashlib.md5(url.encode()).hexdigest()
+    path = out_dir / (stem + ext)
+    if path.exists():
+        return path.name, path.stat().st_size, None
+    cached = store.lookup(url) if store is not None else None
+    if cached is None:
+        return None
+    digest, cached_ext = cached
+    return stem + (ext or cached_ext), os.path.getsize(store.blob_path(digest)), digest
+
+def _move_into_place(tmp_path, path, url, digest, size, ext, store=None):
+    """Put a finished download at ``path``, through the ``store`` if there is one (blocking)."""
+    if store is None:
+        tmp_path.replace(path)
+        return
+    store.link(store.put_file(url, tmp_path, digest, size, ext), path)
 
 def get_favicon_url(html, base_url):
-    soup = BeautifulSoup(html, "lxml")
+    soup = as_soup(html)
     # Look for common favicon patterns
     icon_link = soup.find("link", rel=lambda x: x and "icon" in x.lower())
     if icon_link and icon_link.get("href"):
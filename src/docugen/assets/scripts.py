@@ -0,0 +1,52 @@
+import re
+
+MODULE_IMPORT = "module_import"
+FETCH = "fetch"
+ASSET = "asset"
+
+# Files loaded by scripts at runtime (e.g. THREE.FileLoader, fetch)
+SCRIPT_ASSET_EXTENSIONS = ("glb", "gltf", "obj", "mtl", "hdr", "json", "png", "jpg", "jpeg", "webp", "mp4", "webm", "svg", "woff", "woff2", "ttf", "otf", "wasm")
+# Files swapped in by inline event handlers such as onmouseover
+HANDLER_ASSET_EXTENSIONS = ("png", "jpg", "jpeg", "webp", "gif", "svg", "mp4", "webm", "js", "css")
+
+# A quoted string literal, optionally preceded by an import/fetch keyword and followed by a closing parenthesis
+SCRIPT_REFERENCE = re.compile(
+    r"""(?:(?P<keyword>\bfrom|\bimport|\bfetch\()\s*)?(?P<quote>['"])(?P<url>[^'"\s]+)(?P=quote)(?P<close>\s*\))?"""
+)
+QUOTED_STRING = re.compile(r"""(?P<quote>['"])(?P<url>[^'"\s]+)(?P=quote)""")
+
+
+def _has_extension(url, extensions):
+    return "." in url and url.rsplit(".", 1)[1].lower() in extensions
+
+
+def iter_script_references(content, module=False, fetches=True, extensions=SCRIPT_ASSET_EXTENSIONS):
+    """Yield ``(kind, url)`` for the asset references of a script in one pass.
+
+    ``kind`` is ``MODULE_IMPORT`` for static ES module imports (only when ``module``),
+    ``FETCH`` for ``fetch('...')`` calls (only when ``fetches``) and ``ASSET``
+    for any other string literal ending in one of ``extensions``.
+
+    Literals containing whitespace are not URLs and are skipped, so an
+    apostrophe in a comment cannot pair up with a later quote. Extensions
+    are compared case-insensitively (``IMG.PNG`` is an asset).
+    """
+    for match in SCRIPT_REFERENCE.finditer(content):
+        keyword, url = match.group("keyword"), match.group("url")
+        if module and keyword in ("from", "import"):
+            yield MODULE_IMPORT, url
+        elif fetches and keyword == "fetch(" and match.group("close"):
+            yield FETCH, url
+        elif _has_extension(url, extensions):
+            yield ASSET, url
+
+
+def substitute_quoted(content, replacements):
+    """Replace quoted string literals found in ``replacements`` in a single pass over ``content``."""
+    def substitute(match):
+        replacement = replacements.get(match.group("url"))
+        if replacement is None:
+            return match.group(0)
+        return match.group("quote") + replacement + match.group("quote")
+
+    return QUOTED_STRING.sub(substitute, content)
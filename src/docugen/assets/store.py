@@ -0,0 +1,160 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class AssetStore:
+    """Content-addressed asset cache shared between docset builds.
+
+    Blobs are stored once per SHA-256 of their bytes under ``objects/``, so
+    the same library served from different URLs or used by several docsets
+    takes space only once. Docsets receive hardlinks (or copies where linking
+    is not possible). ``index.db`` maps downloaded URLs to their blob so a
+    URL fetched within the last ``max_age`` seconds is not downloaded again,
+    and tracks blob usage for LRU eviction once ``max_bytes`` is exceeded.
+
+    Methods block and are meant to run on worker threads; access to the
+    database is serialized. Blob usage from ``lookup`` is recorded in memory
+    and written with the next ``put_file`` or on ``close``.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.conn = None
+        self._lock = threading.RLock()
+        self._touched = set()
+
+    def connect(self):
+        if self.conn is not None:
+            return
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.path, "index.db"), timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs(digest TEXT PRIMARY KEY, size INTEGER, last_used REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls(url TEXT PRIMARY KEY, digest TEXT, ext TEXT, fetched REAL)"
+        )
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self.conn:
+                self._write_touched()
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest[2:])
+
+    def _write_touched(self):
+        if self._touched:
+            now = time.time()
+            self.conn.executemany("UPDATE blobs SET last_used = ? WHERE digest = ?", [(now, digest) for digest in self._touched])
+            self._touched.clear()
+
+    def lookup(self, url):
+        """Return ``(digest, ext)`` for a recently downloaded ``url`` still in the store, else ``None``."""
+        with self._lock:
+            self.connect()
+            row = self.conn.execute("SELECT digest, ext, fetched FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        digest, ext, fetched = row
+        if time.time() - fetched > self.max_age or not os.path.exists(self.blob_path(digest)):
+            return None
+        with self._lock:
+            self._touched.add(digest)
+        return digest, ext
+
+    def put(self, url, data, ext=""):
+        """Store ``data`` downloaded from ``url`` and return its digest."""
+        self.connect()
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.path, "objects"))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.put_file(url, tmp, hashlib.sha256(data).hexdigest(), len(data), ext)
+
+    def put_file(self, url, src, digest, size, ext=""):
+        """Move the downloaded file ``src`` (with known SHA-256 ``digest``) into the store."""
+        with self._lock:
+            self.connect()
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            os.remove(src)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.chmod(src, 0o644)
+            try:
+                os.replace(src, blob)
+            except OSError:
+                # Different filesystem: copy next to the blob, then rename atomically
+                tmp = f"{blob}.tmp{os.getpid()}"
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, blob)
+                os.remove(src)
+        with self._lock:
+            now = time.time()
+            self._write_touched()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO blobs(digest, size, last_used) VALUES (?, ?, ?)",
+                (digest, size, now),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO urls(url, digest, ext, fetched) VALUES (?, ?, ?, ?)",
+                (url, digest, ext, now),
+            )
+            self.evict(keep=digest)
+            self.conn.commit()
+        return digest
+
+    def link(self, digest, dest):
+        """Materialize blob ``digest`` at ``dest``, hardlinking when the filesystem allows it."""
+        blob = self.blob_path(digest)
+        tmp = f"{dest}.tmp{os.getpid()}"
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, dest)
+
+    def size(self):
+        with self._lock:
+            self.connect()
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self, keep=None):
+        """Delete least recently used blobs until the store fits in ``max_bytes``."""
+        with self._lock:
+            total = self.size()
+            if total <= self.max_bytes:
+                return
+            self._write_touched()
+            rows = self.conn.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall()
+            for digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self.conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                total -= size
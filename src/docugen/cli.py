@@ -1,15 +1,67 @@
 import argparse
+import os
+import sqlite3
+import sys
 import anyio
-from .core import generate, DEFAULT_MAX_PAGES
+from functools import partial
+from .core import generate, DEFAULT_MAX_PAGES, DEFAULT_CONCURRENCY
+from .docset.index import DocsetIndex
+from .docset.fulltext import FullTextIndex, FULL_TEXT_DB
+
+def query(argv=None):
+    p = argparse.ArgumentParser(prog="docugen query", description="Look up symbols or text in a built docset")
+    p.add_argument("docset")
+    p.add_argument("terms", help="Symbol name prefix, or an FTS5 query with --text")
+    p.add_argument("--text", "-t", action="store_true", help="Search page text and headings (needs a docset built with --full-text)")
+    p.add_argument("--limit", "-n", type=int, default=20)
+    args = p.parse_args(argv)
+
+    resources_path = os.path.join(args.docset, "Contents", "Resources")
+    db_path = os.path.join(resources_path, FULL_TEXT_DB if args.text else "docSet.dsidx")
+    if not os.path.exists(db_path):
+        p.error(f"{db_path} not found" + (" (build the docset with --full-text)" if args.text else ""))
+
+    index = FullTextIndex(db_path) if args.text else DocsetIndex(db_path)
+    index.connect(read_only=True)
+    try:
+        if args.text:
+            rows = index.search(args.terms, args.limit)
+        else:
+            rows = index.search_prefix(args.terms, args.limit)
+    except sqlite3.OperationalError as e:
+        p.error(f"invalid query: {e}")
+    finally:
+        index.close()
+
+    for row in rows:
+        print("\t".join(row))
+    # A lookup without results fails, so builds can be checked in CI
+    sys.exit(0 if rows else 1)
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        return query(sys.argv[2:])
+
     p = argparse.ArgumentParser()
     p.add_argument("urls", nargs="+")
     p.add_argument("--out", required=True)
     p.add_argument("--js", action="store_true")
+    p.add_argument("--auto-js", action="store_true", help="Fetch statically and render with JavaScript only pages that need it")
     p.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES)
     p.add_argument("--verbose", "-v", action="store_true")
     p.add_argument("--force", "-f", action="store_true", help="Force rebuild: clear output and re-download assets")
+    p.add_argument("--concurrency", "-j", type=int, default=DEFAULT_CONCURRENCY, help="Number of pages to fetch and process in parallel")
+    p.add_argument("--resume", action="store_true", help="Continue an interrupted build from its crawl journal")
+    p.add_argument("--asset-cache", default=None, help="Directory of a content-addressed asset cache shared between builds")
+    p.add_argument("--max-asset-mb", type=int, default=None, help="Leave assets larger than this as remote links (0 for no limit)")
+    p.add_argument("--max-docset-assets-mb", type=int, default=None, help="Stop downloading assets once the docset holds this much (0 for no limit)")
+    p.add_argument("--full-text", action="store_true", help="Also build a full-text index of page text for 'docugen query --text'")
+    p.add_argument("--host-rate", type=float, default=None, help="Requests per second per host (0 for no limit beyond robots.txt Crawl-delay)")
+    p.add_argument("--record", metavar="DIR", default=None, help="Record fetched pages and responses into an archive directory")
+    p.add_argument("--replay", metavar="DIR", default=None, help="Build offline from an archive made with --record")
+    p.add_argument("--incremental", action="store_true", help="Update an existing docset, re-processing only pages that changed")
+    p.add_argument("--readiness", metavar="FILE", default=None, help="JSON file of per-site budgets for how long rendered pages may take to settle")
     args = p.parse_args()
 
-    anyio.run(generate, args.urls, args.out, args.js, args.max_pages, None, None, "playwright", None, args.verbose, args.force)
+    js = "auto" if args.auto_js else args.js
+    anyio.run(partial(generate, concurrency=args.concurrency, resume=args.resume, asset_cache=args.asset_cache, max_asset_mb=args.max_asset_mb, max_docset_assets_mb=args.max_docset_assets_mb, full_text=args.full_text, incremental=args.incremental, host_rate=args.host_rate, record=args.record, replay=args.replay, readiness=args.readiness), args.urls, args.out, js, args.max_pages, None, None, "playwright", None, args.verbose, args.force)
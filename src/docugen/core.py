@@ -1,4 +1,5 @@
 import anyio
+import httpx
 import pathlib
 import os
 from dotenv import load_dotenv
@@ -6,20 +7,55 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from .fetch.httpx_fetcher import HttpxFetcher
 from .fetch.playwright_fetcher import PlaywrightFetcher
+from .fetch.page_store import StoredPageFetcher
+from .fetch.http_client import HttpClientPool
+from .fetch.base import CapturedResource
+from .fetch.archive import FetchArchive, RecordingFetcher, RecordingTransport, ReplayFetcher, ReplayTransport
+from .fetch.auto_fetcher import AutoFetcher, FetchModeRegistry
+from .fetch.readiness import ReadinessPolicy
 try:
     from .fetch.qt_fetcher import QtFetcher
 except ImportError:
     QtFetcher = None
 from .parsers import sphinx, docusaurus, rustdoc, generic
+from .parsers.base import ParsedPage
 from .docset.builder import DocsetBuilder
-from .assets.rewrite import rewrite_assets, get_favicon_url
+from .docset.writer import DocsetWriter
+from .docset.incremental import IncrementalCache
+from .assets.rewrite import rewrite_assets, get_favicon_url, download_and_save_asset
+from .assets.registry import AssetRegistry
+from .assets.store import AssetStore
+from .assets.budget import AssetBudget
+from .crawl.frontier import Frontier
+from .crawl.journal import CrawlJournal
+from .crawl.scheduler import HostScheduler, Throttled, THROTTLE_STATUSES, parse_retry_after
 
 from .utils.url import get_filename_from_url, normalize_url, clean_domain, get_base_domain
+from .utils.html import ensure_doctype, redirect_page
 
 # Load environment variables from .env file
 load_dotenv()
 
 DEFAULT_MAX_PAGES = int(os.getenv("TOTAL_PAGES", 250))
+DEFAULT_CONCURRENCY = int(os.getenv("CONCURRENCY", 1))
+# Seconds a page fetched during scan may be reused by generate
+DEFAULT_PAGE_STORE_MAX_AGE = int(os.getenv("PAGE_STORE_MAX_AGE", 1800))
+# Shared content-addressed asset cache; empty disables it
+DEFAULT_ASSET_CACHE = os.getenv("ASSET_CACHE_DIR", "")
+DEFAULT_ASSET_CACHE_MAX_MB = int(os.getenv("ASSET_CACHE_MAX_MB", 2048))
+# Seconds a cached asset URL is trusted before it is downloaded again
+DEFAULT_ASSET_CACHE_MAX_AGE = int(os.getenv("ASSET_CACHE_MAX_AGE", 7 * 24 * 3600))
+# Assets larger than this (or beyond the docset total) stay remote links; 0 disables a limit
+DEFAULT_MAX_ASSET_MB = int(os.getenv("MAX_ASSET_MB", 100))
+DEFAULT_MAX_DOCSET_ASSETS_MB = int(os.getenv("MAX_DOCSET_ASSETS_MB", 0))
+# Requests per second per host (0 for no limit beyond robots.txt Crawl-delay)
+DEFAULT_HOST_RATE = float(os.getenv("HOST_RATE", 0))
+# Upper bound of the adaptive number of parallel requests per host
+DEFAULT_HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", 8))
+# JSON file of per-site readiness budgets for rendered pages (see ReadinessPolicy.load); empty uses the defaults
+DEFAULT_READINESS_CONFIG = os.getenv("READINESS_CONFIG", "")
+# Number of finished pages between crawl journal checkpoints
+CHECKPOINT_INTERVAL = 20
 
 PARSERS = [
     sphinx.SphinxParser(),
@@ -75,9 +111,106 @@ def is_url_within_doc(url, start_urls, related_patterns=None):
     
     return False
 
-async def scan(urls, js=False, max_pages=None, progress_callback=None, fetcher_type="playwright", log_callback=None, verbose=False, cancel_event=None):
+def _readiness_policy(readiness):
+    """A ``ReadinessPolicy`` from a policy, a JSON file path or ``DEFAULT_READINESS_CONFIG``."""
+    if readiness is None:
+        readiness = DEFAULT_READINESS_CONFIG or None
+    if isinstance(readiness, (str, os.PathLike)):
+        return ReadinessPolicy.load(readiness)
+    return readiness
+
+def _create_fetcher(js, fetcher_type, http_pool=None, concurrency=1, fetch_modes_path=None, readiness=None, **static_options):
+    """Pick the fetcher for a build. ``js`` is True, False or "auto" (render only pages that need it).
+
+    ``static_options`` go to the ``HttpxFetcher`` used for static fetches.
+    """
+    if js:
+        readiness = _readiness_policy(readiness)
+        if fetcher_type == "qt" and QtFetcher:
+            renderer = QtFetcher(readiness=readiness)
+        else:
+            renderer = PlaywrightFetcher(concurrency=concurrency, readiness=readiness)
+        if js == "auto":
+            return AutoFetcher(HttpxFetcher(http_pool, **static_options), renderer, FetchModeRegistry(fetch_modes_path))
+        return renderer
+    return HttpxFetcher(http_pool, **static_options)
+
+async def _fetch_page(scheduler, fetcher, url, headers=None):
+    """Fetch a page in a host slot of ``scheduler``, conditionally if ``headers`` holds validators."""
+    async with scheduler.slot(url):
+        result = await (fetcher.fetch(url, headers=headers) if headers else fetcher.fetch(url))
+        # Rendering fetchers return throttling pages instead of raising
+        if result.status in THROTTLE_STATUSES:
+            raise Throttled(url, result.status, parse_retry_after((result.headers or {}).get("retry-after")))
+    return result
+
+async def _not_modified(client, url, headers):
+    """Revalidate ``url`` with conditional ``headers``; True if the server answered 304."""
+    try:
+        r = await client.get(url, headers=headers, timeout=15)
+    except Exception:
+        return False
+    return r.status_code == 304
+
+def _is_gone(error):
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (404, 410)
+
+def _record_queued(journal, urls):
+    for url in urls:
+        journal.record_queued(url)
+
+async def _crawl(frontier, visit, max_pages, concurrency, counts, cancel_event=None):
+    """Run ``visit(url)`` over ``frontier`` with at most ``concurrency`` pages in flight.
+
+    ``visit`` may push new URLs to ``frontier`` and returns True when the page
+    counted towards ``max_pages``. A page slot is reserved for every URL in
+    flight, so the budget is never overshot; slots of failed or skipped URLs
+    are released again. URLs deferred for a retry keep the crawl alive until
+    they are due, without holding a worker meanwhile.
+    """
+    condition = anyio.Condition()
+
+    async def worker():
+        while True:
+            async with condition:
+                while True:
+                    if cancel_event and cancel_event.is_set():
+                        condition.notify_all()
+                        return
+                    if counts["pages"] >= max_pages:
+                        condition.notify_all()
+                        return
+                    if frontier and counts["pages"] + counts["in_flight"] < max_pages:
+                        break
+                    if counts["in_flight"] == 0 and not frontier.deferred:
+                        # Nothing left to fetch and nobody can queue more
+                        condition.notify_all()
+                        return
+                    # Wake up for a deferred retry even if nothing else happens
+                    with anyio.move_on_after(frontier.next_due()):
+                        await condition.wait()
+                url = frontier.pop()
+                counts["in_flight"] += 1
+
+            counted = False
+            try:
+                counted = await visit(url)
+            finally:
+                async with condition:
+                    counts["in_flight"] -= 1
+                    if counted:
+                        counts["pages"] += 1
+                    condition.notify_all()
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(max(1, concurrency)):
+            tg.start_soon(worker)
+
+async def scan(urls, js=False, max_pages=None, progress_callback=None, fetcher_type="playwright", log_callback=None, verbose=False, cancel_event=None, concurrency=None, page_store=None, readiness=None):
     if max_pages is None:
         max_pages = DEFAULT_MAX_PAGES
+    if concurrency is None:
+        concurrency = DEFAULT_CONCURRENCY
     
     def log(message, verbose_only=False):
         if verbose_only and not verbose:
@@ -90,62 +223,49 @@ async def scan(urls, js=False, max_pages=None, progress_callback=None, fetcher_t
         else:
             print(message)
 
-    log(f"Starting scan of {urls} (max_pages={max_pages}, js={js}, fetcher={fetcher_type})", verbose_only=True)
+    log(f"Starting scan of {urls} (max_pages={max_pages}, js={js}, fetcher={fetcher_type}, concurrency={concurrency})", verbose_only=True)
 
-    if js:
-        if fetcher_type == "qt" and QtFetcher:
-            fetcher = QtFetcher()
-        else:
-            fetcher = PlaywrightFetcher()
-    else:
-        fetcher = HttpxFetcher()
+    scheduler = HostScheduler(rate=DEFAULT_HOST_RATE, max_concurrency=DEFAULT_HOST_CONCURRENCY)
+    http_pool = HttpClientPool(per_host_limit=DEFAULT_HOST_CONCURRENCY, scheduler=scheduler)
+    # Scanning skips files, so their bodies are never read
+    fetcher = _create_fetcher(js, fetcher_type, http_pool, concurrency=concurrency, readiness=readiness, max_file_bytes=0)
     
-    visited = set()
-    queue = list(urls)
+    frontier = Frontier(urls)
     discovered = set()
-    pages_count = 0
-
-    while queue and pages_count < max_pages:
-        if cancel_event and cancel_event.is_set():
-            log("Scan cancelled by user.")
-            break
+    counts = {"pages": 0, "in_flight": 0}
 
-        url = queue.pop(0)
-        norm_url = normalize_url(url)
-        if norm_url in visited:
-            log(f"Skipping already visited URL: {url} (normalized: {norm_url})", verbose_only=True)
-            continue
-        visited.add(norm_url)
+    async def visit(url):
+        if not frontier.mark_visited(url):
+            log(f"Skipping already visited URL: {url} (normalized: {normalize_url(url)})", verbose_only=True)
+            return False
         discovered.add(url)
         
-        log(f"Fetching ({pages_count + 1}/{max_pages}): {url}", verbose_only=True)
+        log(f"Fetching ({counts['pages'] + counts['in_flight']}/{max_pages}): {url}", verbose_only=True)
         if progress_callback:
-            progress_callback(pages_count, max_pages)
+            progress_callback(counts["pages"], max_pages)
         
         try:
-            # Add retries for robustness
-            max_retries = 3
-            result = None
-            for attempt in range(max_retries):
-                try:
-                    result = await fetcher.fetch(url)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        log(f"Final attempt failed for {url}: {e}")
-                        raise e
-                    log(f"Retry {attempt + 1}/{max_retries} for {url} due to: {e}")
-                    await anyio.sleep(2 * (attempt + 1)) # Simple backoff
+            result = await _fetch_page(scheduler, fetcher, url)
         except Exception as e:
-            log(f"Failed to fetch {url} after {max_retries} attempts: {e}")
-            continue
+            delay = scheduler.retry_delay(url, e)
+            if delay is not None:
+                # Retry later from the frontier instead of holding a worker
+                log(f"Retrying {url} in {delay:.1f}s due to: {e}")
+                frontier.defer(url, delay)
+                return False
+            log(f"Failed to fetch {url}: {e}")
+            return False
+
+        if not result.is_html:
+            # Files such as PDFs have no links to follow
+            return True
+
+        if page_store is not None:
+            page_store.put(url, result)
 
-        pages_count += 1
-        
         # Link discovery and rewriting
         soup = BeautifulSoup(result.html, "lxml")
         current_url = result.url
-        base_parsed = urlparse(current_url)
 
         # Discovery of links in <a> tags and <iframe> src
         discovered_links = []
@@ -169,26 +289,39 @@ async def scan(urls, js=False, max_pages=None, progress_callback=None, fetcher_t
             if "#" in norm_next_url and "#" not in clean_url:
                 clean_url = next_url # Keep the hash if it was deemed important for routing
             
-            norm_url = normalize_url(clean_url)
-            
-            if norm_url not in visited and norm_url not in queue:
+            if not frontier.is_visited(clean_url) and clean_url not in frontier:
                 # Add to discovered even if not within doc, so user can choose it
                 discovered.add(clean_url)
 
                 if is_url_within_doc(clean_url, urls):
-                    if len(visited) < max_pages:
+                    if len(frontier.visited) < max_pages:
                         log(f"Discovered new link within doc: {clean_url}", verbose_only=True)
-                        queue.append(clean_url)
+                        frontier.push(clean_url)
                     else:
                         log(f"Max pages reached, not queueing: {clean_url}", verbose_only=True)
                 else:
                     log(f"Discovered link outside doc (skipping crawl): {clean_url}", verbose_only=True)
 
+        return True
+
+    async with http_pool, fetcher:
+        await _crawl(frontier, visit, max_pages, concurrency, counts, cancel_event)
+    if cancel_event and cancel_event.is_set():
+        log("Scan cancelled by user.")
+
     return sorted(list(discovered))
 
-async def generate(urls, output, js=False, max_pages=None, progress_callback=None, allowed_urls=None, fetcher_type="playwright", log_callback=None, verbose=False, force=False, cancel_event=None):
+async def generate(urls, output, js=False, max_pages=None, progress_callback=None, allowed_urls=None, fetcher_type="playwright", log_callback=None, verbose=False, force=False, cancel_event=None, concurrency=None, resume=False, page_store=None, page_store_max_age=None, asset_cache=None, max_asset_mb=None, max_docset_assets_mb=None, full_text=False, incremental=False, host_rate=None, record=None, replay=None, readiness=None):
     if max_pages is None:
         max_pages = DEFAULT_MAX_PAGES
+    if concurrency is None:
+        concurrency = DEFAULT_CONCURRENCY
+    if asset_cache is None:
+        asset_cache = DEFAULT_ASSET_CACHE
+    if max_asset_mb is None:
+        max_asset_mb = DEFAULT_MAX_ASSET_MB
+    if max_docset_assets_mb is None:
+        max_docset_assets_mb = DEFAULT_MAX_DOCSET_ASSETS_MB
 
     def log(message, verbose_only=False):
         if verbose_only and not verbose:
@@ -201,7 +334,7 @@ async def generate(urls, output, js=False, max_pages=None, progress_callback=Non
         else:
             print(message)
 
-    log(f"Starting generation to {output} (max_pages={max_pages}, js={js}, fetcher={fetcher_type}, force={force})", verbose_only=True)
+    log(f"Starting generation to {output} (max_pages={max_pages}, js={js}, fetcher={fetcher_type}, force={force}, concurrency={concurrency}, resume={resume})", verbose_only=True)
 
     if not urls:
         return
@@ -209,74 +342,181 @@ async def generate(urls, output, js=False, max_pages=None, progress_callback=Non
     main_url = urls[0]
     norm_main_url = normalize_url(main_url)
 
-    if js:
-        if fetcher_type == "qt" and QtFetcher:
-            fetcher = QtFetcher()
-        else:
-            fetcher = PlaywrightFetcher()
+    if host_rate is None:
+        host_rate = DEFAULT_HOST_RATE
+    archive = None
+    if replay:
+        # Everything is served from the archive; nothing to be polite to
+        archive = FetchArchive(replay).load()
+        log(f"Replaying build from archive {replay}")
+        scheduler = HostScheduler(max_concurrency=DEFAULT_HOST_CONCURRENCY)
+        http_pool = HttpClientPool(per_host_limit=DEFAULT_HOST_CONCURRENCY, scheduler=scheduler, transport=ReplayTransport(archive))
+        fetcher = ReplayFetcher(archive)
     else:
-        fetcher = HttpxFetcher()
-    builder = DocsetBuilder(output, main_url=main_url, log_callback=log_callback, verbose=verbose, force=force)
+        # Learned per-host limits and pending Retry-After blocks carry over to the next run
+        scheduler = HostScheduler(rate=host_rate, max_concurrency=DEFAULT_HOST_CONCURRENCY, path=os.path.normpath(output) + ".hosts.json")
+        http_pool = HttpClientPool(per_host_limit=DEFAULT_HOST_CONCURRENCY, scheduler=scheduler)
+        fetcher = _create_fetcher(js, fetcher_type, http_pool, concurrency, os.path.normpath(output) + ".fetchmodes.json", readiness)
+    if page_store is not None and archive is None:
+        if page_store_max_age is None:
+            page_store_max_age = DEFAULT_PAGE_STORE_MAX_AGE
+        log(f"Reusing up to {len(page_store)} pages fetched during scan (max age {page_store_max_age}s)", verbose_only=True)
+        fetcher = StoredPageFetcher(fetcher, page_store, page_store_max_age)
+    if record and not replay:
+        archive = FetchArchive(record).open()
+        log(f"Recording pages and responses to archive {record}")
+        http_pool.transport = RecordingTransport(archive, http_pool.default_transport())
+        fetcher = RecordingFetcher(fetcher, archive)
+    journal = CrawlJournal(os.path.normpath(output) + ".journal")
+    resume = resume and not force and journal.exists() and os.path.isdir(output)
+    if not resume and journal.exists():
+        log("Discarding stale crawl journal from a previous run", verbose_only=True)
+    journal.connect(reset=not resume)
+    incremental = incremental and not force
+    manifest = IncrementalCache(os.path.normpath(output) + ".manifest.json")
+    if incremental and os.path.isdir(output):
+        log(f"Rebuilding incrementally against {len(manifest)} pages of the previous build", verbose_only=True)
+    elif not resume:
+        manifest.clear()
+    builder = DocsetBuilder(output, main_url=main_url, log_callback=log_callback, verbose=verbose, force=force, journal=journal, resume=resume, full_text=full_text, incremental=incremental)
     doc_dir = pathlib.Path(builder.documents_path)
+    asset_registry = AssetRegistry()
+    asset_budget = AssetBudget(
+        max_asset_bytes=max_asset_mb * 1024 * 1024 if max_asset_mb else None,
+        max_total_bytes=max_docset_assets_mb * 1024 * 1024 if max_docset_assets_mb else None,
+    )
+    asset_store = None
+    if asset_cache and not replay:
+        asset_store = AssetStore(asset_cache, max_bytes=DEFAULT_ASSET_CACHE_MAX_MB * 1024 * 1024, max_age=DEFAULT_ASSET_CACHE_MAX_AGE)
+        log(f"Using shared asset cache at {asset_cache}", verbose_only=True)
     
-    visited = set()
-    queue = list(urls)
-    pages_count = 0
+    if resume:
+        frontier = journal.load_frontier()
+        counts = {"pages": journal.done_count(), "in_flight": 0}
+        log(f"Resuming from crawl journal: {counts['pages']} pages done, {len(frontier)} queued")
+    else:
+        frontier = Frontier(urls)
+        counts = {"pages": 0, "in_flight": 0}
+        for url in urls:
+            journal.record_queued(url)
 
     if allowed_urls:
         allowed_urls = {normalize_url(u) for u in allowed_urls}
         # Ensure initial URLs are always allowed
         allowed_urls.update({normalize_url(u) for u in urls})
 
-    while queue and pages_count < max_pages:
-        if cancel_event and cancel_event.is_set():
-            log("Generation cancelled by user.")
-            break
-
-        url = queue.pop(0)
+    async def keep(url, entry, is_main):
+        # An unchanged page still feeds the crawl with the links it had
+        newly_queued = [link for link in entry["links"] if not frontier.is_visited(link) and frontier.push(link)]
+        if newly_queued:
+            await writer.submit(_record_queued, journal, newly_queued)
+        await writer.submit(builder.keep_page, entry["filename"], url, is_main=is_main)
+        await writer.submit(journal.mark_done, url)
+
+    async def remove(url):
+        entry = manifest.forget(url)
+        if entry:
+            log(f"Removing page gone from the site: {url}")
+            await writer.submit(builder.remove_page, entry["filename"])
+
+    async def save_file(url, result, is_main):
+        # Files too large for the fetcher to keep in memory are streamed to disk
+        captured = CapturedResource(result.url, result.body, result.content_type) if result.body is not None else None
+        local_name = await download_and_save_asset(http_pool, url, doc_dir, "file", force=True, verbose=verbose, log_callback=log_callback, registry=asset_registry, store=asset_store, budget=asset_budget, captured=captured)
+        name = pathlib.PurePosixPath(urlparse(result.url).path).name or result.url
+        log(f"Saved {result.content_type} file ({result.size} bytes): {url}", verbose_only=True)
+        # Links to the URL point at its page name, which forwards to the file (or the remote URL if it was too large)
+        page = ParsedPage(None, redirect_page(local_name or result.url, name), [(name, "File", None)])
+        await writer.add_page(page, url, is_main=is_main)
+
+    async def visit(url):
         norm_url = normalize_url(url)
-        if norm_url in visited:
+        if frontier.is_visited(url):
             log(f"Skipping already visited URL: {url} (normalized: {norm_url})", verbose_only=True)
-            continue
+            return False
         
         if allowed_urls and norm_url not in allowed_urls:
             log(f"Skipping URL not in allowed list: {url}", verbose_only=True)
-            continue
+            return False
 
-        visited.add(norm_url)
-        log(f"Processing ({pages_count + 1}/{max_pages}): {url}", verbose_only=True)
+        frontier.mark_visited(url)
+        log(f"Processing ({counts['pages'] + counts['in_flight']}/{max_pages}): {url}", verbose_only=True)
         
         if progress_callback:
-            progress_callback(pages_count, max_pages)
+            progress_callback(counts["pages"], max_pages)
         
+        entry = manifest.get(url) if incremental else None
+        if entry and not os.path.exists(os.path.join(builder.documents_path, entry["filename"])):
+            entry = None
+        is_main = (url == urls[0] or norm_url == norm_main_url)
+        validators = manifest.conditional_headers(url) if entry else None
+        if validators and not fetcher.revalidates:
+            # Renderers cannot send validators; revalidate with a plain request first
+            if await _not_modified(http_pool, url, validators):
+                log(f"Not modified: {url}", verbose_only=True)
+                await keep(url, entry, is_main)
+                return True
+            validators = None
+
         try:
-            # Add retries for robustness
-            max_retries = 3
-            result = None
-            for attempt in range(max_retries):
-                try:
-                    result = await fetcher.fetch(url)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        log(f"Final attempt failed for {url}: {e}")
-                        raise e
-                    log(f"Retry {attempt + 1}/{max_retries} for {url} due to: {e}")
-                    await anyio.sleep(2 * (attempt + 1)) # Simple backoff
+            result = await _fetch_page(scheduler, fetcher, url, validators)
         except Exception as e:
-            log(f"Failed to fetch {url} after {max_retries} attempts: {e}")
-            continue
+            delay = scheduler.retry_delay(url, e)
+            if delay is not None:
+                # Retry later from the frontier instead of holding a worker
+                log(f"Retrying {url} in {delay:.1f}s due to: {e}")
+                frontier.defer(url, delay)
+                return False
+            log(f"Failed to fetch {url}: {e}")
+            if incremental and _is_gone(e):
+                await remove(url)
+            elif entry:
+                log(f"Keeping the previous version of {url}")
+                await keep(url, entry, is_main)
+                return True
+            await writer.submit(journal.mark_failed, url)
+            return False
+
+        if result.status == 304:
+            log(f"Not modified: {url}", verbose_only=True)
+            await keep(url, entry, is_main)
+            return True
+
+        if incremental and result.status in (404, 410):
+            await remove(url)
+            await writer.submit(journal.mark_failed, url)
+            return False
+
+        content = result.html if result.is_html else result.body
+        if entry and not manifest.changed(url, content):
+            log(f"Unchanged: {url}", verbose_only=True)
+            # Refresh the validators so the next run can revalidate cheaply
+            manifest.record(url, entry["filename"], content, result.headers, entry["links"])
+            await keep(url, entry, is_main)
+            return True
+
+        if not result.is_html:
+            # PDFs, archives and the like skip parsing and are saved as files
+            await save_file(url, result, is_main)
+            manifest.record(url, get_filename_from_url(url), content, result.headers)
+            await writer.submit(journal.mark_done, url)
+            return True
+
+        # Parse once; the same document flows through link rewriting,
+        # asset rewriting and symbol extraction and is serialized on write.
+        soup = BeautifulSoup(result.html, "lxml")
 
         if not builder.has_icon:
-            favicon_url = get_favicon_url(result.html, url)
-            await builder.set_icon(favicon_url)
+            favicon_url = get_favicon_url(soup, url)
+            await builder.set_icon(favicon_url, client=http_pool)
 
         # Link discovery and rewriting
-        soup = BeautifulSoup(result.html, "lxml")
         current_url = result.url
         base_parsed = urlparse(current_url)
 
         # Discovery of links in <a> tags and <iframe> src
+        newly_queued = []
+        page_links = []
         links_to_process = []
         for a in soup.find_all("a", href=True):
             links_to_process.append((a, "href", a["href"]))
@@ -323,26 +563,24 @@ async def generate(urls, output, js=False, max_pages=None, progress_callback=Non
                     local_name = get_filename_from_url(clean_url)
                     element[attr] = f"{local_name}#{anchor}" if anchor else local_name
                 
-                # Use normalized URL for checking visited/queue to be consistent
-                norm_clean_url = normalize_url(clean_url)
-                # But we still need the actual URL to fetch it
-                if norm_clean_url not in visited and norm_clean_url not in queue:
-                     # Only follow links that are allowed or within doc
-                     if is_allowed or is_within_doc:
-                        log(f"Queuing new link: {clean_url}", verbose_only=True)
-                        queue.append(clean_url)
-                     else:
-                        log(f"Skipping link (not allowed/within doc): {clean_url}", verbose_only=True)
-                elif norm_clean_url in visited:
+                page_links.append(clean_url)
+                # The frontier compares normalized URLs but keeps the actual URL to fetch it
+                if frontier.is_visited(clean_url):
                     log(f"Link already visited: {clean_url}", verbose_only=True)
-                elif norm_clean_url in queue:
+                elif frontier.push(clean_url):
+                    log(f"Queuing new link: {clean_url}", verbose_only=True)
+                    newly_queued.append(clean_url)
+                else:
                     log(f"Link already in queue: {clean_url}", verbose_only=True)
             else:
                 # If it's not within doc and not allowed, at least make it absolute if it was relative
                 # so it doesn't break in the flat docset structure.
                 element[attr] = next_url
+
+        if newly_queued:
+            await writer.submit(_record_queued, journal, newly_queued)
         
-        updated_html = await rewrite_assets(str(soup), url, doc_dir, force=force, verbose=verbose, log_callback=log_callback)
+        await rewrite_assets(soup, url, doc_dir, force=force, verbose=verbose, log_callback=log_callback, client=http_pool, registry=asset_registry, store=asset_store, budget=asset_budget, resources=result.resources)
         
         # Determine norm_url for comparison with main_url
         norm_url = normalize_url(url)
@@ -352,19 +590,56 @@ async def generate(urls, output, js=False, max_pages=None, progress_callback=Non
         # The first URL in the list is always considered the main page
         is_main = (url == urls[0] or norm_url == norm_main_url or norm_final_url == norm_main_url)
         
-        pages_count += 1
-        
         # Ensure DOCTYPE exists
-        if not updated_html.lstrip().lower().startswith("<!doctype"):
-            updated_html = "<!DOCTYPE html>\n" + updated_html
+        ensure_doctype(soup)
 
+        # Generator detection only needs a substring scan of the raw source
         for parser in PARSERS:
-            if parser.matches(updated_html):
-                parsed = parser.parse(updated_html)
-                builder.add_page(parsed, url, is_main=is_main)
+            if parser.matches(result.html):
+                parsed = parser.parse(soup)
+                await writer.add_page(parsed, url, is_main=is_main)
+                manifest.record(url, get_filename_from_url(url), result.html, result.headers, dict.fromkeys(page_links))
                 break
 
+        await writer.submit(journal.mark_done, url)
+        if (counts["pages"] + 1) % CHECKPOINT_INTERVAL == 0:
+            await writer.checkpoint()
+        return True
+
+    writer = DocsetWriter(builder)
+    try:
+        # File and index I/O runs on the writer thread; leaving it waits for queued writes
+        async with writer, http_pool, fetcher:
+            await _crawl(frontier, visit, max_pages, concurrency, counts, cancel_event)
+            if incremental and not (cancel_event and cancel_event.is_set()):
+                if frontier or frontier.deferred:
+                    log("Crawl stopped at max_pages; keeping pages of the previous build that were not revisited")
+                else:
+                    # Whatever the complete crawl did not reach is gone from the site
+                    for entry in manifest.unseen(frontier.visited):
+                        await remove(entry["url"])
+    finally:
+        # Persist progress even if the crawl was interrupted by an error
+        builder.checkpoint()
+        manifest.save()
+        scheduler.save()
+        if archive is not None:
+            archive.close()
+        if asset_store is not None:
+            asset_store.close()
+
+    cancelled = bool(cancel_event and cancel_event.is_set())
+    if cancelled:
+        log("Generation cancelled by user. Run again with resume to continue.")
+
+    if asset_budget.oversized:
+        log(f"Left {len(asset_budget.oversized)} oversized assets as remote links")
+
     if progress_callback:
-        progress_callback(pages_count, max_pages)
+        progress_callback(counts["pages"], max_pages)
 
     builder.finalize()
+    if cancelled:
+        journal.close()
+    else:
+        journal.remove()
@@ -0,0 +1,83 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from ..utils.url import normalize_url
+
+
+class Frontier:
+    """FIFO crawl queue with O(1) membership checks on normalized URLs.
+
+    ``visited`` holds the normalized keys of URLs that have been claimed for
+    fetching; a URL is only queued once and never again after it was visited.
+    A visited URL can be ``defer``-red to be queued again after a delay, e.g.
+    to retry it; it counts as queued meanwhile.
+    """
+
+    def __init__(self, urls=()):
+        self._queue = deque()
+        self._queued = set()
+        self._deferred = []
+        self._seq = itertools.count()
+        self.visited = set()
+        for url in urls:
+            self.push(url)
+
+    def __len__(self):
+        self._release_due()
+        return len(self._queue)
+
+    def __bool__(self):
+        self._release_due()
+        return bool(self._queue)
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._queued
+
+    def push(self, url):
+        """Queue ``url`` unless it is already queued or visited. Returns True if queued."""
+        key = normalize_url(url)
+        if key in self._queued or key in self.visited:
+            return False
+        self._queue.append(url)
+        self._queued.add(key)
+        return True
+
+    def defer(self, url, delay):
+        """Queue the visited ``url`` again once ``delay`` seconds have passed."""
+        key = normalize_url(url)
+        self.visited.discard(key)
+        self._queued.add(key)
+        heapq.heappush(self._deferred, (time.monotonic() + delay, next(self._seq), url))
+
+    @property
+    def deferred(self):
+        return len(self._deferred)
+
+    def next_due(self):
+        """Seconds until the next deferred URL is queued, or None if there is none."""
+        if not self._deferred:
+            return None
+        return max(0.0, self._deferred[0][0] - time.monotonic())
+
+    def _release_due(self):
+        now = time.monotonic()
+        while self._deferred and self._deferred[0][0] <= now:
+            self._queue.append(heapq.heappop(self._deferred)[2])
+
+    def pop(self):
+        self._release_due()
+        url = self._queue.popleft()
+        self._queued.discard(normalize_url(url))
+        return url
+
+    def is_visited(self, url):
+        return normalize_url(url) in self.visited
+
+    def mark_visited(self, url):
+        """Claim ``url`` for fetching. Returns False if it was already visited."""
+        key = normalize_url(url)
+        if key in self.visited:
+            return False
+        self.visited.add(key)
+        return True
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+from .frontier import Frontier
+from ..utils.url import normalize_url
+
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+
+
+class CrawlJournal:
+    """SQLite journal of a ``generate`` run, kept next to the ``.docset``.
+
+    Records every queued URL with its state, the pages written to the docset
+    and a few builder settings, so an interrupted build can be resumed with
+    the same frontier instead of starting over. Index entries live in
+    ``docSet.dsidx`` itself, which is committed together with the journal.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self._seq = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def connect(self, reset=False):
+        if reset and self.exists():
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Used from the DocsetWriter thread; access is serialized there
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls(key TEXT PRIMARY KEY, url TEXT, state TEXT, seq INTEGER)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages(filename TEXT PRIMARY KEY, url TEXT, seq INTEGER)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)"
+        )
+        row = self.conn.execute(
+            "SELECT MAX(seq) FROM (SELECT seq FROM urls UNION ALL SELECT seq FROM pages)"
+        ).fetchone()
+        self._seq = row[0] or 0
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def record_queued(self, url):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO urls(key, url, state, seq) VALUES (?, ?, ?, ?)",
+            (normalize_url(url), url, QUEUED, self._next_seq()),
+        )
+
+    def _set_state(self, url, state):
+        self.conn.execute(
+            "INSERT INTO urls(key, url, state, seq) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET state = excluded.state",
+            (normalize_url(url), url, state, self._next_seq()),
+        )
+
+    def mark_done(self, url):
+        self._set_state(url, DONE)
+
+    def mark_failed(self, url):
+        self._set_state(url, FAILED)
+
+    def record_page(self, filename, url):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages(filename, url, seq) VALUES (?, ?, ?)",
+            (filename, url, self._next_seq()),
+        )
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def load_frontier(self):
+        """Rebuild the frontier: finished URLs count as visited, everything else is re-queued in order."""
+        frontier = Frontier()
+        rows = self.conn.execute("SELECT key, url, state FROM urls ORDER BY seq").fetchall()
+        frontier.visited.update(key for key, _, state in rows if state in (DONE, FAILED))
+        for _, url, state in rows:
+            if state == QUEUED:
+                frontier.push(url)
+        return frontier
+
+    def load_pages(self):
+        return self.conn.execute("SELECT filename, url FROM pages ORDER BY seq").fetchall()
+
+    def done_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (DONE,)).fetchone()[0]
+
+    def commit(self):
+        if self.conn:
+            self.conn.commit()
+
+    def close(self):
+        if self.conn:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def remove(self):
+        self.close()
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,310 @@
+import json
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import anyio
+import httpx
+from ..utils.url import normalize_url
+
+# Responses that ask the client to slow down
+THROTTLE_STATUSES = (429, 503)
+# Responses worth another attempt; other client errors fail right away
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+# Longest Retry-After that is honoured
+MAX_RETRY_AFTER = 600.0
+# Pause after a 429/503 that did not say how long to wait
+DEFAULT_THROTTLE_DELAY = 1.0
+# A request this much slower than the fastest one seen on its host counts as congestion
+SLOW_FACTOR = 4.0
+MIN_SLOW_LATENCY = 2.0
+LATENCY_ALPHA = 0.2
+USER_AGENT = "docugen"
+
+# Slots held by the current task, so nested requests for the same host reuse them
+_held = ContextVar("docugen_scheduler_slots", default={})
+
+
+class Throttled(Exception):
+    """A fetch answered with a throttling status by a fetcher that does not raise for it."""
+
+    def __init__(self, url, status, retry_after=None):
+        super().__init__(f"{status} from {url}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Seconds to wait according to a ``Retry-After`` header (delta seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def _host(url):
+    return urlparse(str(url)).netloc.lower()
+
+
+class _HostState:
+    def __init__(self, limit, rate, burst):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.blocked_until = 0.0
+        self.crawl_delay = None
+        self.latency = None
+        self.fastest = None
+        self.last_decrease = 0.0
+        self.condition = anyio.Condition()
+        self.robots = None
+
+    def effective_rate(self):
+        rates = [r for r in (self.rate, 1 / self.crawl_delay if self.crawl_delay else 0) if r]
+        return min(rates) if rates else 0
+
+    def take_token(self, now):
+        """Take a request token; returns 0 or the seconds until one is available."""
+        rate = self.effective_rate()
+        if not rate:
+            return 0
+        burst = 1 if self.crawl_delay else max(1, self.burst)
+        self.tokens = min(burst, self.tokens + (now - self.refilled) * rate)
+        self.refilled = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class _Ticket:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.latency = None
+        self.status = None
+
+
+class HostScheduler:
+    """Per-host politeness for every request of a build.
+
+    Each host gets a token bucket of ``rate`` requests per second (lowered to
+    its robots.txt ``Crawl-delay`` or ``Request-rate``) and an adaptive
+    concurrency limit: it grows by one request per round trip while latency
+    stays healthy and halves on throttling, server errors, timeouts or a
+    latency spike (AIMD). A 429/503 blocks the host for its ``Retry-After``.
+    ``retry_delay`` tells callers when to try a failed URL again, with
+    exponential backoff and full jitter, so they can reschedule it instead
+    of sleeping. With a ``path`` the learned limits and pending Retry-After
+    blocks are persisted as JSON for the next run.
+    """
+
+    def __init__(self, rate=0, burst=None, initial_concurrency=2, max_concurrency=8,
+                 max_retries=3, backoff=1.0, max_backoff=60.0, robots_fetcher=None, path=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.initial_concurrency = max(1, min(initial_concurrency, max_concurrency))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # ``async (robots_url) -> text or None``; without one Crawl-delay is not looked up
+        self.robots_fetcher = robots_fetcher
+        self.path = path
+        self._hosts = {}
+        self._attempts = {}
+        self._saved = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._saved = json.load(f)
+            except (OSError, ValueError):
+                self._saved = {}
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            saved = self._saved.get(host, {})
+            limit = min(saved.get("limit", self.initial_concurrency), self.max_concurrency)
+            state = _HostState(max(1.0, limit), self.rate, self.burst)
+            state.crawl_delay = saved.get("crawl_delay")
+            retry_in = saved.get("retry_at", 0) - time.time()
+            if retry_in > 0:
+                state.blocked_until = time.monotonic() + min(retry_in, MAX_RETRY_AFTER)
+            self._hosts[host] = state
+        return state
+
+    def limit(self, url):
+        """Current concurrency limit for the host of ``url``."""
+        return int(self._state(_host(url)).limit)
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Hold a request slot on the host of ``url`` for the duration of the block.
+
+        Nested slots for the same host in the same task are free, so a page
+        fetch wrapped in a slot can go through a client that takes one too.
+        """
+        host = _host(url)
+        held = _held.get()
+        if host in held:
+            yield
+            return
+
+        state = self._state(host)
+        await self._load_robots(state, url)
+        await self._acquire(state)
+        ticket = _Ticket()
+        token = _held.set({**held, host: ticket})
+        try:
+            yield
+        except Exception as e:
+            self._failed(state, e)
+            raise
+        else:
+            self._finished(state, ticket)
+        finally:
+            _held.reset(token)
+            with anyio.CancelScope(shield=True):
+                async with state.condition:
+                    state.in_flight -= 1
+                    state.condition.notify_all()
+
+    async def _acquire(self, state):
+        async with state.condition:
+            while state.in_flight >= int(state.limit):
+                await state.condition.wait()
+            state.in_flight += 1
+        try:
+            while True:
+                now = time.monotonic()
+                wait = max(state.blocked_until - now, state.take_token(now))
+                if wait <= 0:
+                    return
+                await anyio.sleep(wait)
+        except BaseException:
+            with anyio.CancelScope(shield=True):
+                async with state.condition:
+                    state.in_flight -= 1
+                    state.condition.notify_all()
+            raise
+
+    async def _load_robots(self, state, url):
+        if self.robots_fetcher is None:
+            return
+        if state.robots is not None:
+            await state.robots.wait()
+            return
+        state.robots = anyio.Event()
+        try:
+            parsed = urlparse(str(url))
+            text = await self.robots_fetcher(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+            if text:
+                parser = RobotFileParser()
+                parser.parse(text.splitlines())
+                # Lookups return nothing until the rules are marked as fetched
+                parser.modified()
+                delay = parser.crawl_delay(USER_AGENT)
+                rate = parser.request_rate(USER_AGENT)
+                if rate and rate.requests:
+                    delay = max(delay or 0, rate.seconds / rate.requests)
+                if delay:
+                    state.crawl_delay = min(float(delay), MAX_RETRY_AFTER)
+        except Exception:
+            pass
+        finally:
+            state.robots.set()
+
+    def observe(self, url, response):
+        """Record the status and time to headers of a response received inside a slot."""
+        host = _host(url)
+        ticket = _held.get().get(host)
+        if ticket is not None:
+            ticket.latency = time.monotonic() - ticket.start
+            ticket.status = response.status_code
+        if response.status_code in THROTTLE_STATUSES:
+            self._throttle(self._state(host), parse_retry_after(response.headers.get("retry-after")))
+
+    def _finished(self, state, ticket):
+        if ticket.status is not None and ticket.status >= 500:
+            self._decrease(state)
+            return
+        if ticket.status in THROTTLE_STATUSES:
+            return
+        latency = ticket.latency if ticket.latency is not None else time.monotonic() - ticket.start
+        state.fastest = latency if state.fastest is None else min(state.fastest, latency)
+        state.latency = latency if state.latency is None else (1 - LATENCY_ALPHA) * state.latency + LATENCY_ALPHA * latency
+        if latency > max(SLOW_FACTOR * state.fastest, MIN_SLOW_LATENCY):
+            self._decrease(state)
+        else:
+            state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+
+    def _failed(self, state, error):
+        if isinstance(error, Throttled):
+            self._throttle(state, error.retry_after)
+        elif isinstance(error, httpx.HTTPStatusError):
+            response = error.response
+            if response.status_code in THROTTLE_STATUSES:
+                self._throttle(state, parse_retry_after(response.headers.get("retry-after")))
+            elif response.status_code >= 500:
+                self._decrease(state)
+        else:
+            # Timeouts and connection errors
+            self._decrease(state)
+
+    def _throttle(self, state, retry_after):
+        self._decrease(state)
+        delay = retry_after if retry_after is not None else DEFAULT_THROTTLE_DELAY
+        state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+
+    def _decrease(self, state):
+        now = time.monotonic()
+        # Halve at most once per round trip; requests already in flight saw the same congestion
+        if now - state.last_decrease < max(state.latency or 0, 1.0):
+            return
+        state.limit = max(1.0, state.limit / 2)
+        state.last_decrease = now
+
+    def retry_delay(self, url, error):
+        """Seconds after which ``url`` should be fetched again, or None to give up on it."""
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code not in RETRY_STATUSES:
+            return None
+        key = normalize_url(url)
+        attempt = self._attempts.get(key, 0) + 1
+        if attempt >= self.max_retries:
+            self._attempts.pop(key, None)
+            return None
+        self._attempts[key] = attempt
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        state = self._state(_host(url))
+        return max(delay, state.blocked_until - time.monotonic())
+
+    def save(self):
+        if not self.path:
+            return
+        now, wall = time.monotonic(), time.time()
+        data = dict(self._saved)
+        for host, state in self._hosts.items():
+            entry = {"limit": round(state.limit, 2)}
+            if state.crawl_delay:
+                entry["crawl_delay"] = state.crawl_delay
+            if state.blocked_until > now:
+                entry["retry_at"] = wall + state.blocked_until - now
+            data[host] = entry
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
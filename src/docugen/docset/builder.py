@@ -1,22 +1,35 @@
 import os
 import shutil
 import plistlib
+import anyio
 import httpx
 from .index import DocsetIndex
+from .fulltext import FullTextIndex, FULL_TEXT_DB, fts5_available
 from ..utils.url import get_filename_from_url, normalize_url, clean_domain
 from urllib.parse import urlparse
 
 class DocsetBuilder:
-    def __init__(self, output_path, main_url=None, log_callback=None, verbose=False, force=False):
+    def __init__(self, output_path, main_url=None, log_callback=None, verbose=False, force=False, journal=None, resume=False, full_text=False, incremental=False):
         self.docset_name = os.path.basename(output_path).replace(".docset", "")
         self.base_path = output_path
         self.contents_path = os.path.join(self.base_path, "Contents")
         self.resources_path = os.path.join(self.contents_path, "Resources")
         self.documents_path = os.path.join(self.resources_path, "Documents")
         
-        self.index = DocsetIndex(os.path.join(self.resources_path, "docSet.dsidx"))
+        self.index = DocsetIndex(os.path.join(self.resources_path, "docSet.dsidx"), bulk=True)
         self.verbose = verbose
         self.force = force
+        self.log_callback = log_callback
+        self.full_text = None
+        if full_text:
+            if fts5_available():
+                self.full_text = FullTextIndex(os.path.join(self.resources_path, FULL_TEXT_DB))
+            else:
+                self.log("SQLite was built without FTS5; skipping the full-text index")
+        self.journal = journal
+        self.resume = resume
+        self.incremental = incremental
+        self._backfill_full_text = False
         self._setup_directories()
         self.first_page = None
         self.main_page = None
@@ -24,7 +37,8 @@ class DocsetBuilder:
         self.main_domain = clean_domain(urlparse(main_url).netloc) if main_url else None
         self.all_pages = [] # List of (filename, url)
         self.has_icon = False
-        self.log_callback = log_callback
+        if self.resume and self.journal:
+            self._restore_from_journal()
 
     def log(self, message, verbose_only=False):
         if verbose_only and not self.verbose:
@@ -37,7 +51,44 @@ class DocsetBuilder:
         else:
             print(message)
 
+    def _restore_from_journal(self):
+        self.all_pages = [tuple(row) for row in self.journal.load_pages()]
+        self.first_page = self.journal.get_meta("first_page")
+        self.main_page = self.journal.get_meta("main_page")
+        self.has_icon = self.journal.get_meta("has_icon") == "1"
+        self.log(f"Restored {len(self.all_pages)} pages from crawl journal", verbose_only=True)
+
+    def checkpoint(self):
+        """Commit the index and the crawl journal so an interrupted build can be resumed."""
+        self.index.commit()
+        if self.full_text:
+            self.full_text.commit()
+        if self.journal:
+            self.journal.set_meta("first_page", self.first_page)
+            self.journal.set_meta("main_page", self.main_page)
+            self.journal.set_meta("has_icon", "1" if self.has_icon else "0")
+            self.journal.commit()
+
     def _setup_directories(self):
+        if self.resume:
+            self.log(f"Resuming existing docset at {self.base_path}")
+            os.makedirs(self.documents_path, exist_ok=True)
+            self.index.connect(reset=False)
+            if self.full_text:
+                self.full_text.connect(reset=False)
+            return
+
+        if self.incremental and os.path.exists(self.base_path):
+            # Keep the previous build; changed pages are replaced one by one
+            self.log(f"Updating existing docset at {self.base_path}")
+            os.makedirs(self.documents_path, exist_ok=True)
+            self.index.connect(reset=False)
+            if self.full_text:
+                # A previous build without full text needs its kept pages indexed too
+                self._backfill_full_text = not self.full_text.exists()
+                self.full_text.connect(reset=False)
+            return
+
         if os.path.exists(self.base_path):
             if self.force:
                 self.log(f"Force building: removing existing docset at {self.base_path}")
@@ -52,26 +103,30 @@ class DocsetBuilder:
         
         os.makedirs(self.documents_path)
         self.index.connect()
+        if self.full_text:
+            self.full_text.connect()
 
-    async def set_icon(self, icon_url):
+    async def set_icon(self, icon_url, client=None):
         if self.has_icon:
             return
         
-        try:
+        if client is None:
             async with httpx.AsyncClient(follow_redirects=True) as client:
-                r = await client.get(icon_url)
-                if r.status_code == 200:
-                    icon_path = os.path.join(self.base_path, "icon.png")
-                    with open(icon_path, "wb") as f:
-                        f.write(r.content)
-                    self.has_icon = True
+                return await self.set_icon(icon_url, client=client)
+
+        try:
+            r = await client.get(icon_url)
+            if r.status_code == 200:
+                icon_path = os.path.join(self.base_path, "icon.png")
+                await anyio.Path(icon_path).write_bytes(r.content)
+                self.has_icon = True
         except Exception as e:
             self.log(f"Failed to set icon: {e}")
 
-    def add_page(self, parsed_page, url, is_main=False):
-        filename = get_filename_from_url(url)
-        self.log(f"Adding page: {url} as {filename}", verbose_only=True)
+    def _register_page(self, filename, url, is_main=False):
         self.all_pages.append((filename, url))
+        if self.journal:
+            self.journal.record_page(filename, url)
         
         # Check if this should be the main page
         if not self.main_page:
@@ -82,10 +137,43 @@ class DocsetBuilder:
             
         if not self.first_page:
             self.first_page = filename
-            
+
+    def keep_page(self, filename, url, is_main=False):
+        """Keep a page of the previous build that did not change."""
+        self.log(f"Keeping unchanged page: {url} as {filename}", verbose_only=True)
+        self._register_page(filename, url, is_main=is_main)
+        if self._backfill_full_text:
+            with open(os.path.join(self.documents_path, filename), encoding="utf-8") as f:
+                self.full_text.add_page(filename, f.read())
+
+    def remove_page(self, filename):
+        """Delete a page of the previous build together with its index entries."""
+        self.log(f"Removing page: {filename}", verbose_only=True)
+        path = os.path.join(self.documents_path, filename)
+        if os.path.exists(path):
+            os.remove(path)
+        self.index.remove_page(filename)
+        if self.full_text:
+            self.full_text.remove_page(filename)
+
+    def add_page(self, parsed_page, url, is_main=False):
+        filename = get_filename_from_url(url)
+        self.log(f"Adding page: {url} as {filename}", verbose_only=True)
+        self._register_page(filename, url, is_main=is_main)
         dest_path = os.path.join(self.documents_path, filename)
+        if self.incremental and os.path.exists(dest_path):
+            # Replace the entries of the previous version of the page
+            self.index.remove_page(filename)
+
+        content = parsed_page.content
+        if self.full_text:
+            # Indexed from the document already in memory rather than re-reading files later
+            self.full_text.add_page(filename, content)
+        if not isinstance(content, str):
+            # Parsed documents are serialized exactly once, here
+            content = str(content)
         with open(dest_path, "w", encoding="utf-8") as f:
-            f.write(parsed_page.content)
+            f.write(content)
 
         # Use page title for search index if it exists
         if parsed_page.title:
@@ -98,7 +186,10 @@ class DocsetBuilder:
     def finalize(self):
         index_file = self._write_info_plist()
         self._write_links_list()
-        self.index.close()
+        self.index.finalize()
+        if self.full_text:
+            self.full_text.optimize()
+            self.full_text.close()
         self.log(f"Docset finalized. Main page set to: {index_file}")
 
     def _write_links_list(self):
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from bs4 import Comment
+from ..utils.html import as_soup
+
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# Kept out of docSet.dsidx, which Dash owns
+FULL_TEXT_DB = "fullText.db"
+
+
+def fts5_available():
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def extract_text(content):
+    """Return ``(title, headings, body)`` text of a page given as markup or parsed document."""
+    soup = as_soup(content)
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    headings = "\n".join(h.get_text(" ", strip=True) for h in soup.find_all(HEADING_TAGS))
+    root = soup.body or soup
+    # Leave scripts and styles out of the searchable text
+    parts = []
+    for text in root.find_all(string=True):
+        if isinstance(text, Comment) or (text.parent is not None and text.parent.name in ("script", "style", "noscript", "template")):
+            continue
+        stripped = text.strip()
+        if stripped:
+            parts.append(stripped)
+    return title, headings, " ".join(parts)
+
+
+class FullTextIndex:
+    """FTS5 index over the title, headings and text of every page in a docset.
+
+    ``path`` is an unindexed FTS5 column, so rows are replaced and removed
+    through an in-memory map from path to rowid instead of a table scan.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = None
+        self._rowids = {}
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def connect(self, reset=True, read_only=False):
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            return
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # Used from the DocsetWriter thread; access is serialized there
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if reset:
+            self.conn.execute("DROP TABLE IF EXISTS pages")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+            "path UNINDEXED, title, headings, body, tokenize='porter unicode61')"
+        )
+        self._rowids = {path: rowid for rowid, path in self.conn.execute("SELECT rowid, path FROM pages")}
+
+    def add_page(self, path, content):
+        title, headings, body = extract_text(content)
+        # A resumed or incremental build may add a page again
+        self.remove_page(path)
+        cursor = self.conn.execute(
+            "INSERT INTO pages(path, title, headings, body) VALUES (?, ?, ?, ?)",
+            (path, title, headings, body),
+        )
+        self._rowids[path] = cursor.lastrowid
+
+    def remove_page(self, path):
+        rowid = self._rowids.pop(path, None)
+        if rowid is not None:
+            self.conn.execute("DELETE FROM pages WHERE rowid = ?", (rowid,))
+
+    def search(self, query, limit=20):
+        """Return ``(path, title, snippet)`` rows matching the FTS5 ``query``, best first."""
+        return self.conn.execute(
+            "SELECT path, title, snippet(pages, 3, '[', ']', '...', 12) FROM pages "
+            "WHERE pages MATCH ? ORDER BY bm25(pages, 0.0, 10.0, 5.0, 1.0) LIMIT ?",
+            (query, limit),
+        ).fetchall()
+
+    def commit(self):
+        if self.conn:
+            self.conn.commit()
+
+    def optimize(self):
+        if self.conn:
+            self.conn.execute("INSERT INTO pages(pages) VALUES ('optimize')")
+            self.conn.commit()
+
+    def close(self):
+        if self.conn:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -1,16 +1,86 @@
 import hashlib
+import json
+import os
+from ..utils.url import normalize_url
 
-def hash_html(html: str) -> str:
-    return hashlib.sha256(html.encode()).hexdigest()
+def hash_html(html) -> str:
+    # Files saved in place of pages are hashed as bytes; files too large to keep in memory have none
+    if html is None:
+        return None
+    return hashlib.sha256(html.encode() if isinstance(html, str) else html).hexdigest()
 
 
 class IncrementalCache:
-    def __init__(self):
+    """Per-URL manifest of a built docset, used to rebuild it incrementally.
+
+    For every page it records the file it was written to, the ETag and
+    Last-Modified validators and a hash of the fetched HTML, and the
+    in-docset links found on it (so an unchanged page can still feed the
+    crawl without being fetched). With a ``path`` the manifest is persisted
+    as JSON next to the docset.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
         self.cache = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self, url):
+        return self.cache.get(normalize_url(url))
 
     def changed(self, url, html):
+        """Whether ``html`` differs from what was recorded for ``url``; records the new hash."""
         h = hash_html(html)
-        if self.cache.get(url) != h:
-            self.cache[url] = h
+        entry = self.cache.setdefault(normalize_url(url), {"url": url})
+        if h is None or entry.get("hash") != h:
+            entry["hash"] = h
             return True
         return False
+
+    def conditional_headers(self, url):
+        """Request headers that let the server answer 304 if ``url`` did not change."""
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url, filename, html, headers=None, links=()):
+        headers = headers or {}
+        self.cache[normalize_url(url)] = {
+            "url": url,
+            "filename": filename,
+            "hash": hash_html(html),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "links": list(links),
+        }
+
+    def forget(self, url):
+        return self.cache.pop(normalize_url(url), None)
+
+    def unseen(self, keys):
+        """Entries whose normalized URL is not in ``keys``."""
+        return [entry for key, entry in self.cache.items() if key not in keys]
+
+    def clear(self):
+        self.cache = {}
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -1,34 +1,159 @@
 import sqlite3
 import os
 
+# Entries buffered in bulk mode before they are written in one transaction
+DEFAULT_BATCH_SIZE = 5000
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _page_of(path):
+    return path.split("#", 1)[0]
+
+# Entries of a page have paths ``page`` or ``page#anchor``; "$" sorts right after "#"
+_PAGE_WHERE = "path = ? OR (path >= ? AND path < ?)"
+
+def _page_params(filename):
+    return (filename, filename + "#", filename + "$")
+
 class DocsetIndex:
-    def __init__(self, db_path):
+    """The Dash ``searchIndex`` table of a docset.
+
+    In ``bulk`` mode entries are de-duplicated in memory and buffered, then
+    written with ``executemany`` in one transaction per ``batch_size``
+    entries (and on every ``commit``). The database runs in WAL mode without
+    fsyncs while loading, the unique ``anchor`` index is only built in
+    ``finalize`` and the table is analyzed before it is closed. Pages removed
+    with ``remove_page`` are deleted in the same batches, through an index on
+    ``path`` created the first time a page is removed.
+    """
+
+    def __init__(self, db_path, bulk=False, batch_size=DEFAULT_BATCH_SIZE):
         self.db_path = db_path
+        self.bulk = bulk
+        self.batch_size = batch_size
         self.conn = None
+        self._pending = []
+        self._removed = []
+        # Page file name -> entries known for it, to skip duplicates in bulk mode
+        self._seen = {}
 
-    def connect(self):
+    def connect(self, reset=True, read_only=False):
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            return
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute("DROP TABLE IF EXISTS searchIndex")
+        # Used from the DocsetWriter thread; access is serialized there
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if reset:
+            self.conn.execute("DROP TABLE IF EXISTS searchIndex")
         self.conn.execute(
-            "CREATE TABLE searchIndex(id INTEGER PRIMARY KEY, name TEXT, type TEXT, path TEXT)"
-        )
-        self.conn.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS anchor ON searchIndex (name, type, path)"
+            "CREATE TABLE IF NOT EXISTS searchIndex(id INTEGER PRIMARY KEY, name TEXT, type TEXT, path TEXT)"
         )
+        if not self.bulk:
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS anchor ON searchIndex (name, type, path)"
+            )
+            return
+
+        # WAL survives a crash mid-load (needed to resume) while skipping fsyncs
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.execute("DROP INDEX IF EXISTS anchor")
+        self.conn.commit()
+        self._pending = []
+        self._removed = []
+        self._seen = {}
+        for entry in self.conn.execute("SELECT name, type, path FROM searchIndex"):
+            self._seen.setdefault(_page_of(entry[2]), set()).add(entry)
 
     def add_entry(self, name, type, path):
         # Dash documentation recommends stripping tags from names and ensuring they aren't empty
         name = name.strip()
         if not name:
             return
-            
+
+        if self.bulk:
+            entry = (name, type, path)
+            seen = self._seen.setdefault(_page_of(path), set())
+            if entry in seen:
+                return
+            seen.add(entry)
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            return
+
         self.conn.execute(
             "INSERT OR IGNORE INTO searchIndex(name, type, path) VALUES (?, ?, ?)",
             (name, type, path),
         )
 
+    def remove_page(self, filename):
+        """Delete the entries pointing into ``filename``, e.g. before it is indexed again."""
+        if not self.bulk:
+            self._index_paths()
+            self.conn.execute(f"DELETE FROM searchIndex WHERE {_PAGE_WHERE}", _page_params(filename))
+            return
+        # Deleted with the next batch, before its inserts; entries buffered so far are dropped
+        if self._seen.pop(filename, None) and self._pending:
+            self._pending = [entry for entry in self._pending if _page_of(entry[2]) != filename]
+        self._removed.append(filename)
+        if len(self._removed) >= self.batch_size:
+            self.flush()
+
+    def _index_paths(self):
+        self.conn.execute("CREATE INDEX IF NOT EXISTS page_path ON searchIndex (path)")
+
+    def search_prefix(self, prefix, limit=20):
+        """Return ``(name, type, path)`` entries whose name starts with ``prefix``, shortest first."""
+        return self.conn.execute(
+            "SELECT name, type, path FROM searchIndex WHERE name LIKE ? ESCAPE '\\' "
+            "ORDER BY length(name), name LIMIT ?",
+            (_escape_like(prefix) + "%", limit),
+        ).fetchall()
+
+    def flush(self):
+        """Write buffered bulk removals and entries in a single transaction."""
+        if not self._pending and not self._removed:
+            return
+        if self._removed:
+            self._index_paths()
+        with self.conn:
+            self.conn.executemany(
+                f"DELETE FROM searchIndex WHERE {_PAGE_WHERE}", [_page_params(f) for f in self._removed]
+            )
+            self.conn.executemany(
+                "INSERT INTO searchIndex(name, type, path) VALUES (?, ?, ?)", self._pending
+            )
+        self._pending = []
+        self._removed = []
+
+    def commit(self):
+        if self.conn:
+            self.flush()
+            self.conn.commit()
+
+    def finalize(self):
+        """Flush, build the unique index, analyze and close the database."""
+        if not self.conn:
+            return
+        self.flush()
+        self.conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS anchor ON searchIndex (name, type, path)"
+        )
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        if self.bulk:
+            # Leave a single self-contained file for Dash
+            self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.close()
+
     def close(self):
         if self.conn:
+            self.flush()
             self.conn.commit()
             self.conn.close()
+            self.conn = None
@@ -0,0 +1,52 @@
+import anyio
+from functools import partial
+
+# Jobs queued for the writer before submitting blocks the crawl
+DEFAULT_MAX_PENDING = 32
+
+
+class DocsetWriter:
+    """Runs a ``DocsetBuilder``'s file and index I/O off the event loop.
+
+    Jobs execute one at a time, in submission order, on a worker thread, so
+    page writes, SQLite inserts and journal updates never block in-flight
+    fetches. At most ``max_pending`` jobs are queued; beyond that ``submit``
+    waits, so a slow disk slows the crawl down instead of piling up parsed
+    pages in memory. Use it as an async context manager: leaving the block
+    waits for every queued job, unless it is left with an exception.
+    """
+
+    def __init__(self, builder, max_pending=DEFAULT_MAX_PENDING):
+        self.builder = builder
+        self.max_pending = max_pending
+        self._send = None
+        self._task_group = None
+
+    async def __aenter__(self):
+        self._send, receive = anyio.create_memory_object_stream(self.max_pending)
+        self._task_group = anyio.create_task_group()
+        await self._task_group.__aenter__()
+        self._task_group.start_soon(self._run, receive)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Closing the stream lets the worker drain what is queued and stop
+        self._send.close()
+        return await self._task_group.__aexit__(*exc_info)
+
+    async def _run(self, receive):
+        # A single slot keeps SQLite connections to one thread at a time
+        limiter = anyio.CapacityLimiter(1)
+        async with receive:
+            async for job in receive:
+                await anyio.to_thread.run_sync(job, limiter=limiter)
+
+    async def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` to run on the writer thread."""
+        await self._send.send(partial(func, *args, **kwargs))
+
+    async def add_page(self, parsed_page, url, is_main=False):
+        await self.submit(self.builder.add_page, parsed_page, url, is_main=is_main)
+
+    async def checkpoint(self):
+        await self.submit(self.builder.checkpoint)
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import anyio
+import httpx
+from .base import Fetcher, FetchResult, CapturedResource
+from ..utils.url import normalize_url
+
+ENTRIES_FILE = "entries.jsonl"
+BODIES_DIR = "bodies"
+# Marks responses a replay could not find in the archive
+REPLAY_MISS_HEADER = "x-docugen-replay"
+
+
+class FetchArchive:
+    """Pages and HTTP responses of a build, recorded into a directory for replay.
+
+    ``entries.jsonl`` holds one JSON object per line, in the spirit of a HAR
+    log: ``page`` entries store what a ``Fetcher`` returned for a URL (the
+    rendered markup for browser fetchers, with captured subresources) and
+    ``response`` entries store raw HTTP exchanges made by the build's
+    client, such as asset downloads. Bodies are stored once per content
+    under ``bodies/<sha256>``. When a URL was recorded twice, the later
+    entry wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries_path = os.path.join(path, ENTRIES_FILE)
+        self.bodies_path = os.path.join(path, BODIES_DIR)
+        self._pages = {}
+        self._responses = {}
+        self._file = None
+        # Recording happens on worker threads
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.entries_path)
+
+    def load(self):
+        self._pages = {}
+        self._responses = {}
+        with open(self.entries_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        return self
+
+    def _index(self, entry):
+        if entry["kind"] == "page":
+            for url in (entry["url"], entry["final_url"]):
+                self._pages[normalize_url(url)] = entry
+        else:
+            self._responses[(entry["method"], entry["url"])] = entry
+
+    def open(self):
+        """Open the archive for recording, keeping entries recorded before."""
+        os.makedirs(self.bodies_path, exist_ok=True)
+        if self.exists():
+            self.load()
+        self._file = open(self.entries_path, "a", encoding="utf-8")
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def add_body(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.bodies_path, digest)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def body(self, digest) -> bytes:
+        with open(os.path.join(self.bodies_path, digest), "rb") as f:
+            return f.read()
+
+    def _append(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, sort_keys=True) + "\n")
+            self._file.flush()
+            self._index(entry)
+
+    def record_page(self, url, result: FetchResult):
+        body = result.body if result.body is not None else result.html.encode("utf-8")
+        resources = {
+            resource_url: {"sha256": self.add_body(resource.body), "content_type": resource.content_type}
+            for resource_url, resource in result.resources.items()
+        }
+        self._append({
+            "kind": "page",
+            "url": url,
+            "final_url": result.url,
+            "status": result.status,
+            "headers": result.headers,
+            "content_type": result.content_type,
+            "html": result.is_html,
+            "sha256": self.add_body(body),
+            "resources": resources,
+            "recorded": time.time(),
+        })
+
+    def record_response(self, method, url, status, headers, body: bytes):
+        self._append({
+            "kind": "response",
+            "method": method,
+            "url": url,
+            "status": status,
+            "headers": headers,
+            "sha256": self.add_body(body),
+            "recorded": time.time(),
+        })
+
+    def page(self, url):
+        return self._pages.get(normalize_url(url))
+
+    def response(self, method, url):
+        return self._responses.get((method, str(url)))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests on to ``transport`` and records every exchange in ``archive``.
+
+    Bodies are stored as received, before any content decoding, so replaying
+    them through a client decodes them exactly like the original response.
+    """
+
+    def __init__(self, archive: FetchArchive, transport: httpx.AsyncBaseTransport):
+        self.archive = archive
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        response = await self.transport.handle_async_request(request)
+        try:
+            raw = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        headers = response.headers.multi_items()
+        await anyio.to_thread.run_sync(self.archive.record_response, request.method, str(request.url), response.status_code, headers, raw)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            stream=httpx.ByteStream(raw),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from the ``response`` entries of ``archive``; unknown URLs get a 404."""
+
+    def __init__(self, archive: FetchArchive):
+        self.archive = archive
+
+    async def handle_async_request(self, request):
+        entry = self.archive.response(request.method, request.url)
+        if entry is None:
+            return httpx.Response(404, headers={REPLAY_MISS_HEADER: "miss"}, request=request)
+        body = await anyio.to_thread.run_sync(self.archive.body, entry["sha256"])
+        return httpx.Response(entry["status"], headers=entry["headers"], stream=httpx.ByteStream(body), request=request)
+
+
+class RecordingFetcher(Fetcher):
+    """Wraps any ``Fetcher`` and records each page it returns in ``archive``."""
+
+    def __init__(self, fetcher: Fetcher, archive: FetchArchive):
+        self.fetcher = fetcher
+        self.archive = archive
+
+    @property
+    def revalidates(self):
+        return self.fetcher.revalidates
+
+    async def fetch(self, url: str, headers=None) -> FetchResult:
+        result = await (self.fetcher.fetch(url, headers=headers) if headers else self.fetcher.fetch(url))
+        # Nothing to record for a 304 or a file too large to keep; an earlier entry stays in place
+        if result.status != 304 and (result.is_html or result.body is not None):
+            await anyio.to_thread.run_sync(self.archive.record_page, url, result)
+        return result
+
+    async def aclose(self):
+        await self.fetcher.aclose()
+
+
+class ReplayFetcher(Fetcher):
+    """Serves pages recorded in ``archive`` without touching the network."""
+
+    def __init__(self, archive: FetchArchive):
+        self.archive = archive
+
+    async def fetch(self, url: str) -> FetchResult:
+        entry = self.archive.page(url)
+        if entry is None:
+            # Fails like a missing page, so the crawl does not retry it
+            request = httpx.Request("GET", url)
+            response = httpx.Response(404, headers={REPLAY_MISS_HEADER: "miss"}, request=request)
+            raise httpx.HTTPStatusError(f"Not in archive: {url}", request=request, response=response)
+        return await anyio.to_thread.run_sync(self._load, entry)
+
+    def _load(self, entry):
+        body = self.archive.body(entry["sha256"])
+        resources = {
+            resource_url: CapturedResource(resource_url, self.archive.body(info["sha256"]), info["content_type"])
+            for resource_url, info in entry["resources"].items()
+        }
+        return FetchResult(
+            entry["final_url"],
+            body.decode("utf-8") if entry["html"] else "",
+            resources=resources,
+            status=entry["status"],
+            headers=entry["headers"],
+            content_type=entry["content_type"],
+            size=len(body),
+            body=None if entry["html"] else body,
+        )
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+from bs4 import BeautifulSoup
+from .base import Fetcher, FetchResult
+from ..utils.url import normalize_url
+
+STATIC = "static"
+RENDER = "render"
+
+# Mount points of common client-side frameworks
+SPA_ROOT_SELECTORS = ["#root", "#app", "#__next", "#__nuxt", "#svelte", "[ng-app]", "[data-reactroot]", "app-root"]
+NOSCRIPT_WARNING = re.compile(r"(enable|requires?|turn on)\s+javascript|javascript\s+(is\s+)?(required|disabled)", re.I)
+# Pages with less visible text than this are considered empty shells
+MIN_TEXT_LENGTH = 200
+
+
+def looks_like_spa_shell(html: str) -> bool:
+    """Heuristically detect pages whose content only appears after JavaScript runs."""
+    soup = BeautifulSoup(html, "lxml")
+    body = soup.body
+    if body is None:
+        return True
+
+    noscript_text = " ".join(n.get_text(" ", strip=True) for n in body.find_all("noscript"))
+    for tag in body.find_all(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    text = body.get_text(" ", strip=True)
+
+    if len(text) < MIN_TEXT_LENGTH:
+        return True
+
+    for selector in SPA_ROOT_SELECTORS:
+        root = body.select_one(selector)
+        if root is not None and len(root.get_text(" ", strip=True)) < MIN_TEXT_LENGTH:
+            return True
+
+    has_headings = body.find(["h1", "h2", "h3"]) is not None
+    if NOSCRIPT_WARNING.search(noscript_text) and not has_headings:
+        return True
+
+    return False
+
+
+class FetchModeRegistry:
+    """Remembers per URL whether a static fetch was enough, optionally persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.modes = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.modes = json.load(f)
+            except (OSError, ValueError):
+                self.modes = {}
+
+    def get(self, url):
+        return self.modes.get(normalize_url(url))
+
+    def set(self, url, mode):
+        self.modes[normalize_url(url)] = mode
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.modes, f, indent=1, sort_keys=True)
+
+
+class AutoFetcher(Fetcher):
+    """Fetch statically first and re-render through ``renderer`` only pages that need JavaScript.
+
+    The mode chosen for each URL is recorded in ``registry`` so later runs go
+    straight to the right fetcher without probing.
+    """
+
+    def __init__(self, static_fetcher: Fetcher, renderer: Fetcher, registry: FetchModeRegistry = None):
+        self.static_fetcher = static_fetcher
+        self.renderer = renderer
+        self.registry = registry or FetchModeRegistry()
+
+    @property
+    def revalidates(self):
+        return self.static_fetcher.revalidates
+
+    async def fetch(self, url: str, headers=None) -> FetchResult:
+        mode = self.registry.get(url)
+        # Hash-routed pages only exist client-side
+        if mode is None and "#" in normalize_url(url):
+            mode = RENDER
+            self.registry.set(url, RENDER)
+        if mode == RENDER:
+            if headers:
+                # The renderer cannot send validators; only render pages that changed
+                result = await self.static_fetcher.fetch(url, headers=headers)
+                if result.status == 304:
+                    return result
+            return await self.renderer.fetch(url)
+
+        result = await (self.static_fetcher.fetch(url, headers=headers) if headers else self.static_fetcher.fetch(url))
+        if result.status == 304 or mode == STATIC or not result.is_html:
+            return result
+
+        if looks_like_spa_shell(result.html):
+            self.registry.set(url, RENDER)
+            return await self.renderer.fetch(url)
+        self.registry.set(url, STATIC)
+        return result
+
+    async def aclose(self):
+        try:
+            try:
+                await self.static_fetcher.aclose()
+            finally:
+                await self.renderer.aclose()
+        finally:
+            self.registry.save()
@@ -1,12 +1,83 @@
 from abc import ABC, abstractmethod
 
+# Responses handled as documentation pages; anything else is saved as a file
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def parse_content_type(value: str) -> str:
+    """The lowercase media type of a ``Content-Type`` header, without parameters."""
+    return (value or "").split(";")[0].strip().lower()
+
+
+class CapturedResource:
+    """A subresource body captured while rendering a page."""
+
+    def __init__(self, url: str, body: bytes, content_type: str = ""):
+        self.url = url
+        self.body = body
+        self.content_type = content_type
+
+
+class FetchTimings:
+    """Seconds spent in the phases of a fetch; None where the fetcher cannot tell.
+
+    ``connect`` includes the TLS handshake and is 0 on a reused connection.
+    ``ttfb`` and ``total`` are measured from the start of the request; for
+    renderers ``total`` includes rendering the page.
+    """
+
+    def __init__(self, dns=None, connect=None, ttfb=None, total=None):
+        self.dns = dns
+        self.connect = connect
+        self.ttfb = ttfb
+        self.total = total
+
+    def as_dict(self):
+        return {"dns": self.dns, "connect": self.connect, "ttfb": self.ttfb, "total": self.total}
+
+
 class FetchResult:
-    def __init__(self, url: str, html: str):
+    def __init__(self, url: str, html: str, resources=None, status: int = 200, headers=None,
+                 content_type: str = None, size: int = None, timings: FetchTimings = None, body: bytes = None):
         self.url = url
         self.html = html
+        # Absolute URL -> CapturedResource, saved by the asset stage instead of downloading again
+        self.resources = resources or {}
+        self.status = status
+        # Response headers with lowercase names, when the fetcher exposes them
+        self.headers = headers or {}
+        self.content_type = content_type or parse_content_type(self.headers.get("content-type", "")) or "text/html"
+        # Raw response bytes of non-HTML responses, whose ``html`` is empty
+        self.body = body
+        self._size = size
+        self.timings = timings or FetchTimings()
+
+    @property
+    def is_html(self) -> bool:
+        return self.content_type in HTML_CONTENT_TYPES
+
+    @property
+    def size(self) -> int:
+        """Bytes of the response body (of the rendered page for renderers)."""
+        if self._size is None:
+            self._size = len(self.body) if self.body is not None else len(self.html.encode())
+        return self._size
 
 
 class Fetcher(ABC):
+    # True if ``fetch`` accepts conditional request ``headers`` and reports a 304 in ``FetchResult.status``
+    revalidates = False
+
     @abstractmethod
     async def fetch(self, url: str) -> FetchResult:
         pass
+
+    async def aclose(self):
+        """Release long-lived resources such as connections or browsers."""
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,84 @@
+import httpx
+from contextlib import asynccontextmanager
+from ..crawl.scheduler import HostScheduler
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support for httpx is optional
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClientPool:
+    """A long-lived ``httpx.AsyncClient`` shared by page, asset and icon fetches of a build.
+
+    Connections are kept alive and reused across requests, HTTP/2 is used
+    when the ``h2`` package is installed, and every request goes through the
+    ``HostScheduler`` of the build, which rate-limits each host and adapts
+    its concurrency up to ``per_host_limit``. The client is created on first
+    use; use the pool as an async context manager (or call ``aclose``) to
+    release it.
+    """
+
+    def __init__(self, http2=True, max_connections=100, max_keepalive_connections=20,
+                 keepalive_expiry=30.0, per_host_limit=8, timeout=5.0, scheduler=None, transport=None):
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        # Replaces the network, e.g. to record or replay a build
+        self.transport = transport
+        self._client = None
+        self.scheduler = scheduler or HostScheduler(max_concurrency=per_host_limit)
+        if self.scheduler.robots_fetcher is None:
+            self.scheduler.robots_fetcher = self._fetch_robots
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    def default_transport(self) -> httpx.AsyncHTTPTransport:
+        """A network transport with the pool's settings, for wrapping in ``transport``."""
+        return httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+
+    async def _fetch_robots(self, url):
+        # Bypasses the scheduler, which asks for it before the first request to a host
+        r = await self.client.get(url, timeout=self.timeout)
+        return r.text if r.status_code == 200 else None
+
+    async def get(self, url, **kwargs) -> httpx.Response:
+        async with self.scheduler.slot(url):
+            r = await self.client.get(url, **kwargs)
+            self.scheduler.observe(url, r)
+            return r
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """Like ``httpx.AsyncClient.stream``; the host slot is held until the body is consumed."""
+        async with self.scheduler.slot(url):
+            async with self.client.stream(method, url, **kwargs) as response:
+                self.scheduler.observe(url, response)
+                yield response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -1,10 +1,104 @@
-import httpx
-from .base import Fetcher, FetchResult
+import time
+from .base import Fetcher, FetchResult, FetchTimings, HTML_CONTENT_TYPES, parse_content_type
+from .http_client import HttpClientPool
+
+# Non-HTML bodies larger than this are left for the caller to stream to disk
+DEFAULT_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+
+class _TraceTimer:
+    """Collects request phase timings from httpcore's ``trace`` extension.
+
+    Timings start at the first traced event, so time spent waiting for a
+    slot in the scheduler is not counted. Name resolution happens inside
+    the TCP connect and cannot be told apart.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.start = None
+
+    async def __call__(self, name, info):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        # The last occurrence wins, so redirects report the final hop
+        self.events[name.split(".", 1)[-1]] = now
+
+    def _duration(self, phase):
+        started = self.events.get(f"{phase}.started")
+        complete = self.events.get(f"{phase}.complete")
+        if started is None or complete is None:
+            return 0.0
+        return complete - started
+
+    def timings(self):
+        if self.start is None:
+            return FetchTimings()
+        headers = self.events.get("receive_response_headers.complete")
+        return FetchTimings(
+            connect=self._duration("connect_tcp") + self._duration("start_tls"),
+            ttfb=headers - self.start if headers is not None else None,
+            total=time.perf_counter() - self.start,
+        )
 
 
 class HttpxFetcher(Fetcher):
-    async def fetch(self, url: str) -> FetchResult:
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            r = await client.get(url, timeout=15)
-            r.raise_for_status()
-            return FetchResult(str(r.url), r.text)
+    """Fetches pages over HTTP without rendering them.
+
+    Bodies of non-HTML responses (PDFs, archives) are kept in memory up to
+    ``max_file_bytes``; larger ones are not read and come back with
+    ``body`` set to None, for the caller to stream to disk instead.
+    """
+
+    revalidates = True
+
+    def __init__(self, pool: HttpClientPool = None, max_file_bytes=DEFAULT_MAX_FILE_BYTES):
+        # A pool passed in is shared with the rest of the build and closed by its owner
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else HttpClientPool()
+        self.max_file_bytes = max_file_bytes
+
+    async def fetch(self, url: str, headers=None) -> FetchResult:
+        timer = _TraceTimer()
+        async with self.pool.stream("GET", url, headers=headers, timeout=15, extensions={"trace": timer}) as r:
+            if r.status_code == 304:
+                return FetchResult(str(r.url), "", status=304, headers=dict(r.headers.items()), size=0, timings=timer.timings())
+            if not r.is_success:
+                await r.aread()
+                r.raise_for_status()
+            content_type = parse_content_type(r.headers.get("content-type", ""))
+            is_html = not content_type or content_type in HTML_CONTENT_TYPES
+            if is_html:
+                await r.aread()
+                body, size = None, len(r.content)
+            else:
+                body, size = await self._read_file(r)
+            return FetchResult(
+                str(r.url),
+                r.text if is_html else "",
+                status=r.status_code,
+                headers=dict(r.headers.items()),
+                content_type=content_type or None,
+                size=size,
+                timings=timer.timings(),
+                body=body,
+            )
+
+    async def _read_file(self, r):
+        """Return ``(body, size)``, with no body once ``max_file_bytes`` is exceeded."""
+        size = int(r.headers.get("content-length") or 0)
+        if self.max_file_bytes is not None and size > self.max_file_bytes:
+            return None, size
+        chunks = []
+        size = 0
+        async for chunk in r.aiter_bytes():
+            size += len(chunk)
+            if self.max_file_bytes is not None and size > self.max_file_bytes:
+                return None, size
+            chunks.append(chunk)
+        return b"".join(chunks), size
+
+    async def aclose(self):
+        if self._owns_pool:
+            await self.pool.aclose()
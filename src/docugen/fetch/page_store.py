@@ -0,0 +1,80 @@
+import copy
+import time
+from .base import Fetcher, FetchResult
+from ..utils.url import normalize_url
+
+
+class StoredPage:
+    def __init__(self, result: FetchResult, fetched_at: float, keys):
+        self.result = result
+        self.fetched_at = fetched_at
+        self.keys = keys
+
+
+class PageStore:
+    """In-memory store of pages fetched during ``scan``, for reuse by ``generate``.
+
+    Pages are keyed by the normalized requested URL and the normalized final
+    URL, so a redirected page is found under either spelling. Subresources
+    captured by a renderer are not kept, to bound memory over a whole scan.
+    """
+
+    def __init__(self):
+        self._pages = {}
+
+    def __len__(self):
+        return len({id(page) for page in self._pages.values()})
+
+    def put(self, url, result: FetchResult, fetched_at=None):
+        keys = {normalize_url(url), normalize_url(result.url)}
+        if result.resources:
+            result = copy.copy(result)
+            result.resources = {}
+        page = StoredPage(result, fetched_at if fetched_at is not None else time.time(), keys)
+        for key in keys:
+            self._pages[key] = page
+
+    def get(self, url, max_age=None):
+        """Return the stored ``FetchResult`` for ``url`` if it is younger than ``max_age`` seconds."""
+        page = self._pages.get(normalize_url(url))
+        if page is None:
+            return None
+        if max_age is not None and time.time() - page.fetched_at > max_age:
+            return None
+        return page.result
+
+    def pop(self, url, max_age=None):
+        """Like ``get`` but releases the page; stale entries are dropped as well."""
+        page = self._pages.get(normalize_url(url))
+        if page is None:
+            return None
+        for key in page.keys:
+            if self._pages.get(key) is page:
+                del self._pages[key]
+        if max_age is not None and time.time() - page.fetched_at > max_age:
+            return None
+        return page.result
+
+
+class StoredPageFetcher(Fetcher):
+    """Serve pages from a ``PageStore`` and fall back to ``fetcher`` for missing or stale ones."""
+
+    def __init__(self, fetcher: Fetcher, store: PageStore, max_age=None):
+        self.fetcher = fetcher
+        self.store = store
+        self.max_age = max_age
+
+    @property
+    def revalidates(self):
+        return self.fetcher.revalidates
+
+    async def fetch(self, url: str, headers=None) -> FetchResult:
+        result = self.store.pop(url, self.max_age)
+        if result is not None:
+            return result
+        if headers:
+            return await self.fetcher.fetch(url, headers=headers)
+        return await self.fetcher.fetch(url)
+
+    async def aclose(self):
+        await self.fetcher.aclose()
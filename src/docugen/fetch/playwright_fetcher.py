@@ -1,312 +1,479 @@
-from .base import Fetcher, FetchResult
+from .base import Fetcher, FetchResult, FetchTimings, CapturedResource, HTML_CONTENT_TYPES, parse_content_type
+from .readiness import ReadinessPolicy, WAIT_FOR_QUIET_JS, SCROLL_JS
 import anyio
+import time
+
+# Subresources whose bodies are handed to the asset stage instead of being downloaded again
+CAPTURED_RESOURCE_TYPES = {"stylesheet", "script", "image", "font"}
+DEFAULT_MAX_CAPTURED_RESOURCE_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_CAPTURED_PAGE_BYTES = 50 * 1024 * 1024
+
+# Serves WebAssembly requests from the files referenced by <link data-wasm-url> elements,
+# which the asset stage points at local copies. XHR is used because fetch() refuses file:// URLs.
+WASM_SHIM_JS = """
+(function() {
+    const baseName = (url) => url.split('/').pop().split('?')[0];
+    const localWasm = (url) => {
+        const absoluteUrl = new URL(url, window.location.href).href;
+        const links = Array.from(document.querySelectorAll('link[data-wasm-url]'));
+        // Try exact match first, then try matching by filename
+        const link = links.find(l => l.dataset.wasmUrl === absoluteUrl)
+            || links.find(l => baseName(l.dataset.wasmUrl) === baseName(absoluteUrl));
+        return link ? link.getAttribute('href') : null;
+    };
+    const load = (path) => new Promise((resolve, reject) => {
+        const xhr = new XMLHttpRequest();
+        xhr.open('GET', path);
+        xhr.responseType = 'arraybuffer';
+        xhr.onload = () => (xhr.status === 200 || xhr.status === 0) ? resolve(xhr.response) : reject(new Error(xhr.statusText));
+        xhr.onerror = () => reject(new Error('Failed to load ' + path));
+        xhr.send();
+    });
+
+    const originalFetch = window.fetch;
+    window.fetch = async function(url, options) {
+        const local = localWasm(url instanceof Request ? url.url : url.toString());
+        if (local) {
+            return new Response(await load(local), {
+                status: 200,
+                statusText: 'OK',
+                headers: { 'Content-Type': 'application/wasm' }
+            });
+        }
+        return originalFetch(url, options);
+    };
+
+    // Also shim instantiateStreaming
+    const originalInstantiateStreaming = WebAssembly.instantiateStreaming;
+    WebAssembly.instantiateStreaming = async function(source, importObject) {
+        try {
+            return await originalInstantiateStreaming(source, importObject);
+        } catch (e) {
+            if (source instanceof Promise || source instanceof Response) {
+                const response = (source instanceof Promise) ? await source : source;
+                const buffer = await response.arrayBuffer();
+                return WebAssembly.instantiate(buffer, importObject);
+            }
+            throw e;
+        }
+    };
+})();
+"""
+
+
+def _response_timings(response, start):
+    """Phase timings of a navigation from the browser's resource timing (ms, -1 if unknown)."""
+    try:
+        timing = response.request.timing if response is not None else {}
+    except Exception:
+        timing = {}
+
+    def span(begin, end):
+        b, e = timing.get(begin, -1), timing.get(end, -1)
+        return (e - b) / 1000 if b >= 0 and e >= 0 else None
+
+    response_start = timing.get("responseStart", -1)
+    return FetchTimings(
+        dns=span("domainLookupStart", "domainLookupEnd"),
+        connect=span("connectStart", "connectEnd"),
+        ttfb=response_start / 1000 if response_start >= 0 else None,
+        total=time.perf_counter() - start,
+    )
+
+
+class _PooledPage:
+    """A browser context with a single page, reused across fetches until recycled."""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+    def is_healthy(self):
+        try:
+            return not self.page.is_closed()
+        except Exception:
+            return False
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
 
 class PlaywrightFetcher(Fetcher):
+    """Render pages with a persistent Chromium instance.
+
+    The browser is launched on first use and kept for the lifetime of the
+    fetcher. Up to ``concurrency`` pages render at once, each in its own
+    reusable context; a context is recycled after ``recycle_after`` fetches,
+    after an error, or when it is found closed, and the browser is relaunched
+    if it disconnects. Call ``aclose`` (or use the fetcher as an async
+    context manager) to shut everything down.
+
+    Instead of fixed sleeps, rendering waits for the DOM to go quiet as
+    defined by the ``ReadinessPolicy`` budget for the URL's site.
+
+    Bodies of stylesheets, scripts, images and fonts loaded by the page are
+    returned in ``FetchResult.resources`` (when ``capture_resources`` is set)
+    so the asset stage does not download them again; single bodies above
+    ``max_resource_bytes`` and anything beyond ``max_page_bytes`` per page
+    are left for the asset stage to fetch.
+    """
+
+    def __init__(self, concurrency=1, recycle_after=50, readiness=None, capture_resources=True,
+                 max_resource_bytes=DEFAULT_MAX_CAPTURED_RESOURCE_BYTES, max_page_bytes=DEFAULT_MAX_CAPTURED_PAGE_BYTES):
+        self.concurrency = max(1, concurrency)
+        self.recycle_after = recycle_after
+        self.readiness = readiness or ReadinessPolicy()
+        self.capture_resources = capture_resources
+        self.max_resource_bytes = max_resource_bytes
+        self.max_page_bytes = max_page_bytes
+        self._playwright = None
+        self._browser = None
+        self._idle_pages = []
+        self._lock = anyio.Lock()
+        self._limiter = anyio.CapacityLimiter(self.concurrency)
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self._browser is not None:
+                if self._browser.is_connected():
+                    return self._browser
+                # The browser crashed or was closed; its contexts are gone with it
+                self._idle_pages.clear()
+                self._browser = None
+
+            if self._playwright is None:
+                try:
+                    from playwright.async_api import async_playwright
+                except ImportError:
+                    raise Exception("Playwright is not installed. Please run 'pip install playwright'.")
+                self._playwright = await async_playwright().start()
+
+            try:
+                self._browser = await self._playwright.chromium.launch()
+            except Exception as e:
+                if "playwright install" in str(e).lower():
+                    raise Exception("Playwright browsers not installed. Please run 'playwright install chromium'.")
+                raise e
+            return self._browser
+
+    async def _acquire_page(self):
+        browser = await self._ensure_browser()
+        while self._idle_pages:
+            pooled = self._idle_pages.pop()
+            if pooled.is_healthy():
+                return pooled
+            await pooled.close()
+        context = await browser.new_context()
+        page = await context.new_page()
+        return _PooledPage(context, page)
+
+    async def _release_page(self, pooled, healthy):
+        pooled.uses += 1
+        if healthy and pooled.uses < self.recycle_after and pooled.is_healthy():
+            try:
+                # Drop the rendered document so idle pages don't hold on to memory
+                await pooled.page.goto("about:blank")
+                self._idle_pages.append(pooled)
+                return
+            except Exception:
+                pass
+        await pooled.close()
+
     async def fetch(self, url: str) -> FetchResult:
         try:
-            from playwright.async_api import async_playwright
-        except ImportError:
-            raise Exception("Playwright is not installed. Please run 'pip install playwright'.")
-            
-        try:
-            async with async_playwright() as pw:
-                browser = None
-                context = None
+            async with self._limiter:
+                pooled = await self._acquire_page()
+                healthy = False
                 try:
+                    result = await self._render(pooled.page, url)
+                    healthy = True
+                    return result
+                finally:
                     try:
-                        browser = await pw.chromium.launch()
-                    except Exception as e:
-                        if "playwright install" in str(e).lower():
-                            raise Exception("Playwright browsers not installed. Please run 'playwright install chromium'.")
-                        raise e
-                    
-                    context = await browser.new_context()
-                    page = await context.new_page()
-                    
-                    # Store WASM binaries found during navigation
-                    wasm_binaries = {}
-
-                    async def intercept_route(route):
-                        try:
-                            try:
-                                # response = await route.fetch()
-                                # Using fetch() might be hanging if the resource is huge or the server is slow
-                                # Let's only continue if it's not a WASM file we want to intercept
-                                if ".wasm" in route.request.url.split('?')[0]:
-                                    response = await route.fetch()
-                                    body = await response.body()
-                                    # Store with absolute URL
-                                    wasm_binaries[route.request.url] = body
-                                    
-                                    # If the server returned wrong MIME type, fix it for the browser
-                                    headers = response.headers.copy()
-                                    if "application/wasm" not in headers.get("content-type", "").lower():
-                                        headers["content-type"] = "application/wasm"
-                                        try:
-                                            await route.fulfill(
-                                                response=response,
-                                                headers=headers,
-                                                body=body
-                                            )
-                                            return
-                                        except Exception:
-                                            pass
-                                else:
-                                    await route.continue_()
-                                    return
-                            except Exception:
-                                # Page or context might have closed
-                                try:
-                                    await route.continue_()
-                                except:
-                                    pass
-                                return
-                        except Exception:
-                            pass
-
-                    await page.route("**/*", intercept_route)
+                        # Unroute all to stop any pending interceptors
+                        await pooled.page.unroute("**/*")
+                    except Exception:
+                        healthy = False
+                    await self._release_page(pooled, healthy)
+        except Exception as e:
+            raise Exception(f"Playwright error: {e}")
+
+    async def aclose(self):
+        async with self._lock:
+            for pooled in self._idle_pages:
+                await pooled.close()
+            self._idle_pages.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _wait_until_quiet(self, page, budget):
+        try:
+            await page.evaluate(WAIT_FOR_QUIET_JS, {"quietMs": budget.quiet_ms, "maxWaitMs": budget.max_wait_ms})
+        except Exception:
+            # Navigation during the wait destroys the execution context; settle on the new document
+            await page.wait_for_load_state("load")
+
+    def _should_capture(self, response):
+        request = response.request
+        return (
+            self.capture_resources
+            and request.method == "GET"
+            and request.resource_type in CAPTURED_RESOURCE_TYPES
+            and response.status == 200
+        )
+
+    async def _collect_resources(self, responses):
+        """Read the bodies of captured responses, keyed by final and originally requested URL."""
+        resources = {}
+        total = 0
+        for response in responses:
+            try:
+                declared_size = int(response.headers.get("content-length") or 0)
+                if declared_size > self.max_resource_bytes:
+                    continue
+                body = await response.body()
+            except Exception:
+                # Evicted or aborted responses are simply downloaded by the asset stage
+                continue
+            if len(body) > self.max_resource_bytes or total + len(body) > self.max_page_bytes:
+                continue
+            total += len(body)
+            resource = CapturedResource(response.url, body, response.headers.get("content-type", ""))
+            resources[response.url] = resource
+            request = response.request
+            while request.redirected_from is not None:
+                request = request.redirected_from
+            resources[request.url] = resource
+        return resources
+
+    async def _render(self, page, url):
+        responses = []
 
+        def on_response(response):
+            if self._should_capture(response):
+                responses.append(response)
+
+        page.on("response", on_response)
+        try:
+            return await self._render_page(page, url, responses)
+        finally:
+            # Pages are pooled; do not leak the listener into the next fetch
+            page.remove_listener("response", on_response)
+
+    async def _render_page(self, page, url, responses):
+        # Store WASM binaries found during navigation
+        wasm_binaries = {}
+
+        async def intercept_route(route):
+            try:
+                try:
+                    # response = await route.fetch()
+                    # Using fetch() might be hanging if the resource is huge or the server is slow
+                    # Let's only continue if it's not a WASM file we want to intercept
+                    if ".wasm" in route.request.url.split('?')[0]:
+                        response = await route.fetch()
+                        body = await response.body()
+                        # Store with absolute URL
+                        wasm_binaries[route.request.url] = body
+                        
+                        # If the server returned wrong MIME type, fix it for the browser
+                        headers = response.headers.copy()
+                        if "application/wasm" not in headers.get("content-type", "").lower():
+                            headers["content-type"] = "application/wasm"
+                        await route.fulfill(
+                            response=response,
+                            headers=headers,
+                            body=body
+                        )
+                        return
+                    else:
+                        await route.continue_()
+                        return
+                except Exception:
+                    # Page or context might have closed
                     try:
-                        # Using a shorter timeout for navigation that might be a download
-                        await page.goto(url, wait_until="networkidle", timeout=30000)
-                    except Exception as e:
-                        if "Download is starting" in str(e):
-                            return FetchResult(url, f"<html><body>Download started for {url}</body></html>")
-                        raise e
-                    
-                    # Wait for any JS to finish rendering content
-                    await page.wait_for_timeout(5000)
+                        await route.continue_()
+                    except:
+                        pass
+                    return
+            except Exception:
+                pass
 
-                    # For SPA sites like Three.js, ensure the hash change actually loads content
-                    # and if there are examples, wait for them to load.
-                    if "#" in url:
-                        # Sometimes we need to force a re-navigation or wait longer for hash routes
-                        await page.wait_for_load_state("networkidle")
-                        await page.wait_for_timeout(2000)
+        await page.route("**/*", intercept_route)
 
-                    # Try to expand any common "optional" sidebars or TOCs
-                    await page.evaluate("""
-                        () => {
-                            const patterns = [
-                                /table of contents/i,
-                                /on this page/i,
-                                /menu/i,
-                                /expand/i,
-                                /sidebar/i
-                            ];
-                            const buttons = Array.from(document.querySelectorAll('button, a, .button, [role="button"]'));
-                            for (const btn of buttons) {
-                                const text = (btn.innerText || btn.title || btn.ariaLabel || "").trim();
-                                if (patterns.some(p => p.test(text))) {
-                                    // Check if it's likely collapsed (common patterns)
-                                    const isCollapsed = 
-                                        btn.getAttribute('aria-expanded') === 'false' || 
-                                        btn.classList.contains('collapsed') ||
-                                        btn.classList.contains('closed');
-                                    
-                                    if (isCollapsed) {
-                                        try {
-                                            btn.click();
-                                            console.log("Clicked to expand: " + text);
-                                        } catch (e) {}
-                                    }
-                                }
-                            }
+        budget = self.readiness.for_url(url)
+
+        start = time.perf_counter()
+        try:
+            # Using a shorter timeout for navigation that might be a download
+            response = await page.goto(url, wait_until="load", timeout=30000)
+        except Exception as e:
+            if "Download is starting" in str(e):
+                # The browser will not display it; fetch the file itself for the asset stage
+                download = await page.context.request.get(url)
+                body = await download.body()
+                return FetchResult(
+                    download.url, "", status=download.status, headers=download.headers,
+                    content_type=parse_content_type(download.headers.get("content-type", "")) or "application/octet-stream",
+                    size=len(body), timings=FetchTimings(total=time.perf_counter() - start), body=body,
+                )
+            raise e
+
+        if response is not None and response.status < 400:
+            content_type = parse_content_type(response.headers.get("content-type", ""))
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                # Rendered JSON, text or PDF viewers are not documentation pages
+                body = await response.body()
+                return FetchResult(
+                    response.url, "", status=response.status, headers=response.headers,
+                    content_type=content_type, size=len(body), timings=_response_timings(response, start), body=body,
+                )
+        
+        # Wait until JS (including hash routers on SPA sites like Three.js) stops changing the DOM
+        await self._wait_until_quiet(page, budget)
+
+        # Try to expand any common "optional" sidebars or TOCs
+        expanded = await page.evaluate("""
+            () => {
+                const patterns = [
+                    /table of contents/i,
+                    /on this page/i,
+                    /menu/i,
+                    /expand/i,
+                    /sidebar/i
+                ];
+                let clicked = 0;
+                const buttons = Array.from(document.querySelectorAll('button, a, .button, [role="button"]'));
+                for (const btn of buttons) {
+                    const text = (btn.innerText || btn.title || btn.ariaLabel || "").trim();
+                    if (patterns.some(p => p.test(text))) {
+                        // Check if it's likely collapsed (common patterns)
+                        const isCollapsed = 
+                            btn.getAttribute('aria-expanded') === 'false' || 
+                            btn.classList.contains('collapsed') ||
+                            btn.classList.contains('closed');
+                        
+                        if (isCollapsed) {
+                            try {
+                                btn.click();
+                                clicked++;
+                                console.log("Clicked to expand: " + text);
+                            } catch (e) {}
                         }
-                    """)
+                    }
+                }
+                return clicked;
+            }
+        """)
+        
+        if expanded:
+            await self._wait_until_quiet(page, budget)
+        
+        # Scroll through the page to trigger lazy-loading content
+        if budget.scroll:
+            await page.evaluate(SCROLL_JS, budget.max_scroll_px)
+            await self._wait_until_quiet(page, budget)
+
+        # Try to extract content from iframes and inject it into the main page.
+        # Many documentation sites use iframes for the main content (e.g. Three.js).
+        for frame in page.frames:
+            if frame == page.main_frame:
+                continue
+            
+            # Heuristic: skip very small iframes (likely ads, trackers, or widgets)
+            # or iframes without a name/id unless they look like content
+            try:
+                frame_name = frame.name.lower()
+            except:
+                frame_name = ""
+                
+            if not frame_name and frame.frame_element:
+                try:
+                    frame_name = (await frame.frame_element.get_attribute("id") or "").lower()
+                except:
+                    pass
+
+            # Common names for content iframes
+            content_names = ["viewer", "content", "main", "frame", "article"]
+            is_likely_content = any(name in frame_name for name in content_names)
+            
+            if is_likely_content or not frame_name:
+                try:
+                    # Wait for some content to be present in the iframe
+                    try:
+                        async with anyio.fail_after(5):
+                            await frame.wait_for_load_state("networkidle", timeout=5000)
+                    except Exception:
+                        pass
                     
-                    # Wait a bit after potential expansion
-                    await page.wait_for_timeout(1000)
+                    try:
+                        async with anyio.fail_after(5):
+                            iframe_content = await frame.content()
+                    except Exception:
+                        continue
                     
-                    # Scroll from top to bottom to trigger lazy-loading content
+                    # Inject iframe body into the main page so it's crawlable/indexable
                     await page.evaluate("""
-                        async () => {
-                            await new Promise((resolve) => {
-                                let totalHeight = 0;
-                                let distance = 100;
-                                let timer = setInterval(() => {
-                                    let scrollHeight = document.body.scrollHeight;
-                                    window.scrollBy(0, distance);
-                                    totalHeight += distance;
-
-                                    if(totalHeight >= scrollHeight || totalHeight > 10000){ // Cap scrolling
-                                        clearInterval(timer);
-                                        resolve();
-                                    }
-                                }, 100);
-                            });
-                            window.scrollTo(0, 0);
+                        (content, frameId) => {
+                            const id = 'iframe-content-injected-' + frameId;
+                            if (!document.getElementById(id)) {
+                                const div = document.createElement('div');
+                                div.id = id;
+                                div.style.display = 'none';
+                                div.innerHTML = content;
+                                document.body.appendChild(div);
+                            }
                         }
-                    """)
+                    """, iframe_content, frame_name or "unnamed")
+                except:
+                    pass
 
-                    # Try to extract content from iframes and inject it into the main page.
-                    # Many documentation sites use iframes for the main content (e.g. Three.js).
-                    for frame in page.frames:
-                        if frame == page.main_frame:
-                            continue
-                        
-                        # Heuristic: skip very small iframes (likely ads, trackers, or widgets)
-                        # or iframes without a name/id unless they look like content
-                        try:
-                            frame_name = frame.name.lower()
-                        except:
-                            frame_name = ""
-                            
-                        if not frame_name and frame.frame_element:
-                            try:
-                                frame_name = (await frame.frame_element.get_attribute("id") or "").lower()
-                            except:
-                                pass
-
-                        # Common names for content iframes
-                        content_names = ["viewer", "content", "main", "frame", "article"]
-                        is_likely_content = any(name in frame_name for name in content_names)
-                        
-                        if is_likely_content or not frame_name:
-                            try:
-                                # Wait for some content to be present in the iframe
-                                try:
-                                    async with anyio.fail_after(5):
-                                        await frame.wait_for_load_state("networkidle", timeout=5000)
-                                except Exception:
-                                    pass
-                                
-                                try:
-                                    async with anyio.fail_after(5):
-                                        iframe_content = await frame.content()
-                                except Exception:
-                                    continue
-                                
-                                # Inject iframe body into the main page so it's crawlable/indexable
-                                await page.evaluate("""
-                                    (content, frameId) => {
-                                        const id = 'iframe-content-injected-' + frameId;
-                                        if (!document.getElementById(id)) {
-                                            const div = document.createElement('div');
-                                            div.id = id;
-                                            div.style.display = 'none';
-                                            div.innerHTML = content;
-                                            document.body.appendChild(div);
-                                        }
-                                    }
-                                """, iframe_content, frame_name or "unnamed")
-                            except:
-                                pass
-
-                    # Wait for stability: check if the content size remains constant
-                    last_html_len = 0
-                    stable_count = 0
-                    max_stability_checks = 15
-                    for i in range(max_stability_checks):
-                        try:
-                            # Use a simpler/faster way to check stability if content() is slow
-                            current_len = await page.evaluate("() => document.documentElement.outerHTML.length")
-                            
-                            if current_len > 0 and current_len == last_html_len:
-                                stable_count += 1
-                            else:
-                                stable_count = 0
-                                last_html_len = current_len
-                            
-                            if stable_count >= 3:
-                                break
-                        except Exception:
-                            break
-                        
-                        await page.wait_for_timeout(1000)
-                    
-                    html = await page.content()
+        html = await page.content()
 
-                    # Embed collected WASM binaries into the HTML
-                    if wasm_binaries:
-                        import base64
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(html, "lxml")
-                        
-                        if not soup.body:
-                            # Fallback if no body
-                            body_tag = soup.new_tag("body")
-                            soup.append(body_tag)
-                        
-                        # Add a script for each WASM
-                        for wasm_url, wasm_body in wasm_binaries.items():
-                            wasm_b64 = base64.b64encode(wasm_body).decode('utf-8')
-                            wasm_script = soup.new_tag("script")
-                            wasm_script["type"] = "application/wasm-embedded"
-                            wasm_script["data-wasm-url"] = wasm_url
-                            wasm_script.string = wasm_b64
-                            soup.body.append(wasm_script)
-                        
-                        # Add the shim script
-                        shim_script = soup.new_tag("script")
-                        shim_script.string = """
-                        (function() {
-                            const originalFetch = window.fetch;
-                            window.fetch = async function(url, options) {
-                                const urlString = url.toString();
-                                const absoluteUrl = new URL(urlString, window.location.href).href;
-                                
-                                // Try exact match first, then try matching by filename
-                                let embedded = document.querySelector(`script[type="application/wasm-embedded"][data-wasm-url="${absoluteUrl}"]`);
-                                
-                                if (!embedded) {
-                                    const filename = urlString.split('/').pop().split('?')[0];
-                                    embedded = Array.from(document.querySelectorAll('script[type="application/wasm-embedded"]'))
-                                        .find(s => {
-                                            const storedUrl = s.getAttribute('data-wasm-url');
-                                            return storedUrl.split('/').pop().split('?')[0] === filename;
-                                        });
-                                }
-
-                                if (embedded) {
-                                    const binaryString = atob(embedded.textContent);
-                                    const bytes = new Uint8Array(binaryString.length);
-                                    for (let i = 0; i < binaryString.length; i++) {
-                                        bytes[i] = binaryString.charCodeAt(i);
-                                    }
-                                    return new Response(bytes, {
-                                        status: 200,
-                                        statusText: 'OK',
-                                        headers: { 'Content-Type': 'application/wasm' }
-                                    });
-                                }
-                                return originalFetch(url, options);
-                            };
-
-                            // Also shim instantiateStreaming
-                            const originalInstantiateStreaming = WebAssembly.instantiateStreaming;
-                            WebAssembly.instantiateStreaming = async function(source, importObject) {
-                                try {
-                                    return await originalInstantiateStreaming(source, importObject);
-                                } catch (e) {
-                                    if (source instanceof Promise || source instanceof Response) {
-                                        const response = (source instanceof Promise) ? await source : source;
-                                        const buffer = await response.arrayBuffer();
-                                        return WebAssembly.instantiate(buffer, importObject);
-                                    }
-                                    throw e;
-                                }
-                            };
-                        })();
-                        """
-                        # Insert shim at the beginning of head or body
-                        if soup.head:
-                            soup.head.insert(0, shim_script)
-                        else:
-                            soup.body.insert(0, shim_script)
-                        
-                        html = str(soup)
+        resources = await self._collect_resources(responses)
 
-                    return FetchResult(page.url, html)
-                finally:
-                    if context:
-                        try:
-                            # Unroute all to stop any pending interceptors
-                            await page.unroute("**/*")
-                            await context.close()
-                        except:
-                            pass
-                    if browser:
-                        await browser.close()
-        except Exception as e:
-            raise Exception(f"Playwright error: {e}")
+        # Hand collected WASM binaries to the asset stage and point the shim at them
+        if wasm_binaries:
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(html, "lxml")
+            
+            if not soup.body:
+                # Fallback if no body
+                body_tag = soup.new_tag("body")
+                soup.append(body_tag)
+            
+            # Reference each WASM file so it is saved and rewritten like any other asset
+            for wasm_url, wasm_body in wasm_binaries.items():
+                resources[wasm_url] = CapturedResource(wasm_url, wasm_body, "application/wasm")
+                wasm_link = soup.new_tag("link", rel="preload", href=wasm_url)
+                wasm_link["as"] = "fetch"
+                wasm_link["type"] = "application/wasm"
+                wasm_link["data-wasm-url"] = wasm_url
+                soup.body.append(wasm_link)
+            
+            # Add the shim script
+            shim_script = soup.new_tag("script")
+            shim_script.string = WASM_SHIM_JS
+            # Insert shim at the beginning of head or body
+            if soup.head:
+                soup.head.insert(0, shim_script)
+            else:
+                soup.body.insert(0, shim_script)
+            
+            html = str(soup)
+
+        status = response.status if response is not None else 200
+        headers = response.headers if response is not None else {}
+        return FetchResult(page.url, html, resources=resources, status=status, headers=headers,
+                           content_type="text/html", timings=_response_timings(response, start))
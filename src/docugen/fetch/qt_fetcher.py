@@ -1,8 +1,10 @@
+import time
 import anyio
 from PySide6.QtCore import QObject, Signal, Slot, Qt, QUrl, QTimer
 from PySide6.QtWebEngineCore import QWebEnginePage
 from PySide6.QtWidgets import QApplication
-from .base import Fetcher, FetchResult
+from .base import Fetcher, FetchResult, FetchTimings
+from .readiness import ReadinessPolicy, QUIET_FOR_JS, SCROLL_JS
 
 class QtFetchWorker(QObject):
     """
@@ -14,9 +16,10 @@ class QtFetchWorker(QObject):
     # Signal to return the result (html, url)
     fetch_finished = Signal(str, str)
 
-    def __init__(self):
+    def __init__(self, readiness=None):
         super().__init__()
         self._page = None
+        self._readiness = readiness or ReadinessPolicy()
         # Connect the trigger signal to the handler
         self.do_fetch.connect(self._handle_fetch)
 
@@ -27,71 +30,53 @@ class QtFetchWorker(QObject):
         
         # Internal state to track the current fetch
         self._current_url = url
-        self._last_html_len = 0
-        self._stable_count = 0
-        self._total_wait_time = 0
+        self._budget = self._readiness.for_url(url)
         
         def on_load_finished(ok):
             # Disconnect to avoid multiple calls if multiple loads happen
             self._page.loadFinished.disconnect(on_load_finished)
             if ok:
-                # Wait a bit more for any JS to finish rendering content
-                QTimer.singleShot(5000, self._start_scrolling)
+                # Wait for any JS to finish rendering content
+                self._wait_until_quiet(self._start_scrolling)
             else:
                 self.fetch_finished.emit("", self._current_url)
         
         self._page.loadFinished.connect(on_load_finished)
         self._page.load(QUrl(url))
 
-    def _start_scrolling(self):
-        # Scroll from top to bottom
-        self._page.runJavaScript("""
-            (async () => {
-                await new Promise((resolve) => {
-                    let totalHeight = 0;
-                    let distance = 100;
-                    let timer = setInterval(() => {
-                        let scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-                window.scrollTo(0, 0);
-            })();
-        """)
-        # Start polling for content stability
-        QTimer.singleShot(2000, self._poll_content) # Give it some time to start scrolling
+    def _wait_until_quiet(self, then):
+        # runJavaScript cannot await promises, so poll the MutationObserver timestamp instead
+        self._after_quiet = then
+        self._wait_started = time.monotonic()
+        self._poll_quiet()
 
-    def _poll_content(self):
-        self._page.toHtml(self._check_stability)
+    def _poll_quiet(self):
+        self._page.runJavaScript(QUIET_FOR_JS, 0, self._check_quiet)
 
-    def _check_stability(self, html):
-        current_len = len(html)
-        if current_len > 0 and current_len == self._last_html_len:
-            self._stable_count += 1
+    def _check_quiet(self, quiet_for):
+        elapsed_ms = (time.monotonic() - self._wait_started) * 1000
+        if (quiet_for or 0) >= self._budget.quiet_ms or elapsed_ms >= self._budget.max_wait_ms:
+            self._after_quiet()
         else:
-            self._stable_count = 0
-            self._last_html_len = current_len
+            QTimer.singleShot(100, self._poll_quiet)
 
-        self._total_wait_time += 500
-        
-        # If stable for 3 checks (1.5s) or reached max timeout (10s)
-        if (self._stable_count >= 3 and self._total_wait_time >= 2000) or self._total_wait_time >= 10000:
-            self.fetch_finished.emit(html, self._current_url)
-        else:
-            QTimer.singleShot(500, self._poll_content)
+    def _start_scrolling(self):
+        if not self._budget.scroll:
+            self._finish()
+            return
+        # Scroll through the page to trigger lazy-loading content
+        self._page.runJavaScript(f"({SCROLL_JS})({int(self._budget.max_scroll_px)});")
+        self._wait_until_quiet(self._finish)
+
+    def _finish(self):
+        self._page.toHtml(self._on_html)
 
     def _on_html(self, html):
         self.fetch_finished.emit(html, self._current_url)
 
 class QtFetcher(Fetcher):
-    def __init__(self):
-        self.worker = QtFetchWorker()
+    def __init__(self, readiness=None):
+        self.worker = QtFetchWorker(readiness)
         # Move worker to the main GUI thread
         main_thread = QApplication.instance().thread()
         self.worker.moveToThread(main_thread)
@@ -99,6 +84,7 @@ class QtFetcher(Fetcher):
     async def fetch(self, url: str) -> FetchResult:
         event = anyio.Event()
         result = {"html": None}
+        start = time.perf_counter()
         
         from anyio.from_thread import start_blocking_portal
         
@@ -123,7 +109,8 @@ class QtFetcher(Fetcher):
                 if not result["html"]:
                     raise Exception(f"Failed to fetch {url} using QtWebEngine (load error or empty result)")
                     
-                return FetchResult(url, result["html"])
+                # QtWebEngine exposes neither the response nor its timing phases
+                return FetchResult(url, result["html"], content_type="text/html", timings=FetchTimings(total=time.perf_counter() - start))
             finally:
                 # Always disconnect to clean up
                 self.worker.fetch_finished.disconnect(on_finished)
@@ -0,0 +1,106 @@
+import json
+from urllib.parse import urlparse
+from ..utils.url import clean_domain
+
+# Installs a MutationObserver that timestamps the latest DOM change. Safe to run repeatedly.
+INSTALL_OBSERVER_JS = """
+(() => {
+    if (!window.__docugenObserver) {
+        window.__docugenLastMutation = performance.now();
+        window.__docugenObserver = new MutationObserver(() => {
+            window.__docugenLastMutation = performance.now();
+        });
+        window.__docugenObserver.observe(document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+    }
+})();
+"""
+
+# Milliseconds since the last DOM mutation; for engines that cannot await promises (Qt).
+QUIET_FOR_JS = INSTALL_OBSERVER_JS + """
+(() => performance.now() - window.__docugenLastMutation)();
+"""
+
+# Resolves once the DOM has been quiet for quietMs, or after maxWaitMs at the latest.
+WAIT_FOR_QUIET_JS = """
+async ({quietMs, maxWaitMs}) => {
+""" + INSTALL_OBSERVER_JS + """
+    const start = performance.now();
+    return await new Promise((resolve) => {
+        const tick = () => {
+            const now = performance.now();
+            if (now - window.__docugenLastMutation >= quietMs || now - start >= maxWaitMs) {
+                resolve(now - start);
+            } else {
+                setTimeout(tick, Math.min(100, quietMs / 2));
+            }
+        };
+        tick();
+    });
+}
+"""
+
+# Scrolls a viewport at a time to trigger lazy loading, then returns to the top.
+SCROLL_JS = """
+async (maxScroll) => {
+    const step = Math.max(window.innerHeight, 400);
+    let position = 0;
+    while (position < document.body.scrollHeight && position < maxScroll) {
+        position += step;
+        window.scrollTo(0, position);
+        await new Promise((resolve) => requestAnimationFrame(() => setTimeout(resolve, 50)));
+    }
+    window.scrollTo(0, 0);
+}
+"""
+
+
+class ReadinessBudget:
+    """How long to wait for a rendered page to settle.
+
+    A page is ready once its DOM has had no mutations for ``quiet_ms``;
+    ``max_wait_ms`` caps every individual wait so busy pages (animations,
+    tickers) still finish. ``scroll`` enables scrolling through the page up
+    to ``max_scroll_px`` to trigger lazy-loaded content.
+    """
+
+    def __init__(self, quiet_ms=500, max_wait_ms=8000, scroll=True, max_scroll_px=10000):
+        self.quiet_ms = quiet_ms
+        self.max_wait_ms = max_wait_ms
+        self.scroll = scroll
+        self.max_scroll_px = max_scroll_px
+
+
+class ReadinessPolicy:
+    """Selects a ``ReadinessBudget`` per site, matching hosts and their subdomains."""
+
+    def __init__(self, default=None, sites=None):
+        self.default = default or ReadinessBudget()
+        self.sites = {clean_domain(host): budget for host, budget in (sites or {}).items()}
+
+    @classmethod
+    def load(cls, path):
+        """Read a policy from a JSON file of ``ReadinessBudget`` arguments.
+
+        The file holds an optional ``"default"`` budget and a ``"sites"``
+        object mapping hosts to budgets, e.g.
+        ``{"sites": {"threejs.org": {"quiet_ms": 1500, "max_wait_ms": 20000}}}``.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        default = data.get("default")
+        return cls(
+            default=ReadinessBudget(**default) if default else None,
+            sites={host: ReadinessBudget(**budget) for host, budget in data.get("sites", {}).items()},
+        )
+
+    def for_url(self, url) -> ReadinessBudget:
+        host = clean_domain(urlparse(url).netloc)
+        while host:
+            if host in self.sites:
+                return self.sites[host]
+            if "." not in host:
+                break
+            host = host.split(".", 1)[1]
+        return self.default
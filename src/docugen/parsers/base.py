@@ -3,15 +3,17 @@ from abc import ABC, abstractmethod
 class ParsedPage:
     def __init__(self, title, content, symbols):
         self.title = title
-        self.content = content
+        self.content = content  # HTML string or BeautifulSoup document, serialized when written
         self.symbols = symbols  # [(name, type, anchor)]
 
 
 class Parser(ABC):
     @abstractmethod
     def matches(self, html: str) -> bool:
+        """Detect the documentation generator from the raw page source."""
         pass
 
     @abstractmethod
-    def parse(self, html: str) -> ParsedPage:
+    def parse(self, html) -> ParsedPage:
+        """Extract title and symbols from an HTML string or an already parsed document."""
         pass
@@ -1,12 +1,12 @@
-from bs4 import BeautifulSoup
 from .base import Parser, ParsedPage
+from ..utils.html import as_soup
 
 class DocusaurusParser(Parser):
     def matches(self, html):
         return "docusaurus" in html or "__docusaurus" in html
 
     def parse(self, html):
-        soup = BeautifulSoup(html, "lxml")
+        soup = as_soup(html)
         title = soup.find("title").text if soup.find("title") else "Untitled"
         
         symbols = []
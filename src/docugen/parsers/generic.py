@@ -1,13 +1,13 @@
-from bs4 import BeautifulSoup
 from .base import Parser, ParsedPage
+from ..utils.html import as_soup
 
 
 class GenericParser(Parser):
     def matches(self, html: str) -> bool:
         return True
 
-    def parse(self, html: str) -> ParsedPage:
-        soup = BeautifulSoup(html, "lxml")
+    def parse(self, html) -> ParsedPage:
+        soup = as_soup(html)
         title_tag = soup.find("title")
         title = title_tag.text if title_tag else "Untitled"
 
@@ -1,12 +1,12 @@
-from bs4 import BeautifulSoup
 from .base import Parser, ParsedPage
+from ..utils.html import as_soup
 
 class RustdocParser(Parser):
     def matches(self, html):
         return "rustdoc" in html or "class=\"rustdoc\"" in html
 
     def parse(self, html):
-        soup = BeautifulSoup(html, "lxml")
+        soup = as_soup(html)
         title = soup.find("title").text if soup.find("title") else "Untitled"
         
         symbols = []
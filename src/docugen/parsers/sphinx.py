@@ -1,5 +1,5 @@
-from bs4 import BeautifulSoup
 from .base import Parser, ParsedPage
+from ..utils.html import as_soup
 
 
 class SphinxParser(Parser):
@@ -7,7 +7,7 @@ class SphinxParser(Parser):
         return "sphinx_rtd_theme" in html or "docutils" in html
 
     def parse(self, html):
-        soup = BeautifulSoup(html, "lxml")
+        soup = as_soup(html)
         title = soup.find("title").text
 
         symbols = []
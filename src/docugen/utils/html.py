@@ -0,0 +1,23 @@
+from html import escape
+from bs4 import BeautifulSoup, Doctype
+
+def as_soup(html) -> BeautifulSoup:
+    """Return ``html`` as a parsed document, parsing it only if it is still a string."""
+    if isinstance(html, BeautifulSoup):
+        return html
+    return BeautifulSoup(html, "lxml")
+
+def ensure_doctype(soup: BeautifulSoup) -> BeautifulSoup:
+    """Prepend an HTML5 doctype to the document if it has none."""
+    if not any(isinstance(node, Doctype) for node in soup.contents):
+        soup.insert(0, Doctype("html"))
+    return soup
+
+def redirect_page(target: str, title: str) -> str:
+    """A page that forwards to ``target``, for docset pages standing in for files."""
+    target, title = escape(target), escape(title)
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<meta http-equiv=\"refresh\" content=\"0; url={target}\"><title>{title}</title></head>"
+        f"<body><a href=\"{target}\">{title}</a></body></html>\n"
+    )
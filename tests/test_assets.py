@@ -2,8 +2,12 @@ import unittest
 import pathlib
 import tempfile
 import shutil
+from collections import Counter
 import anyio
-from docugen.assets.rewrite import rewrite_assets
+import httpx
+from docugen.assets.registry import AssetRegistry
+from docugen.assets.rewrite import rewrite_assets, download_and_save_asset
+from docugen.fetch.base import CapturedResource
 
 class TestAssetRewrite(unittest.TestCase):
     def setUp(self):
@@ -19,5 +23,90 @@ class TestAssetRewrite(unittest.TestCase):
         result = anyio.run(rewrite_assets, html, "https://example.com", self.test_dir)
         self.assertIn("No assets", result)
 
+    def test_captured_wasm_saved_without_download(self):
+        wasm_url = "https://example.com/build/app.wasm?v=2"
+        html = f'<html><body><link rel="preload" as="fetch" href="{wasm_url}" data-wasm-url="{wasm_url}"></body></html>'
+        resources = {wasm_url: CapturedResource(wasm_url, b"\0asm", "application/wasm")}
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(500)
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await rewrite_assets(html, "https://example.com/", self.test_dir, client=client, resources=resources)
+
+        result = anyio.run(main)
+        self.assertEqual(requests, [])
+        saved = list(self.test_dir.iterdir())
+        self.assertEqual([p.suffix for p in saved], [".wasm"])
+        self.assertEqual(saved[0].read_bytes(), b"\0asm")
+        self.assertIn(f'href="{saved[0].name}"', result)
+        self.assertIn(f'data-wasm-url="{wasm_url}"', result.replace("&amp;", "&"))
+
+    def test_extension_guessed_from_content_type_only_for_files(self):
+        def handler(request):
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=b"%PDF")
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                asset = await download_and_save_asset(client, "https://example.com/download?id=1", self.test_dir, "img")
+                file = await download_and_save_asset(client, "https://example.com/download?id=2", self.test_dir, "file")
+                return asset, file
+
+        asset, file = anyio.run(main)
+        # Extension-less assets keep the image default; pages saved as files get a real extension
+        self.assertTrue(asset.endswith(".png"))
+        self.assertTrue(file.endswith(".pdf"))
+
+    def test_concurrent_pages_share_downloads(self):
+        requests = Counter()
+        bodies = {
+            "/img/shared.png": (b"png", "image/png"),
+            "/img/bg.png": (b"bg", "image/png"),
+            "/css/site.css": (b"body { background: url('../img/bg.png'); }", "text/css"),
+            "/data/model.glb": (b"glb", "model/gltf-binary"),
+        }
+
+        async def handler(request):
+            requests[request.url.path] += 1
+            # Keep downloads in flight long enough for the pages to overlap
+            await anyio.sleep(0.01)
+            content, content_type = bodies[request.url.path]
+            return httpx.Response(200, headers={"Content-Type": content_type}, content=content)
+
+        page_a = """<html><head><link rel="stylesheet" href="/css/site.css"></head><body>
+            <img src="/img/shared.png"><script>loader.load("/data/model.glb");</script></body></html>"""
+        page_b = """<html><head><link rel="stylesheet" href="../css/site.css"></head><body>
+            <img srcset="../img/shared.png 2x"><div style="background: url('/img/shared.png')"></div>
+            <a onmouseover="this.src='/img/shared.png'">x</a></body></html>"""
+        registry = AssetRegistry()
+        results = {}
+
+        async def rewrite(client, name, html, base_url):
+            results[name] = await rewrite_assets(html, base_url, self.test_dir, client=client, registry=registry)
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(rewrite, client, "a", page_a, "https://example.com/index.html")
+                    tg.start_soon(rewrite, client, "b", page_b, "https://example.com/guide/intro.html")
+
+        anyio.run(main)
+        self.assertEqual(requests, Counter({path: 1 for path in bodies}))
+        names = {url: registry.names[f"https://example.com{url}"] for url in bodies}
+        self.assertIn(f'src="{names["/img/shared.png"]}"', results["a"])
+        self.assertIn(f'loader.load("{names["/data/model.glb"]}")', results["a"])
+        self.assertIn(f'href="{names["/css/site.css"]}"', results["a"])
+        self.assertIn(f'srcset="{names["/img/shared.png"]} 2x"', results["b"])
+        self.assertIn(f"url('{names['/img/shared.png']}')", results["b"])
+        self.assertIn(f"this.src='{names['/img/shared.png']}'", results["b"])
+        self.assertIn(f'href="{names["/css/site.css"]}"', results["b"])
+        # The shared stylesheet is rewritten once, against its own URL
+        css = (self.test_dir / names["/css/site.css"]).read_text()
+        self.assertEqual(css, f"body {{ background: url('{names['/img/bg.png']}'); }}")
+        self.assertEqual((self.test_dir / names["/img/shared.png"]).read_bytes(), b"png")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+import hashlib
+import pathlib
+import shutil
+import tempfile
+import unittest
+import anyio
+import httpx
+from docugen.assets.budget import AssetBudget
+from docugen.assets.rewrite import rewrite_assets
+from docugen.assets.store import AssetStore
+
+class TestAssetBudget(unittest.TestCase):
+    def test_limits(self):
+        budget = AssetBudget(max_asset_bytes=10, max_total_bytes=15)
+        self.assertTrue(budget.fits(10))
+        self.assertFalse(budget.fits(11))
+        self.assertTrue(budget.take(8, 8))
+        self.assertFalse(budget.take(8, 8))
+        budget.release(8)
+        self.assertEqual(budget.used, 0)
+
+class TestStreamedDownloads(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = pathlib.Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_oversized_assets_stay_remote(self):
+        files = {"/small.png": b"x" * 100, "/movie.mp4": b"y" * 5000, "/img/big.png": b"z" * 2000}
+
+        async def body(data):
+            yield data
+
+        def handler(request):
+            # Streamed without content-length so the limit is enforced while reading
+            return httpx.Response(200, content=body(files[request.url.path]))
+
+        html = (
+            '<img src="small.png"><video><source src="movie.mp4"></video>'
+            '<img srcset="small.png 1x, /img/big.png 2x"><div style="background: url(/img/big.png)"></div>'
+        )
+        budget = AssetBudget(max_asset_bytes=1000)
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await rewrite_assets(html, "https://example.com/", self.test_dir, client=client, budget=budget)
+
+        result = anyio.run(main)
+        self.assertIn('src="https://example.com/movie.mp4"', result)
+        self.assertIn("https://example.com/img/big.png 2x", result)
+        self.assertIn("url(https://example.com/img/big.png)", result)
+        self.assertNotIn("small.png", result)
+        self.assertEqual(sorted(budget.oversized), [("https://example.com/img/big.png", 2000), ("https://example.com/movie.mp4", 5000)])
+        self.assertEqual(budget.used, 100)
+        self.assertEqual(sorted(p.suffix for p in self.test_dir.iterdir()), [".png"])
+
+    def test_reused_assets_count_towards_budget(self):
+        out_dir = self.test_dir / "docs"
+        out_dir.mkdir()
+        # Left on disk by an earlier build, and in the shared store
+        (out_dir / (hashlib.md5(b"https://example.com/small.png").hexdigest() + ".png")).write_bytes(b"x" * 100)
+        store = AssetStore(str(self.test_dir / "cache"))
+        store.put("https://example.com/big.png", b"z" * 2000, ".png")
+
+        def handler(request):
+            raise AssertionError(f"unexpected download of {request.url}")
+
+        html = '<img src="small.png"><img src="big.png">'
+        budget = AssetBudget(max_total_bytes=1000)
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await rewrite_assets(html, "https://example.com/", out_dir, client=client, budget=budget, store=store)
+
+        try:
+            result = anyio.run(main)
+        finally:
+            store.close()
+        self.assertNotIn('src="small.png"', result)
+        self.assertIn('src="https://example.com/big.png"', result)
+        self.assertEqual(budget.used, 100)
+        self.assertEqual(budget.oversized, [("https://example.com/big.png", 2000)])
+
+if __name__ == "__main__":
+    unittest.main()
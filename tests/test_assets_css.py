@@ -0,0 +1,60 @@
+import pathlib
+import shutil
+import tempfile
+import unittest
+import anyio
+import httpx
+from docugen.assets.css import iter_css_references, substitute_css_references, IMPORT, URL
+from docugen.assets.registry import AssetRegistry
+from docugen.assets.rewrite import rewrite_css_assets
+
+class TestCssReferences(unittest.TestCase):
+    def test_iter_references(self):
+        css = """@import "base.css"; @import url('print.css') print;
+        /* url(commented.png) */ a { background: url( "a.png" ) } b { src: url(font.woff2?v=1#x) }"""
+        self.assertEqual(list(iter_css_references(css)), [
+            (IMPORT, "base.css"), (IMPORT, "print.css"), (URL, "a.png"), (URL, "font.woff2?v=1#x"),
+        ])
+
+    def test_substitute_single_pass(self):
+        css = "a{background:url(a.png)} b{background:url('img/a.png')} /* url(a.png) */"
+        result = substitute_css_references(css, {"a.png": "x.png", "img/a.png": "y.png"})
+        self.assertEqual(result, "a{background:url(x.png)} b{background:url('y.png')} /* url(a.png) */")
+
+class TestRewriteCss(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = pathlib.Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_imports_followed_once_despite_cycle(self):
+        files = {
+            "/a.css": b'@import "b.css"; body { background: url(img.png) }',
+            "/b.css": b'@import url("a.css"); p { background: url(img.png) }',
+            "/img.png": b"png",
+        }
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            return httpx.Response(200, content=files[request.url.path])
+
+        async def main():
+            registry = AssetRegistry()
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                css_path = self.test_dir / "a.css"
+                css_path.write_bytes(files["/a.css"])
+                await rewrite_css_assets(client, css_path, "https://example.com/a.css", self.test_dir, registry=registry)
+                return registry
+
+        registry = anyio.run(main)
+        self.assertEqual(sorted(requests), ["/a.css", "/b.css", "/img.png"])
+        a_name = registry.names["https://example.com/a.css"]
+        b_name = registry.names["https://example.com/b.css"]
+        img_name = registry.names["https://example.com/img.png"]
+        self.assertEqual((self.test_dir / "a.css").read_text(), f'@import "{b_name}"; body {{ background: url({img_name}) }}')
+        self.assertEqual((self.test_dir / b_name).read_text(), f'@import url("{a_name}"); p {{ background: url({img_name}) }}')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import anyio
+from docugen.assets.registry import AssetRegistry
+
+class TestAssetRegistry(unittest.TestCase):
+    def test_shares_in_flight_downloads(self):
+        registry = AssetRegistry()
+        calls = []
+        results = []
+
+        async def download():
+            calls.append(1)
+            await anyio.sleep(0.01)
+            return "abc.css"
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                for _ in range(5):
+                    tg.start_soon(lambda: self._collect(registry, download, results))
+            results.append(await registry.resolve("https://example.com/a.css", download))
+
+        anyio.run(main)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["abc.css"] * 6)
+
+    async def _collect(self, registry, download, results):
+        results.append(await registry.resolve("https://example.com/a.css", download))
+
+    def test_failures_are_not_retried(self):
+        registry = AssetRegistry()
+        calls = []
+
+        async def download():
+            calls.append(1)
+            return None
+
+        async def main():
+            first = await registry.resolve("https://example.com/missing.png", download)
+            second = await registry.resolve("https://example.com/missing.png", download)
+            return first, second
+
+        self.assertEqual(anyio.run(main), (None, None))
+        self.assertEqual(len(calls), 1)
+        self.assertIn("https://example.com/missing.png", registry.failures)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from docugen.assets.scripts import (
+    ASSET, FETCH, MODULE_IMPORT, HANDLER_ASSET_EXTENSIONS, iter_script_references, substitute_quoted,
+)
+
+class TestScriptReferences(unittest.TestCase):
+    def test_module_imports_and_loads(self):
+        js = """import { x } from './x.js'; import "./side.js";
+        fetch('/api/data'); loader.load("models/bunny.glb"); const label = "not-an-asset";"""
+        self.assertEqual(list(iter_script_references(js, module=True)), [
+            (MODULE_IMPORT, "./x.js"), (MODULE_IMPORT, "./side.js"), (FETCH, "/api/data"), (ASSET, "models/bunny.glb"),
+        ])
+        # Imports are only recognised in module scripts
+        self.assertEqual(list(iter_script_references("import './x.js'")), [])
+
+    def test_literals_do_not_span_quotes(self):
+        js = """const a = "prefix" + 'img/b.png'; // don't load 'c.png'"""
+        self.assertEqual([url for _, url in iter_script_references(js)], ["img/b.png", "c.png"])
+
+    def test_whitespace_and_extension_case(self):
+        js = """show("Loading model.glb"); load('img/LOGO.PNG'); fetch( 'data/a b.json' ); fetch("/api")"""
+        self.assertEqual(list(iter_script_references(js)), [(ASSET, "img/LOGO.PNG"), (FETCH, "/api")])
+        self.assertEqual(list(iter_script_references("import{x}from'./x.js'", module=True)), [(MODULE_IMPORT, "./x.js")])
+        self.assertEqual(substitute_quoted("load('a b.png')", {"a b.png": "x.png"}), "load('a b.png')")
+
+    def test_handler_extensions(self):
+        handler = "this.src='img/hover.gif'; fetch('x')"
+        refs = list(iter_script_references(handler, fetches=False, extensions=HANDLER_ASSET_EXTENSIONS))
+        self.assertEqual(refs, [(ASSET, "img/hover.gif")])
+
+    def test_substitute_quoted(self):
+        js = """load('a.png'); load("a.png"); load('b.png'); var s = "a.png.bak";"""
+        self.assertEqual(
+            substitute_quoted(js, {"a.png": "x.png"}),
+            """load('x.png'); load("x.png"); load('b.png'); var s = "a.png.bak";""",
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+import anyio
+from docugen.assets.store import AssetStore
+
+class TestAssetStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = AssetStore(os.path.join(self.test_dir, "cache"), max_bytes=10)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_same_bytes_stored_once(self):
+        a = self.store.put("https://cdn-a.example/jquery.js", b"abc", ".js")
+        b = self.store.put("https://cdn-b.example/jquery.min.js", b"abc", ".js")
+        self.assertEqual(a, b)
+        self.assertEqual(self.store.size(), 3)
+        self.assertEqual(self.store.lookup("https://cdn-b.example/jquery.min.js"), (a, ".js"))
+
+    def test_link_materializes_blob(self):
+        digest = self.store.put("https://example.com/a.css", b"body{}", ".css")
+        dest = os.path.join(self.test_dir, "a.css")
+        self.store.link(digest, dest)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), b"body{}")
+
+    def test_evicts_least_recently_used(self):
+        old = self.store.put("https://example.com/old", b"123456", "")
+        self.store.put("https://example.com/new", b"abcdef", "")
+        self.assertIsNone(self.store.lookup("https://example.com/old"))
+        self.assertFalse(os.path.exists(self.store.blob_path(old)))
+        self.assertIsNotNone(self.store.lookup("https://example.com/new"))
+        self.assertLessEqual(self.store.size(), 10)
+
+    def test_usable_from_worker_threads(self):
+        digest = self.store.put("https://example.com/a.js", b"abc", ".js")
+        before = self.store.conn.execute("SELECT last_used FROM blobs").fetchone()[0]
+
+        async def main():
+            return await anyio.to_thread.run_sync(self.store.lookup, "https://example.com/a.js")
+
+        self.assertEqual(anyio.run(main), (digest, ".js"))
+        # Usage is written on close rather than committed by every lookup
+        self.assertEqual(self.store.conn.execute("SELECT last_used FROM blobs").fetchone()[0], before)
+        self.store.close()
+        self.store.connect()
+        self.assertGreaterEqual(self.store.conn.execute("SELECT last_used FROM blobs").fetchone()[0], before)
+
+if __name__ == "__main__":
+    unittest.main()
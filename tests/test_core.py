@@ -0,0 +1,57 @@
+import unittest
+import anyio
+from docugen.core import _crawl
+from docugen.crawl.frontier import Frontier
+
+class TestCrawl(unittest.TestCase):
+    def run_crawl(self, start, links, max_pages, concurrency):
+        frontier = Frontier(start)
+        visited = []
+        counts = {"pages": 0, "in_flight": 0}
+        state = {"active": 0, "peak": 0}
+
+        async def visit(url):
+            if url in visited:
+                return False
+            visited.append(url)
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await anyio.sleep(0.01)
+            state["active"] -= 1
+            for link in links.get(url, []):
+                frontier.push(link)
+            return True
+
+        anyio.run(_crawl, frontier, visit, max_pages, concurrency, counts)
+        return visited, counts, state["peak"]
+
+    def test_respects_max_pages(self):
+        links = {f"p{i}": [f"p{i + 1}", f"p{i + 2}"] for i in range(50)}
+        visited, counts, peak = self.run_crawl(["p0"], links, 10, 4)
+        self.assertEqual(counts["pages"], 10)
+        self.assertEqual(len(visited), 10)
+        self.assertLessEqual(peak, 4)
+
+    def test_serial_order(self):
+        links = {"a": ["b", "c"], "b": ["d"], "c": ["a"]}
+        visited, counts, peak = self.run_crawl(["a"], links, 100, 1)
+        self.assertEqual(visited, ["a", "b", "c", "d"])
+        self.assertEqual(peak, 1)
+
+    def test_cancel(self):
+        counts = {"pages": 0, "in_flight": 0}
+
+        async def main():
+            cancel_event = anyio.Event()
+
+            async def visit(url):
+                cancel_event.set()
+                return True
+
+            await _crawl(Frontier(["a", "b", "c"]), visit, 10, 2, counts, cancel_event)
+
+        anyio.run(main)
+        self.assertLessEqual(counts["pages"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
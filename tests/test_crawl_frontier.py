@@ -0,0 +1,44 @@
+import time
+import unittest
+from docugen.crawl.frontier import Frontier
+
+class TestFrontier(unittest.TestCase):
+    def test_fifo_order(self):
+        frontier = Frontier(["https://example.com/a", "https://example.com/b"])
+        frontier.push("https://example.com/c")
+        popped = [frontier.pop() for _ in range(len(frontier))]
+        self.assertEqual(popped, ["https://example.com/a", "https://example.com/b", "https://example.com/c"])
+        self.assertFalse(frontier)
+
+    def test_dedupes_normalized_urls(self):
+        frontier = Frontier(["https://example.com/docs/"])
+        self.assertFalse(frontier.push("http://www.example.com/docs"))
+        self.assertFalse(frontier.push("https://example.com/docs/index.html"))
+        self.assertIn("https://EXAMPLE.com/docs", frontier)
+        self.assertEqual(len(frontier), 1)
+
+    def test_visited_urls_are_not_requeued(self):
+        frontier = Frontier(["https://example.com/a"])
+        url = frontier.pop()
+        self.assertTrue(frontier.mark_visited(url))
+        self.assertFalse(frontier.mark_visited("https://example.com/a/"))
+        self.assertTrue(frontier.is_visited("https://www.example.com/a"))
+        self.assertFalse(frontier.push("https://example.com/a"))
+        self.assertEqual(len(frontier), 0)
+
+    def test_deferred_urls_are_queued_when_due(self):
+        frontier = Frontier(["https://example.com/a"])
+        url = frontier.pop()
+        frontier.mark_visited(url)
+        frontier.defer(url, 0.05)
+        self.assertFalse(frontier)
+        self.assertEqual(frontier.deferred, 1)
+        self.assertIn(url, frontier)
+        self.assertFalse(frontier.push(url))
+        time.sleep(frontier.next_due() + 0.01)
+        self.assertEqual(frontier.pop(), url)
+        self.assertTrue(frontier.mark_visited(url))
+        self.assertIsNone(frontier.next_due())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import os
+import shutil
+import tempfile
+from docugen.crawl.journal import CrawlJournal
+
+class TestCrawlJournal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "Test.docset.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_load_frontier_after_restart(self):
+        journal = CrawlJournal(self.path)
+        journal.connect(reset=True)
+        for url in ["https://example.com/a", "https://example.com/b", "https://example.com/c"]:
+            journal.record_queued(url)
+        journal.mark_done("https://example.com/a")
+        journal.mark_failed("https://example.com/b")
+        journal.record_page("example.com_a_index.html", "https://example.com/a")
+        journal.set_meta("main_page", "example.com_a_index.html")
+        journal.close()
+
+        journal = CrawlJournal(self.path)
+        journal.connect()
+        frontier = journal.load_frontier()
+        self.assertEqual(frontier.pop(), "https://example.com/c")
+        self.assertFalse(frontier)
+        self.assertTrue(frontier.is_visited("https://example.com/a"))
+        self.assertTrue(frontier.is_visited("https://example.com/b"))
+        self.assertEqual(journal.done_count(), 1)
+        self.assertEqual(journal.load_pages(), [("example.com_a_index.html", "https://example.com/a")])
+        self.assertEqual(journal.get_meta("main_page"), "example.com_a_index.html")
+        journal.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+if __name__ == "__main__":
+    unittest.main()
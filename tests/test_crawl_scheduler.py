@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import anyio
+import httpx
+from docugen.crawl.scheduler import HostScheduler, Throttled, parse_retry_after
+from docugen.fetch.http_client import HttpClientPool
+
+
+def status_error(status, headers=None):
+    request = httpx.Request("GET", "https://example.com/a")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestHostScheduler(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(parse_retry_after("100000"), 600.0)
+        self.assertAlmostEqual(parse_retry_after(time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))), 30, delta=2)
+
+    def test_concurrency_grows_while_healthy_and_halves_on_throttling(self):
+        scheduler = HostScheduler(initial_concurrency=2, max_concurrency=4)
+
+        async def main():
+            for _ in range(10):
+                async with scheduler.slot("https://example.com/a"):
+                    pass
+            self.assertEqual(scheduler.limit("https://example.com/b"), 4)
+            with self.assertRaises(Throttled):
+                async with scheduler.slot("https://example.com/a"):
+                    raise Throttled("https://example.com/a", 429, retry_after=0.2)
+            self.assertEqual(scheduler.limit("https://example.com/a"), 2)
+            # The host is blocked for Retry-After; others are not
+            start = time.monotonic()
+            async with scheduler.slot("https://other.example/"):
+                pass
+            self.assertLess(time.monotonic() - start, 0.1)
+            async with scheduler.slot("https://example.com/a"):
+                pass
+            self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+        anyio.run(main)
+
+    def test_slot_limits_parallel_requests_per_host(self):
+        scheduler = HostScheduler(initial_concurrency=2, max_concurrency=2)
+        active = {"now": 0, "max": 0}
+
+        async def request():
+            async with scheduler.slot("https://example.com/"):
+                # Nested slots for the same host are free
+                async with scheduler.slot("https://example.com/asset"):
+                    active["now"] += 1
+                    active["max"] = max(active["max"], active["now"])
+                    await anyio.sleep(0.02)
+                    active["now"] -= 1
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                for _ in range(6):
+                    tg.start_soon(request)
+
+        anyio.run(main)
+        self.assertEqual(active["max"], 2)
+
+    def test_token_bucket_follows_robots_request_rate(self):
+        async def robots(url):
+            return "User-agent: *\nRequest-rate: 10/1\n"
+
+        scheduler = HostScheduler(rate=100, robots_fetcher=robots)
+
+        async def main():
+            start = time.monotonic()
+            for _ in range(3):
+                async with scheduler.slot("https://example.com/"):
+                    pass
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(anyio.run(main), 0.19)
+
+    def test_retry_delay(self):
+        scheduler = HostScheduler(max_retries=3, backoff=0.01)
+        url = "https://example.com/a"
+        self.assertIsNone(scheduler.retry_delay(url, status_error(404)))
+        self.assertIsNotNone(scheduler.retry_delay(url, httpx.ConnectError("refused")))
+        self.assertIsNotNone(scheduler.retry_delay(url, status_error(503)))
+        self.assertIsNone(scheduler.retry_delay(url, status_error(503)))
+
+    def test_pool_honours_retry_after_and_persists_it(self):
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        path = os.path.join(test_dir, "Test.docset.hosts.json")
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            return httpx.Response(429, headers={"Retry-After": "120"})
+
+        scheduler = HostScheduler(path=path)
+        pool = HttpClientPool(scheduler=scheduler)
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def main():
+            async with pool:
+                r = await pool.get("https://example.com/a")
+                self.assertEqual(r.status_code, 429)
+                self.assertGreater(scheduler.retry_delay("https://example.com/a", status_error(429)), 100)
+
+        anyio.run(main)
+        scheduler.save()
+        self.assertEqual(requests, ["/robots.txt", "/a"])
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        self.assertGreater(saved["example.com"]["retry_at"], time.time() + 100)
+        self.assertGreater(HostScheduler(path=path).retry_delay("https://example.com/a", status_error(503)), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
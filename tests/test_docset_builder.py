@@ -4,6 +4,7 @@ import shutil
 import tempfile
 import sqlite3
 from docugen.docset.builder import DocsetBuilder
+from docugen.docset.index import DocsetIndex
 from docugen.parsers.base import ParsedPage
 
 class TestDocsetBuilder(unittest.TestCase):
@@ -37,5 +38,79 @@ class TestDocsetBuilder(unittest.TestCase):
         self.assertEqual(row, ("Sym", "Type", "example.com_page_index.html#anchor"))
         conn.close()
 
+    def test_incremental_keeps_replaces_and_removes_pages(self):
+        builder = DocsetBuilder(self.output_path)
+        builder.add_page(ParsedPage(None, "<html><body>A</body></html>", [("Old", "Type", "a")]), "https://example.com/a")
+        builder.add_page(ParsedPage(None, "<html><body>B</body></html>", [("B", "Type", "b")]), "https://example.com/b")
+        builder.add_page(ParsedPage(None, "<html><body>C</body></html>", [("C", "Type", "c")]), "https://example.com/c")
+        builder.finalize()
+
+        builder = DocsetBuilder(self.output_path, incremental=True)
+        builder.add_page(ParsedPage(None, "<html><body>A2</body></html>", [("New", "Type", "a")]), "https://example.com/a")
+        builder.keep_page("example.com_b_index.html", "https://example.com/b")
+        builder.remove_page("example.com_c_index.html")
+        builder.finalize()
+
+        self.assertFalse(os.path.exists(os.path.join(builder.documents_path, "example.com_c_index.html")))
+        self.assertEqual([f for f, _ in builder.all_pages], ["example.com_a_index.html", "example.com_b_index.html"])
+        conn = sqlite3.connect(os.path.join(builder.resources_path, "docSet.dsidx"))
+        names = [row[0] for row in conn.execute("SELECT name FROM searchIndex ORDER BY name")]
+        conn.close()
+        self.assertEqual(names, ["B", "New"])
+
+class TestDocsetIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "Resources", "docSet.dsidx")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_bulk_load_dedups_and_resumes(self):
+        index = DocsetIndex(self.db_path, bulk=True, batch_size=2)
+        index.connect()
+        for name in ["a", "b", "a", "c", " "]:
+            index.add_entry(name, "Function", "page.html#" + name.strip())
+        index.commit()
+        index.close()
+
+        # Resuming keeps earlier entries and still ignores duplicates of them
+        index = DocsetIndex(self.db_path, bulk=True, batch_size=2)
+        index.connect(reset=False)
+        index.add_entry("b", "Function", "page.html#b")
+        index.add_entry("d", "Function", "page.html#d")
+        index.finalize()
+
+        conn = sqlite3.connect(self.db_path)
+        names = [row[0] for row in conn.execute("SELECT name FROM searchIndex ORDER BY name")]
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.assertEqual(names, ["a", "b", "c", "d"])
+        self.assertIn("anchor", indexes)
+        self.assertEqual(journal_mode, "delete")
+        self.assertFalse(os.path.exists(self.db_path + "-wal"))
+
+    def test_bulk_remove_page_is_batched(self):
+        index = DocsetIndex(self.db_path, bulk=True)
+        index.connect()
+        for path in ["a.html", "a.html#x", "a.html.bak#y", "ab.html#z"]:
+            index.add_entry(path, "Function", path)
+        index.commit()
+
+        index.add_entry("buffered", "Function", "a.html#buffered")
+        index.remove_page("a.html")
+        index.add_entry("new", "Function", "a.html#new")
+        # Removals wait for the next batch together with the inserts
+        self.assertEqual(index.conn.execute("SELECT count(*) FROM searchIndex").fetchone()[0], 4)
+        index.finalize()
+
+        conn = sqlite3.connect(self.db_path)
+        names = [row[0] for row in conn.execute("SELECT name FROM searchIndex ORDER BY name")]
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        conn.close()
+        self.assertEqual(names, ["a.html.bak#y", "ab.html#z", "new"])
+        self.assertIn("page_path", indexes)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+from docugen.docset.builder import DocsetBuilder
+from docugen.docset.fulltext import FullTextIndex, FULL_TEXT_DB, extract_text
+from docugen.docset.index import DocsetIndex
+from docugen.parsers.base import ParsedPage
+from docugen.utils.html import as_soup
+
+class TestFullText(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.test_dir, "Test.docset")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_extract_text_skips_scripts(self):
+        title, headings, body = extract_text(
+            "<html><head><title>T</title></head><body><h1>Intro</h1><p>Hello</p><script>var x</script><!-- note --></body></html>"
+        )
+        self.assertEqual((title, headings, body), ("T", "Intro", "Intro Hello"))
+
+    def test_builder_indexes_pages(self):
+        builder = DocsetBuilder(self.output_path, full_text=True)
+        page = as_soup("<html><head><title>Tasks</title></head><body><h2>Gathering</h2><p>Run coroutines concurrently.</p></body></html>")
+        builder.add_page(ParsedPage("Tasks", page, [("asyncio.gather", "Function", "gather")]), "https://example.com/tasks")
+        builder.finalize()
+
+        full_text = FullTextIndex(os.path.join(builder.resources_path, FULL_TEXT_DB))
+        full_text.connect(read_only=True)
+        rows = full_text.search("coroutine")
+        full_text.close()
+        self.assertEqual([row[0] for row in rows], ["example.com_tasks_index.html"])
+
+        index = DocsetIndex(os.path.join(builder.resources_path, "docSet.dsidx"))
+        index.connect(read_only=True)
+        self.assertEqual(index.search_prefix("asyncio.g"), [("asyncio.gather", "Function", "example.com_tasks_index.html#gather")])
+        self.assertEqual(index.search_prefix("asyncio%"), [])
+        index.close()
+    def test_reindexing_replaces_pages(self):
+        db_path = os.path.join(self.test_dir, FULL_TEXT_DB)
+        full_text = FullTextIndex(db_path)
+        full_text.connect()
+        full_text.add_page("a.html", "<p>first draft</p>")
+        full_text.add_page("b.html", "<p>other page</p>")
+        full_text.close()
+
+        # Reopened like a resumed build: known pages are replaced, not duplicated
+        full_text.connect(reset=False)
+        full_text.add_page("a.html", "<p>final version</p>")
+        full_text.remove_page("b.html")
+        full_text.remove_page("missing.html")
+        self.assertEqual(full_text.search("draft"), [])
+        self.assertEqual([row[0] for row in full_text.search("final")], ["a.html"])
+        self.assertEqual(full_text.conn.execute("SELECT count(*) FROM pages").fetchone()[0], 1)
+        full_text.close()
+
+if __name__ == "__main__":
+    unittest.main()
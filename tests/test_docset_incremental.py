@@ -0,0 +1,101 @@
+import collections
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import anyio
+import httpx
+from docugen.core import generate
+from docugen.docset.incremental import IncrementalCache
+from docugen.fetch.http_client import HttpClientPool
+from docugen.utils.url import get_filename_from_url, normalize_url
+
+
+class TestIncrementalCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "Test.docset.manifest.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_record_persists_validators_and_links(self):
+        cache = IncrementalCache(self.path)
+        cache.record(
+            "https://example.com/a/", "a.html", "<p>a</p>",
+            {"etag": '"v1"', "last-modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+            ["https://example.com/b"],
+        )
+        cache.save()
+
+        cache = IncrementalCache(self.path)
+        # Entries are keyed by normalized URL
+        entry = cache.get("https://example.com/a")
+        self.assertEqual(entry["filename"], "a.html")
+        self.assertEqual(entry["links"], ["https://example.com/b"])
+        self.assertEqual(cache.conditional_headers("https://example.com/a"), {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT",
+        })
+        self.assertFalse(cache.changed("https://example.com/a", "<p>a</p>"))
+        self.assertTrue(cache.changed("https://example.com/a", "<p>a2</p>"))
+
+    def test_unseen_and_forget(self):
+        cache = IncrementalCache()
+        cache.record("https://example.com/a", "a.html", "a")
+        cache.record("https://example.com/b", "b.html", "b")
+        self.assertEqual(cache.conditional_headers("https://example.com/a"), {})
+
+        unseen = cache.unseen({normalize_url("https://example.com/a")})
+        self.assertEqual([entry["filename"] for entry in unseen], ["b.html"])
+        self.assertEqual(cache.forget("https://example.com/b")["filename"], "b.html")
+        self.assertEqual(len(cache), 1)
+
+
+class TestIncrementalGenerate(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.test_dir, "Test.docset")
+        self.pages = {
+            "/docs/": '<html><head><title>Index</title></head><body><a href="a.html">A</a><a href="b.html">B</a></body></html>',
+            "/docs/a.html": "<html><head><title>A</title></head><body><h1>A</h1></body></html>",
+            "/docs/b.html": "<html><head><title>B</title></head><body><h1>B</h1></body></html>",
+        }
+        self.requests = collections.Counter()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def handler(self, request):
+        path = request.url.path
+        if path not in self.pages:
+            return httpx.Response(404)
+        self.requests[path] += 1
+        etag = f'"{hash(self.pages[path])}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"etag": etag})
+        return httpx.Response(200, headers={"content-type": "text/html", "etag": etag}, text=self.pages[path])
+
+    def build(self, incremental=False):
+        self.requests.clear()
+        pool = functools.partial(HttpClientPool, transport=httpx.MockTransport(self.handler))
+        with mock.patch("docugen.core.HttpClientPool", pool):
+            anyio.run(lambda: generate(["https://example.com/docs/"], self.output, js=False, log_callback=lambda *a, **k: None,
+                                       asset_cache="", incremental=incremental))
+
+    def test_changed_page_is_fetched_once(self):
+        self.build()
+        self.pages["/docs/b.html"] = "<html><head><title>B</title></head><body><h1>B, revised</h1></body></html>"
+        self.build(incremental=True)
+
+        # The conditional request doubles as the fetch of a changed page
+        self.assertEqual(self.requests["/docs/a.html"], 1)
+        self.assertEqual(self.requests["/docs/b.html"], 1)
+        with open(os.path.join(self.output, "Contents", "Resources", "Documents", get_filename_from_url("https://example.com/docs/b.html")), encoding="utf-8") as f:
+            self.assertIn("B, revised", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
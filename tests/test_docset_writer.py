@@ -0,0 +1,46 @@
+import threading
+import unittest
+import anyio
+from docugen.docset.writer import DocsetWriter
+
+class TestDocsetWriter(unittest.TestCase):
+    def test_jobs_run_in_order_off_the_event_loop(self):
+        done = []
+        threads = set()
+
+        def job(i):
+            threads.add(threading.get_ident())
+            done.append(i)
+
+        async def main():
+            async with DocsetWriter(None) as writer:
+                for i in range(20):
+                    await writer.submit(job, i)
+
+        anyio.run(main)
+        self.assertEqual(done, list(range(20)))
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_submit_blocks_when_queue_is_full(self):
+        release = threading.Event()
+        submitted = []
+
+        async def main():
+            async with DocsetWriter(None, max_pending=2) as writer:
+                async def producer():
+                    for i in range(6):
+                        await writer.submit(release.wait)
+                        submitted.append(i)
+
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(producer)
+                    await anyio.sleep(0.1)
+                    # One job running plus two queued; the producer waits for the rest
+                    self.assertLessEqual(len(submitted), 4)
+                    release.set()
+
+        anyio.run(main)
+        self.assertEqual(len(submitted), 6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import anyio
+import httpx
+from docugen.core import generate
+from docugen.fetch.archive import FetchArchive, RecordingFetcher, RecordingTransport, ReplayFetcher, ReplayTransport
+from docugen.fetch.base import CapturedResource, FetchResult
+from docugen.fetch.http_client import HttpClientPool
+from docugen.fetch.httpx_fetcher import HttpxFetcher
+
+PAGE = '<html><head><title>Home</title><link rel="stylesheet" href="style.css"></head><body><h1 id="intro">Intro</h1><a href="guide.html">Guide</a></body></html>'
+GUIDE = '<html><head><title>Guide</title></head><body><h1 id="usage">Usage</h1></body></html>'
+
+
+def handler(request):
+    path = request.url.path
+    if path == "/docs/":
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, content=PAGE.encode())
+    if path == "/docs/guide.html":
+        if request.headers.get("if-none-match") == '"guide-v1"':
+            return httpx.Response(304, headers={"ETag": '"guide-v1"'})
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, content=GUIDE.encode())
+    if path == "/docs/style.css":
+        return httpx.Response(200, headers={"Content-Type": "text/css"}, content=b"h1 { color: red }")
+    if path == "/docs/old":
+        return httpx.Response(301, headers={"Location": "https://example.com/docs/"})
+    return httpx.Response(404)
+
+
+class TestFetchArchive(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.test_dir, "archive")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def record(self, urls):
+        archive = FetchArchive(self.archive_path).open()
+        pool = HttpClientPool(transport=RecordingTransport(archive, httpx.MockTransport(handler)))
+
+        async def main():
+            async with pool, RecordingFetcher(HttpxFetcher(pool), archive) as fetcher:
+                for url in urls:
+                    await fetcher.fetch(url)
+                await pool.get("https://example.com/docs/style.css")
+
+        try:
+            anyio.run(main)
+        finally:
+            archive.close()
+
+    def test_replay_serves_pages_and_responses(self):
+        self.record(["https://example.com/docs/old"])
+        archive = FetchArchive(self.archive_path).load()
+        pool = HttpClientPool(transport=ReplayTransport(archive))
+
+        async def main():
+            async with pool:
+                fetcher = ReplayFetcher(archive)
+                page = await fetcher.fetch("https://example.com/docs/old")
+                css = await pool.get("https://example.com/docs/style.css")
+                redirected = await pool.get("https://example.com/docs/old")
+                missing = await pool.get("https://example.com/docs/missing.png")
+                with self.assertRaises(httpx.HTTPStatusError):
+                    await fetcher.fetch("https://example.com/docs/missing.html")
+                return page, css, redirected, missing
+
+        page, css, redirected, missing = anyio.run(main)
+        self.assertEqual(page.html, PAGE)
+        self.assertEqual(page.url, "https://example.com/docs/")
+        self.assertEqual(css.content, b"h1 { color: red }")
+        self.assertEqual(redirected.text, PAGE)
+        self.assertEqual(missing.status_code, 404)
+
+    def test_captured_resources_and_files_round_trip(self):
+        archive = FetchArchive(self.archive_path).open()
+        css = CapturedResource("https://example.com/s.css", b"p {}", "text/css")
+        archive.record_page("https://example.com/", FetchResult("https://example.com/", PAGE, resources={css.url: css}))
+        archive.record_page("https://example.com/a.pdf", FetchResult("https://example.com/a.pdf", "", content_type="application/pdf", body=b"%PDF"))
+        archive.close()
+
+        fetcher = ReplayFetcher(FetchArchive(self.archive_path).load())
+        page = anyio.run(fetcher.fetch, "https://example.com/")
+        pdf = anyio.run(fetcher.fetch, "https://example.com/a.pdf")
+        self.assertEqual(page.resources[css.url].body, b"p {}")
+        self.assertFalse(pdf.is_html)
+        self.assertEqual(pdf.body, b"%PDF")
+
+    def test_recording_forwards_validators_and_skips_304(self):
+        self.record(["https://example.com/docs/guide.html"])
+        archive = FetchArchive(self.archive_path).open()
+        pool = HttpClientPool(transport=RecordingTransport(archive, httpx.MockTransport(handler)))
+
+        async def main():
+            async with pool, RecordingFetcher(HttpxFetcher(pool), archive) as fetcher:
+                self.assertTrue(fetcher.revalidates)
+                return await fetcher.fetch("https://example.com/docs/guide.html", headers={"If-None-Match": '"guide-v1"'})
+
+        try:
+            result = anyio.run(main)
+        finally:
+            archive.close()
+        self.assertEqual(result.status, 304)
+        # The page recorded before is still what a replay serves
+        page = anyio.run(ReplayFetcher(FetchArchive(self.archive_path).load()).fetch, "https://example.com/docs/guide.html")
+        self.assertEqual(page.html, GUIDE)
+
+    def test_generate_replays_offline(self):
+        self.record(["https://example.com/docs/", "https://example.com/docs/guide.html"])
+        output = os.path.join(self.test_dir, "Test.docset")
+        anyio.run(lambda: generate(["https://example.com/docs/"], output, js=False, log_callback=lambda *a, **k: None, replay=self.archive_path))
+
+        documents = os.path.join(output, "Contents", "Resources", "Documents")
+        files = os.listdir(documents)
+        self.assertIn("example.com_docs_guide.html", files)
+        self.assertTrue(any(name.endswith(".css") for name in files))
+        conn = sqlite3.connect(os.path.join(output, "Contents", "Resources", "docSet.dsidx"))
+        names = sorted(row[0] for row in conn.execute("SELECT name FROM searchIndex"))
+        conn.close()
+        self.assertIn("Usage", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import shutil
+import tempfile
+import anyio
+from docugen.fetch.base import Fetcher, FetchResult
+from docugen.fetch.auto_fetcher import AutoFetcher, FetchModeRegistry, RENDER, looks_like_spa_shell
+
+ARTICLE = "<html><body><h1>Title</h1><p>" + "Static documentation text. " * 20 + "</p></body></html>"
+SHELL = '<html><body><div id="root"></div><noscript>You need to enable JavaScript to run this app.</noscript><script src="main.js"></script></body></html>'
+
+class StubFetcher(Fetcher):
+    def __init__(self, html):
+        self.html = html
+        self.calls = []
+
+    async def fetch(self, url):
+        self.calls.append(url)
+        return FetchResult(url, self.html)
+
+class ConditionalFetcher(Fetcher):
+    revalidates = True
+
+    def __init__(self, html):
+        self.html = html
+        self.calls = []
+
+    async def fetch(self, url, headers=None):
+        self.calls.append((url, headers))
+        if headers:
+            return FetchResult(url, "", status=304)
+        return FetchResult(url, self.html)
+
+class FileFetcher(Fetcher):
+    async def fetch(self, url):
+        return FetchResult(url, "", content_type="application/pdf", body=b"%PDF")
+
+class TestAutoFetcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_spa_shell_detection(self):
+        self.assertFalse(looks_like_spa_shell(ARTICLE))
+        self.assertTrue(looks_like_spa_shell(SHELL))
+        self.assertTrue(looks_like_spa_shell("<html><head><title>x</title></head></html>"))
+
+    def test_non_html_is_not_rendered(self):
+        renderer = StubFetcher(ARTICLE)
+        result = anyio.run(AutoFetcher(FileFetcher(), renderer).fetch, "https://example.com/manual.pdf")
+        self.assertEqual(result.body, b"%PDF")
+        self.assertEqual(renderer.calls, [])
+
+    def test_escalates_and_remembers_mode(self):
+        path = os.path.join(self.test_dir, "modes.json")
+        static = StubFetcher(SHELL)
+        renderer = StubFetcher(ARTICLE)
+        fetcher = AutoFetcher(static, renderer, FetchModeRegistry(path))
+
+        result = anyio.run(fetcher.fetch, "https://example.com/app")
+        self.assertEqual(result.html, ARTICLE)
+        anyio.run(fetcher.aclose)
+        self.assertEqual(len(static.calls), 1)
+
+        # A later run skips the static probe
+        static = StubFetcher(SHELL)
+        fetcher = AutoFetcher(static, renderer, FetchModeRegistry(path))
+        anyio.run(fetcher.fetch, "https://example.com/app/")
+        self.assertEqual(static.calls, [])
+        self.assertEqual(len(renderer.calls), 2)
+
+    def test_static_pages_are_not_rendered(self):
+        static = StubFetcher(ARTICLE)
+        renderer = StubFetcher(ARTICLE)
+        fetcher = AutoFetcher(static, renderer)
+        anyio.run(fetcher.fetch, "https://example.com/page")
+        self.assertEqual(renderer.calls, [])
+
+    def test_conditional_headers_reach_static_fetcher(self):
+        static = ConditionalFetcher(SHELL)
+        renderer = StubFetcher(ARTICLE)
+        registry = FetchModeRegistry()
+        registry.set("https://example.com/app", RENDER)
+        fetcher = AutoFetcher(static, renderer, registry)
+        self.assertTrue(fetcher.revalidates)
+
+        validators = {"If-None-Match": '"v1"'}
+        for url in ("https://example.com/app", "https://example.com/guide"):
+            result = anyio.run(lambda: fetcher.fetch(url, headers=validators))
+            self.assertEqual(result.status, 304)
+        # Unchanged pages are never rendered, whatever their mode
+        self.assertEqual(renderer.calls, [])
+        self.assertEqual([headers for _, headers in static.calls], [validators, validators])
+
+if __name__ == "__main__":
+    unittest.main()
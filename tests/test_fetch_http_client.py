@@ -0,0 +1,69 @@
+import unittest
+from collections import Counter
+import anyio
+import httpx
+from docugen.fetch.http_client import HTTP2_AVAILABLE, HttpClientPool
+
+
+class TestHttpClientPool(unittest.TestCase):
+    def test_client_is_shared_until_closed(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            return httpx.Response(404 if request.url.path == "/robots.txt" else 200, text="ok")
+
+        pool = HttpClientPool(transport=httpx.MockTransport(handler))
+
+        async def main():
+            client = pool.client
+            self.assertIs(pool.client, client)
+            await pool.get("https://example.com/a")
+            async with pool.stream("GET", "https://example.com/b") as response:
+                self.assertEqual(await response.aread(), b"ok")
+            self.assertIs(pool.client, client)
+            await pool.aclose()
+            self.assertIsNone(pool._client)
+            self.assertTrue(client.is_closed)
+            async with pool:
+                self.assertIsNot(pool.client, client)
+            self.assertIsNone(pool._client)
+
+        anyio.run(main)
+        self.assertEqual(requests, ["/robots.txt", "/a", "/b"])
+
+    def test_requests_are_limited_per_host(self):
+        active = Counter()
+        peak = Counter()
+
+        async def handler(request):
+            host = request.url.host
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            peak["all"] = max(peak["all"], sum(active.values()))
+            await anyio.sleep(0.01)
+            active[host] -= 1
+            return httpx.Response(200)
+
+        pool = HttpClientPool(per_host_limit=2, transport=httpx.MockTransport(handler))
+
+        async def main():
+            async with pool, anyio.create_task_group() as tg:
+                for i in range(8):
+                    tg.start_soon(pool.get, f"https://a.example/{i}")
+                    tg.start_soon(pool.get, f"https://b.example/{i}")
+
+        anyio.run(main)
+        self.assertEqual(peak["a.example"], 2)
+        self.assertEqual(peak["b.example"], 2)
+        self.assertGreater(peak["all"], 2)
+
+    def test_http2_follows_h2_availability(self):
+        self.assertEqual(HttpClientPool().http2, HTTP2_AVAILABLE)
+        self.assertFalse(HttpClientPool(http2=False).http2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import anyio
+import httpx
+from docugen.fetch.base import FetchResult
+from docugen.fetch.http_client import HttpClientPool
+from docugen.fetch.httpx_fetcher import HttpxFetcher
+
+PDF = b"%PDF-1.4 not really"
+
+
+def handler(request):
+    if request.url.path == "/manual.pdf":
+        return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=PDF)
+    if request.url.path == "/robots.txt":
+        return httpx.Response(404)
+    return httpx.Response(200, headers={"Content-Type": "text/html; charset=utf-8", "ETag": '"1"'}, content="<html>héllo</html>".encode())
+
+
+class TestHttpxFetcher(unittest.TestCase):
+    def fetch(self, url, **options):
+        pool = HttpClientPool()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def main():
+            async with pool, HttpxFetcher(pool, **options) as fetcher:
+                return await fetcher.fetch(url)
+
+        return anyio.run(main)
+
+    def test_html_response(self):
+        result = self.fetch("https://example.com/docs/")
+        self.assertTrue(result.is_html)
+        self.assertEqual(result.html, "<html>héllo</html>")
+        self.assertEqual(result.content_type, "text/html")
+        self.assertEqual(result.size, len("<html>héllo</html>".encode()))
+        self.assertEqual(result.headers["etag"], '"1"')
+        self.assertIsNone(result.body)
+
+    def test_non_html_response_keeps_bytes(self):
+        result = self.fetch("https://example.com/manual.pdf")
+        self.assertFalse(result.is_html)
+        self.assertEqual(result.html, "")
+        self.assertEqual(result.body, PDF)
+        self.assertEqual(result.size, len(PDF))
+        self.assertEqual(result.content_type, "application/pdf")
+
+    def test_large_file_body_is_not_kept(self):
+        result = self.fetch("https://example.com/manual.pdf", max_file_bytes=4)
+        self.assertFalse(result.is_html)
+        self.assertIsNone(result.body)
+        self.assertEqual(result.size, len(PDF))
+
+    def test_defaults(self):
+        result = FetchResult("https://example.com/", "<p>ok</p>")
+        self.assertTrue(result.is_html)
+        self.assertEqual(result.size, 9)
+        self.assertEqual(result.timings.as_dict(), {"dns": None, "connect": None, "ttfb": None, "total": None})
+        self.assertFalse(FetchResult("https://example.com/a.json", "", headers={"content-type": "application/json"}).is_html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import time
+import anyio
+from docugen.fetch.base import Fetcher, FetchResult, CapturedResource
+from docugen.fetch.page_store import PageStore, StoredPageFetcher
+
+class CountingFetcher(Fetcher):
+    def __init__(self):
+        self.calls = []
+
+    async def fetch(self, url):
+        self.calls.append(url)
+        return FetchResult(url, "<html>live</html>")
+
+class TestPageStore(unittest.TestCase):
+    def test_lookup_by_requested_and_final_url(self):
+        store = PageStore()
+        store.put("https://example.com/docs", FetchResult("https://example.com/docs/latest/", "<html/>"))
+        self.assertIsNotNone(store.get("https://www.example.com/docs/"))
+        self.assertIsNotNone(store.get("https://example.com/docs/latest"))
+        self.assertEqual(len(store), 1)
+
+    def test_captured_resources_are_not_kept(self):
+        store = PageStore()
+        css = CapturedResource("https://example.com/s.css", b"body{}", "text/css")
+        store.put("https://example.com/", FetchResult("https://example.com/", "<html/>", resources={css.url: css}))
+        result = store.get("https://example.com/")
+        self.assertEqual(result.html, "<html/>")
+        self.assertEqual(result.resources, {})
+
+    def test_stale_pages_are_refetched(self):
+        store = PageStore()
+        store.put("https://example.com/old", FetchResult("https://example.com/old", "<html>old</html>"), fetched_at=time.time() - 100)
+        store.put("https://example.com/new", FetchResult("https://example.com/new", "<html>new</html>"))
+        inner = CountingFetcher()
+        fetcher = StoredPageFetcher(inner, store, max_age=10)
+
+        new = anyio.run(fetcher.fetch, "https://example.com/new")
+        old = anyio.run(fetcher.fetch, "https://example.com/old")
+        self.assertEqual(new.html, "<html>new</html>")
+        self.assertEqual(old.html, "<html>live</html>")
+        self.assertEqual(inner.calls, ["https://example.com/old"])
+        self.assertEqual(len(store), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import anyio
+from docugen.fetch.base import FetchResult
+from docugen.fetch.playwright_fetcher import PlaywrightFetcher
+
+class FakeRequest:
+    def __init__(self, url, resource_type="stylesheet", redirected_from=None):
+        self.url = url
+        self.method = "GET"
+        self.resource_type = resource_type
+        self.redirected_from = redirected_from
+
+class FakeResponse:
+    def __init__(self, request, body, status=200, url=None):
+        self.request = request
+        self.url = url or request.url
+        self.status = status
+        self.headers = {"content-type": "text/css"}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.visited = []
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url):
+        self.visited.append(url)
+
+    async def unroute(self, pattern):
+        pass
+
+class FakeContext:
+    def __init__(self):
+        self.page = FakePage(self)
+        self.closed = False
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+        self.page.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+def stub_fetcher(**options):
+    """A fetcher on a fake browser whose render fails for URLs containing "fail"."""
+    fetcher = PlaywrightFetcher(**options)
+    fetcher._browser = FakeBrowser()
+
+    async def render(page, url):
+        if "fail" in url:
+            raise RuntimeError("navigation failed")
+        return FetchResult(url, "<p>ok</p>")
+
+    fetcher._render = render
+    return fetcher
+
+class TestCapturedResources(unittest.TestCase):
+    def test_selects_subresources(self):
+        fetcher = PlaywrightFetcher()
+        self.assertTrue(fetcher._should_capture(FakeResponse(FakeRequest("https://a/s.css"), b"")))
+        self.assertFalse(fetcher._should_capture(FakeResponse(FakeRequest("https://a/"), b"", status=404)))
+        self.assertFalse(fetcher._should_capture(FakeResponse(FakeRequest("https://a/x", "xhr"), b"")))
+        self.assertFalse(PlaywrightFetcher(capture_resources=False)._should_capture(FakeResponse(FakeRequest("https://a/s.css"), b"")))
+
+    def test_collect_respects_limits_and_redirects(self):
+        fetcher = PlaywrightFetcher(max_resource_bytes=10, max_page_bytes=15)
+        original = FakeRequest("https://a/old.css")
+        redirected = FakeRequest("https://a/new.css", redirected_from=original)
+        responses = [
+            FakeResponse(redirected, b"12345678"),
+            FakeResponse(FakeRequest("https://a/huge.css"), b"x" * 11),
+            FakeResponse(FakeRequest("https://a/over-page.css"), b"x" * 8),
+        ]
+        resources = anyio.run(fetcher._collect_resources, responses)
+        self.assertEqual(sorted(resources), ["https://a/new.css", "https://a/old.css"])
+        self.assertEqual(resources["https://a/old.css"].body, b"12345678")
+
+class TestContextPool(unittest.TestCase):
+    def test_contexts_recycled_after_uses(self):
+        fetcher = stub_fetcher(recycle_after=2)
+
+        async def main():
+            for i in range(5):
+                await fetcher.fetch(f"https://a/{i}")
+
+        anyio.run(main)
+        contexts = fetcher._browser.contexts
+        self.assertEqual(len(contexts), 3)
+        self.assertEqual([c.closed for c in contexts], [True, True, False])
+        self.assertEqual([p.context for p in fetcher._idle_pages], [contexts[2]])
+        # Idle pages drop the rendered document
+        self.assertEqual(contexts[0].page.visited, ["about:blank"])
+
+    def test_failed_fetch_releases_its_context(self):
+        fetcher = stub_fetcher(concurrency=1)
+
+        async def main():
+            await fetcher.fetch("https://a/ok")
+            with self.assertRaises(Exception):
+                await fetcher.fetch("https://a/fail")
+            # The only slot was given back; a fresh context serves the next page
+            with anyio.fail_after(1):
+                return await fetcher.fetch("https://a/next")
+
+        result = anyio.run(main)
+        self.assertEqual(result.url, "https://a/next")
+        first, second = fetcher._browser.contexts
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual([p.context for p in fetcher._idle_pages], [second])
+
+    def test_closed_idle_pages_are_skipped(self):
+        fetcher = stub_fetcher()
+
+        async def main():
+            await fetcher.fetch("https://a/1")
+            fetcher._idle_pages[0].page.closed = True
+            await fetcher.fetch("https://a/2")
+
+        anyio.run(main)
+        first, second = fetcher._browser.contexts
+        self.assertTrue(first.closed)
+        self.assertEqual([p.context for p in fetcher._idle_pages], [second])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+import unittest
+from docugen.core import _create_fetcher
+from docugen.fetch.readiness import ReadinessBudget, ReadinessPolicy
+
+class TestReadinessPolicy(unittest.TestCase):
+    def test_site_budget_matches_subdomains(self):
+        slow = ReadinessBudget(quiet_ms=1500, max_wait_ms=20000)
+        policy = ReadinessPolicy(sites={"www.threejs.org": slow})
+        self.assertIs(policy.for_url("https://threejs.org/docs/#api/en/core/Object3D"), slow)
+        self.assertIs(policy.for_url("https://docs.threejs.org/manual"), slow)
+        self.assertIs(policy.for_url("https://docs.vulkan.org/spec"), policy.default)
+
+    def test_default_budget(self):
+        policy = ReadinessPolicy()
+        budget = policy.for_url("https://example.com/")
+        self.assertEqual(budget.quiet_ms, 500)
+        self.assertTrue(budget.scroll)
+
+    def test_load_from_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "readiness.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"default": {"quiet_ms": 300}, "sites": {"threejs.org": {"max_wait_ms": 20000, "scroll": False}}}, f)
+            policy = ReadinessPolicy.load(path)
+            # Builds pass a file path on to the renderer's policy
+            fetcher = _create_fetcher(True, "playwright", readiness=path)
+
+        self.assertEqual(policy.default.quiet_ms, 300)
+        budget = policy.for_url("https://threejs.org/docs/")
+        self.assertEqual(budget.max_wait_ms, 20000)
+        self.assertFalse(budget.scroll)
+        self.assertEqual(fetcher.readiness.for_url("https://threejs.org/docs/").max_wait_ms, 20000)
+
+if __name__ == "__main__":
+    unittest.main()
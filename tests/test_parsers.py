@@ -1,4 +1,5 @@
 import unittest
+from bs4 import BeautifulSoup
 from docugen.parsers.generic import GenericParser
 
 class TestGenericParser(unittest.TestCase):
@@ -32,5 +33,12 @@ class TestGenericParser(unittest.TestCase):
         ]
         self.assertEqual(parsed.symbols, expected_symbols)
 
+    def test_parse_reuses_document(self):
+        soup = BeautifulSoup('<html><head><title>T</title></head><body><h1 id="a">A</h1></body></html>', "lxml")
+        parsed = self.parser.parse(soup)
+        self.assertIs(parsed.content, soup)
+        self.assertEqual(parsed.title, "T")
+        self.assertEqual(parsed.symbols, [("A", "Section", "a")])
+
 if __name__ == "__main__":
     unittest.main()